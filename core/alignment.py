@@ -0,0 +1,253 @@
+"""Assign diarized speaker turns to transcript segments and words."""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+
+from core.segments import SegmentTable, WordTable
+
+# A segment or word with no overlapping turn takes the nearest turn's
+# speaker if that turn is at most this many seconds away.
+MAX_GAP_SECONDS = 1.0
+# Speaker runs shorter than this inside a segment are folded into their
+# neighbour instead of producing a split.
+MIN_RUN_SECONDS = 0.5
+
+
+def _speaker_names(turns: Sequence[Dict]) -> Tuple[List[str], Dict[str, int]]:
+    names: List[str] = []
+    name_ids: Dict[str, int] = {}
+    for turn in turns:
+        if turn["speaker"] not in name_ids:
+            name_ids[turn["speaker"]] = len(names)
+            names.append(turn["speaker"])
+    return names, name_ids
+
+
+def overlap_speakers(
+    starts: np.ndarray,
+    ends: np.ndarray,
+    turns: Sequence[Dict],
+    max_gap: float = MAX_GAP_SECONDS,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    For each interval pick the speaker whose turns overlap it longest.
+    Returns (ids, names): an int32 array indexing names, -1 where no turn is
+    within max_gap. Intervals and turns are swept in start order; a turn is
+    admitted once the interval start passes its own start and evicted once
+    it ends, so besides the O(n log n + m log m) sorts each turn is added
+    and removed once and otherwise only visited for intervals it overlaps:
+    O(n + m + k) for k overlapping (interval, turn) pairs.
+    """
+    starts = np.asarray(starts, dtype=np.float64)
+    ends = np.asarray(ends, dtype=np.float64)
+    ids = np.full(len(starts), -1, dtype=np.int32)
+    turns = sorted(turns, key=lambda t: t["start"])
+    names, name_ids = _speaker_names(turns)
+    if not len(starts) or not turns:
+        return ids, names
+    t_start = [t["start"] for t in turns]
+    t_end = [t["end"] for t in turns]
+    t_speaker = [name_ids[t["speaker"]] for t in turns]
+    starts_list = starts.tolist()
+    ends_list = ends.tolist()
+
+    j = 0
+    active: List[int] = []
+    last_end, last_speaker = -np.inf, -1
+    for i in np.argsort(starts, kind="stable").tolist():
+        s0, s1 = starts_list[i], ends_list[i]
+        # Interval starts only grow, so turns are admitted against the start
+        # and a turn that ended is never needed again except as the
+        # "previous turn" for the gap fallback.
+        while j < len(turns) and t_start[j] <= s0:
+            active.append(j)
+            j += 1
+        totals: Dict[int, float] = {}
+        still_open = []
+        for k in active:
+            if t_end[k] > s0:
+                still_open.append(k)
+                overlap = min(s1, t_end[k]) - s0
+                totals[t_speaker[k]] = totals.get(t_speaker[k], 0.0) + overlap
+            elif t_end[k] > last_end:
+                last_end, last_speaker = t_end[k], t_speaker[k]
+        active = still_open
+        # Turns starting inside the interval all overlap it; they are
+        # admitted for real once a later interval starts past them.
+        upcoming = j
+        while upcoming < len(turns) and t_start[upcoming] < s1:
+            k = upcoming
+            overlap = max(0.0, min(s1, t_end[k]) - t_start[k])
+            totals[t_speaker[k]] = totals.get(t_speaker[k], 0.0) + overlap
+            upcoming += 1
+        if totals:
+            ids[i] = max(totals, key=totals.get)
+            continue
+        before = s0 - last_end
+        after = t_start[upcoming] - s1 if upcoming < len(turns) else np.inf
+        if min(before, after) <= max_gap:
+            ids[i] = last_speaker if before <= after else t_speaker[upcoming]
+    return ids, names
+
+
+def segment_speakers(
+    transcript: SegmentTable,
+    turns: Sequence[Dict],
+    max_gap: float = MAX_GAP_SECONDS,
+) -> Tuple[np.ndarray, List[str]]:
+    """
+    overlap_speakers for the segments of a transcript, looking up the
+    segments each turn overlaps in the transcript's interval index.
+    Segments no turn overlaps take the nearest turn within max_gap.
+    """
+    turns = sorted(turns, key=lambda t: t["start"])
+    names, name_ids = _speaker_names(turns)
+    if not len(transcript) or not turns:
+        return np.full(len(transcript), -1, dtype=np.int32), names
+    t_start = np.array([t["start"] for t in turns], dtype=np.float64)
+    t_end = np.array([t["end"] for t in turns], dtype=np.float64)
+    t_speaker = np.array([name_ids[t["speaker"]] for t in turns], dtype=np.intp)
+    queries, rows = transcript.overlap_pairs(t_start, t_end)
+    overlap = np.minimum(transcript.end[rows], t_end[queries]) - np.maximum(
+        transcript.start[rows], t_start[queries]
+    )
+    weights = np.zeros((len(transcript), len(names)))
+    np.add.at(weights, (rows, t_speaker[queries]), overlap)
+    ids = np.where(weights.max(axis=1) > 0, weights.argmax(axis=1), -1)
+    ids = ids.astype(np.int32)
+    missing = np.flatnonzero(ids < 0)
+    if len(missing):
+        ids[missing], _ = overlap_speakers(
+            transcript.start[missing], transcript.end[missing], turns, max_gap
+        )
+    return ids, names
+
+
+def assign_speakers(
+    transcript: SegmentTable,
+    turns: Sequence[Dict],
+    max_gap: float = MAX_GAP_SECONDS,
+) -> List[str]:
+    """
+    Set each segment's speaker to the turn speaker it overlaps most.
+    Returns the distinct speakers in order of first appearance.
+    """
+    ids, names = segment_speakers(transcript, turns, max_gap)
+    for sid, name in enumerate(names):
+        rows = np.flatnonzero(ids == sid)
+        if len(rows):
+            transcript.set_speaker(rows, name)
+    return distinct_speakers(transcript)
+
+
+def distinct_speakers(transcript: SegmentTable) -> List[str]:
+    """Speakers of the transcript in order of first appearance."""
+    ids = transcript.speaker_ids
+    ids = ids[ids >= 0]
+    unique, first = np.unique(ids, return_index=True)
+    return [transcript.speakers[sid] for sid in unique[np.argsort(first)]]
+
+
+def _speaker_runs(
+    speakers: np.ndarray, starts: np.ndarray, ends: np.ndarray, min_run: float
+) -> List[Tuple[int, int, int]]:
+    """
+    Split one segment's word speakers into (first, stop, speaker) runs.
+    Unassigned words join the run before them (or after, at the start) and
+    runs shorter than min_run seconds are merged into the preceding run.
+    """
+    runs: List[List[int]] = []
+    for w, sid in enumerate(speakers.tolist()):
+        if runs and (sid == runs[-1][2] or sid < 0):
+            runs[-1][1] = w + 1
+        elif runs and runs[-1][2] < 0:
+            runs[-1][1:] = [w + 1, sid]
+        else:
+            runs.append([w, w + 1, sid])
+    merged: List[List[int]] = []
+    for run in runs:
+        short = ends[run[1] - 1] - starts[run[0]] < min_run
+        if merged and (short or run[2] == merged[-1][2]):
+            merged[-1][1] = run[1]
+        else:
+            merged.append(run)
+    if len(merged) > 1:
+        first = merged[0]
+        if ends[first[1] - 1] - starts[first[0]] < min_run:
+            merged[1][0] = first[0]
+            merged.pop(0)
+    return [tuple(run) for run in merged]
+
+
+def align_transcript(
+    transcript: SegmentTable,
+    turns: Sequence[Dict],
+    words: Optional[WordTable] = None,
+    max_gap: float = MAX_GAP_SECONDS,
+    min_run: float = MIN_RUN_SECONDS,
+) -> Tuple[SegmentTable, Optional[WordTable], List[str]]:
+    """
+    Attach speakers to a transcript. Returns (transcript, words, speakers).
+
+    Without word timings, speakers are assigned per segment in place. With
+    them, every word gets a speaker and segments whose words change speaker
+    are split at the change; the result is a new table (and word table)
+    whose split rows have no translation yet.
+    """
+    if words is None or not len(words):
+        return transcript, words, assign_speakers(transcript, turns, max_gap)
+    w_start = words.start.astype(np.float64)
+    w_end = words.end.astype(np.float64)
+    w_ids, names = overlap_speakers(w_start, w_end, turns, max_gap)
+    s_ids, _ = segment_speakers(transcript, turns, max_gap)
+    bounds = np.searchsorted(words.rows, np.arange(len(transcript) + 1))
+    char_start = words.char_start
+    char_end = words.char_end
+
+    table = SegmentTable(len(transcript))
+    new_words = WordTable(len(words))
+    for row in range(len(transcript)):
+        lo, hi = int(bounds[row]), int(bounds[row + 1])
+        runs = _speaker_runs(w_ids[lo:hi], w_start[lo:hi], w_end[lo:hi], min_run)
+        text = transcript.text[row]
+        if len(runs) <= 1:
+            sid = runs[0][2] if runs and runs[0][2] >= 0 else int(s_ids[row])
+            new_row = table.append(
+                float(transcript.start[row]),
+                float(transcript.end[row]),
+                text,
+                speaker=names[sid] if sid >= 0 else transcript.speaker(row),
+                translated_text=transcript.translated[row],
+            )
+            runs = [(0, hi - lo, sid)]
+            pieces = [(new_row, 0)]
+        else:
+            pieces = []
+            for first, stop, sid in runs:
+                # Text from this run's first word up to the next run's first.
+                cut = int(char_start[lo + first]) if first else 0
+                tail = int(char_start[lo + stop]) if stop < hi - lo else len(text)
+                new_row = table.append(
+                    w_start[lo + first] if first else float(transcript.start[row]),
+                    (
+                        w_end[lo + stop - 1]
+                        if stop < hi - lo
+                        else float(transcript.end[row])
+                    ),
+                    text[cut:tail].strip(),
+                    speaker=names[sid] if sid >= 0 else None,
+                )
+                # Offsets move with the stripped piece of text.
+                shift = cut + len(text[cut:tail]) - len(text[cut:tail].lstrip())
+                pieces.append((new_row, shift))
+        for (first, stop, _), (new_row, shift) in zip(runs, pieces):
+            for i in range(lo + first, lo + stop):
+                new_words.append(
+                    new_row,
+                    w_start[i],
+                    w_end[i],
+                    words.probability[i],
+                    int(char_start[i]) - shift,
+                    int(char_end[i]) - shift,
+                )
+    return table, new_words, distinct_speakers(table)
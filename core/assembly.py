@@ -0,0 +1,171 @@
+"""Timeline-accurate assembly of synthesized clips into one dub track."""
+
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from scipy.io import wavfile
+from core.audio import STRETCH_LIMITS, fit_to_duration, resample, stretch_rate
+from core.loudness import normalize_samples
+import numpy as np
+import os
+import wave
+
+# Tortoise-TTS renders at 24 kHz mono, so the dub track uses the same format.
+DUB_SAMPLE_RATE = 24000
+
+# Summed overlaps are soft-limited above this level instead of clipping.
+LIMITER_THRESHOLD = 0.9
+
+ClipSource = Union[str, np.ndarray]
+
+
+def wav_duration(path: str) -> float:
+    """Duration in seconds of a wav file, read from its header."""
+    sample_rate, data = wavfile.read(path, mmap=True)
+    return len(data) / sample_rate
+
+
+def to_float32(data: np.ndarray) -> np.ndarray:
+    """Convert PCM samples of any wav dtype to float32 in [-1, 1]."""
+    if data.dtype == np.float32:
+        return data
+    if data.dtype == np.uint8:
+        return (data.astype(np.float32) - 128.0) / 128.0
+    if np.issubdtype(data.dtype, np.integer):
+        return data.astype(np.float32) / float(np.iinfo(data.dtype).max + 1)
+    return data.astype(np.float32)
+
+
+def read_clip(path: str, sample_rate: int = DUB_SAMPLE_RATE) -> np.ndarray:
+    """Read a wav clip as mono float32 at sample_rate."""
+    rate, data = wavfile.read(path)
+    data = to_float32(data)
+    if data.ndim > 1:
+        data = data.mean(axis=1, dtype=np.float32)
+    return resample(data, rate, sample_rate)
+
+
+def _clip_frames(clip: ClipSource, sample_rate: int) -> int:
+    if not isinstance(clip, str):
+        return len(clip)
+    try:
+        rate, data = wavfile.read(clip, mmap=True)
+    except ValueError:
+        # Formats numpy cannot memory-map (e.g. 24-bit) are read in full.
+        rate, data = wavfile.read(clip)
+    return int(np.ceil(len(data) * sample_rate / rate))
+
+
+def soft_limit(buffer: np.ndarray, threshold: float = LIMITER_THRESHOLD) -> None:
+    """
+    In-place soft-knee limiter: samples above threshold are compressed with
+    tanh so summed overlaps approach but never exceed full scale.
+    """
+    hot = np.abs(buffer) > threshold
+    if hot.any():
+        x = buffer[hot]
+        headroom = 1.0 - threshold
+        buffer[hot] = np.sign(x) * (
+            threshold + headroom * np.tanh((np.abs(x) - threshold) / headroom)
+        )
+
+
+def write_wav(
+    path: str, buffer: np.ndarray, sample_rate: int, block: int = 1 << 20
+) -> None:
+    """Write mono float32 samples as 16-bit PCM in fixed-size blocks."""
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        for start in range(0, len(buffer), block):
+            chunk = np.clip(buffer[start : start + block], -1.0, 1.0)
+            f.writeframes((chunk * 32767.0).astype("<i2").tobytes())
+
+
+def fit_clips(
+    clips: Iterable[ClipSource],
+    slots: Iterable[float],
+    sample_rate: int = DUB_SAMPLE_RATE,
+    limits: Tuple[float, float] = STRETCH_LIMITS,
+    max_workers: int = 0,
+    max_pending: int = 0,
+    loudness: Optional[float] = None,
+) -> Iterator[np.ndarray]:
+    """
+    Load each clip and time-stretch it towards its slot length (seconds;
+    0 keeps the clip as is) on a thread pool, yielding results in order.
+    With loudness (LUFS), every clip is also normalized to that level so
+    different voices match. At most max_pending clips (default: twice the
+    workers) are loaded at once, so memory stays bounded however many
+    clips there are.
+    """
+    max_workers = max_workers or min(8, os.cpu_count() or 1)
+    max_pending = max_pending or 2 * max_workers
+
+    def fit(clip: ClipSource, slot: float) -> np.ndarray:
+        data = read_clip(clip, sample_rate) if isinstance(clip, str) else clip
+        if slot > 0:
+            data = fit_to_duration(data, sample_rate, slot, limits)
+        if loudness is not None:
+            data = normalize_samples(data, sample_rate, loudness)
+        return data
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        pending = deque()
+        for clip, slot in zip(clips, slots):
+            pending.append(pool.submit(fit, clip, slot))
+            if len(pending) >= max_pending:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def assemble_timeline(
+    clips: List[Tuple[float, ClipSource]],
+    duration: float,
+    audio_out_path: Optional[str] = None,
+    sample_rate: int = DUB_SAMPLE_RATE,
+    slots: Optional[Sequence[float]] = None,
+    limits: Tuple[float, float] = STRETCH_LIMITS,
+    max_workers: int = 0,
+    loudness: Optional[float] = None,
+) -> np.ndarray:
+    """
+    Place (start seconds, clip) pairs on a silent float32 timeline of at least
+    `duration` seconds. Clips are wav paths or mono float32 arrays at
+    sample_rate. With slots (seconds per clip), each clip is first
+    time-stretched towards its slot within limits; with loudness (LUFS),
+    clips are normalized to it (see fit_clips).
+    Overlapping clips are summed and soft-limited. The buffer grows only if
+    a clip runs past the end. Writes audio_out_path if given.
+    """
+    # Size the buffer from the clip headers so clips are loaded one at a time.
+    offsets = []
+    length = int(round(duration * sample_rate))
+    for i, (start, clip) in enumerate(clips):
+        offset = max(0, int(round(start * sample_rate)))
+        offsets.append(offset)
+        frames = _clip_frames(clip, sample_rate)
+        if slots is not None and slots[i] > 0:
+            target = int(round(slots[i] * sample_rate))
+            frames = int(round(frames / stretch_rate(frames, target, limits)))
+        length = max(length, offset + frames)
+    buffer = np.zeros(length, dtype=np.float32)
+    if slots is None:
+        slots = [0.0] * len(clips)
+    fitted = fit_clips(
+        (clip for _, clip in clips),
+        slots,
+        sample_rate,
+        limits,
+        max_workers,
+        loudness=loudness,
+    )
+    for offset, data in zip(offsets, fitted):
+        data = data[: length - offset]
+        buffer[offset : offset + len(data)] += data
+    soft_limit(buffer)
+    if audio_out_path:
+        write_wav(audio_out_path, buffer, sample_rate)
+    return buffer
@@ -1,6 +1,25 @@
-from moviepy.editor import VideoFileClip
+from typing import BinaryIO, Callable, Dict, List, Optional, Sequence, Tuple, Union
+from math import gcd
+from scipy import fft
+from scipy.signal import resample_poly
+import numpy as np
 import os
-from typing import Optional
+import subprocess
+import threading
+
+# (sample rate, channels) used by the ASR/diarization models and for mixing.
+ASR_FORMAT = (16000, 1)
+MIX_FORMAT = (48000, 2)
+
+AudioFormat = Tuple[int, int]
+
+# Phase vocoder frame and hop in samples (~43 ms / 11 ms at 24 kHz).
+STRETCH_FFT = 1024
+STRETCH_HOP = 256
+# Duration fitting never speeds speech up or slows it down past these rates.
+STRETCH_LIMITS = (0.8, 1.3)
+# Clips within this fraction of their slot length are left untouched.
+STRETCH_TOLERANCE = 0.03
 
 
 def extract_audio(video_path: str, audio_out_path: str) -> bool:
@@ -9,17 +28,280 @@ def extract_audio(video_path: str, audio_out_path: str) -> bool:
     Returns True on success, False on error.
     """
     try:
-        with VideoFileClip(video_path) as video:
-            audio = video.audio
-            if audio is None:
-                return False
-            audio.write_audiofile(audio_out_path, codec="pcm_s16le")
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-i", video_path]
+        cmd += ["-map", "0:a:0", "-vn", "-acodec", "pcm_s16le", audio_out_path]
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         return True
     except Exception as e:
         print(f"Audio extraction error: {e}")
         return False
 
 
+def open_decoder(path: str, sample_rate: int, channels: int) -> subprocess.Popen:
+    """Start ffmpeg writing the first audio stream as raw f32le to stdout."""
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", path, "-map", "0:a:0"]
+    cmd += ["-vn", "-ac", str(channels), "-ar", str(sample_rate)]
+    cmd += ["-f", "f32le", "-acodec", "pcm_f32le", "pipe:1"]
+    return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+def open_multi_decoder(
+    path: str, formats: Sequence[AudioFormat]
+) -> Tuple[subprocess.Popen, List[BinaryIO]]:
+    """
+    Start one ffmpeg run that decodes the first audio stream once and writes
+    it as raw f32le in every (sample_rate, channels) format, each to its own
+    pipe. Returns the process and one reader per format; the readers fill
+    concurrently, so drain them on separate threads.
+    """
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-i", path]
+    readers, write_fds = [], []
+    try:
+        for sample_rate, channels in formats:
+            read_fd, write_fd = os.pipe()
+            readers.append(os.fdopen(read_fd, "rb"))
+            write_fds.append(write_fd)
+            cmd += ["-map", "0:a:0", "-vn", "-ac", str(channels)]
+            cmd += ["-ar", str(sample_rate), "-f", "f32le", "-acodec", "pcm_f32le"]
+            cmd.append(f"pipe:{write_fd}")
+        proc = subprocess.Popen(
+            cmd,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            pass_fds=write_fds,
+        )
+    except Exception:
+        for reader in readers:
+            reader.close()
+        raise
+    finally:
+        for write_fd in write_fds:
+            os.close(write_fd)
+    return proc, readers
+
+
+def drain_decoder(
+    proc: subprocess.Popen,
+    readers: List[BinaryIO],
+    writers: List[Callable[[bytes], object]],
+    block: int = 1 << 20,
+) -> None:
+    """
+    Feed every reader of open_multi_decoder to its writer (e.g. a file's
+    write) on one thread per reader, then wait for ffmpeg. Raises
+    RuntimeError if ffmpeg fails.
+    """
+    errors: List[BaseException] = []
+
+    def pump(reader: BinaryIO, write: Callable[[bytes], object]) -> None:
+        try:
+            with reader:
+                while True:
+                    chunk = reader.read(block)
+                    if not chunk:
+                        break
+                    write(chunk)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [
+        threading.Thread(target=pump, args=(reader, write), daemon=True)
+        for reader, write in zip(readers, writers)
+    ]
+    for thread in threads:
+        thread.start()
+    stderr = proc.stderr.read()
+    for thread in threads:
+        thread.join()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace')}")
+    if errors:
+        raise errors[0]
+
+
+def decode_audio(
+    path: str, sample_rate: int = 16000, channels: int = 1, block: int = 1 << 20
+) -> np.ndarray:
+    """
+    Decode the first audio stream of a media file with ffmpeg straight into
+    float32 samples at sample_rate. Returns shape (frames,) for mono and
+    (frames, channels) otherwise. The video stream is never decoded.
+    Raises RuntimeError if ffmpeg fails.
+    """
+    proc = open_decoder(path, sample_rate, channels)
+    data = bytearray()
+    while True:
+        chunk = proc.stdout.read(block)
+        if not chunk:
+            break
+        data += chunk
+    stderr = proc.stderr.read()
+    if proc.wait() != 0:
+        raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace')}")
+    samples = np.frombuffer(data, dtype="<f4")
+    if channels > 1:
+        samples = samples[: len(samples) - len(samples) % channels]
+        samples = samples.reshape(-1, channels)
+    return samples
+
+
+def decode_audio_formats(
+    path: str, formats: Sequence[AudioFormat] = (ASR_FORMAT, MIX_FORMAT)
+) -> Dict[AudioFormat, np.ndarray]:
+    """
+    Decode a media file once with ffmpeg into float32 samples in several
+    (sample_rate, channels) formats, e.g. ASR_FORMAT for the models and
+    MIX_FORMAT for mixing. Shapes are as in decode_audio.
+    """
+    formats = list(dict.fromkeys(formats))
+    buffers = [bytearray() for _ in formats]
+    proc, readers = open_multi_decoder(path, formats)
+    try:
+        drain_decoder(proc, readers, [buffer.extend for buffer in buffers])
+    except Exception:
+        proc.kill()
+        raise
+    results = {}
+    for (sample_rate, channels), data in zip(formats, buffers):
+        samples = np.frombuffer(data, dtype="<f4")
+        if channels > 1:
+            samples = samples[: len(samples) - len(samples) % channels]
+            samples = samples.reshape(-1, channels)
+        results[(sample_rate, channels)] = samples
+    return results
+
+
+def resample(data: np.ndarray, rate: int, target_rate: int) -> np.ndarray:
+    """Polyphase resample float32 samples along the time axis."""
+    if rate == target_rate:
+        return data
+    g = gcd(rate, target_rate)
+    return resample_poly(data, target_rate // g, rate // g, axis=0).astype(np.float32)
+
+
+def _nearest_peaks(magnitude: np.ndarray) -> np.ndarray:
+    """For every bin of every frame, the index of the closest spectral peak."""
+    frames, bins = magnitude.shape
+    index = np.broadcast_to(np.arange(bins, dtype=np.int32), (frames, bins))
+    peak = np.zeros((frames, bins), dtype=bool)
+    peak[:, 1:-1] = (magnitude[:, 1:-1] > magnitude[:, :-2]) & (
+        magnitude[:, 1:-1] >= magnitude[:, 2:]
+    )
+    before = np.maximum.accumulate(np.where(peak, index, -1), axis=1)
+    after = np.minimum.accumulate(np.where(peak, index, bins)[:, ::-1], axis=1)
+    after = after[:, ::-1]
+    nearest = np.where(index - before <= after - index, before, after)
+    # Frames or edges without a peak keep their own phase.
+    missing = (nearest < 0) | (nearest >= bins)
+    return np.where(missing, index, nearest)
+
+
+def time_stretch(
+    samples: np.ndarray,
+    rate: float,
+    n_fft: int = STRETCH_FFT,
+    hop: int = STRETCH_HOP,
+) -> np.ndarray:
+    """
+    Change the duration of mono float32 samples by 1/rate without changing
+    pitch (rate > 1 shortens). Phase vocoder computed on all frames at once:
+    one batched FFT, interpolated magnitudes, phase advances accumulated per
+    bin and locked to the nearest spectral peak (which keeps the bins of one
+    partial coherent), then a strided overlap-add. n_fft must be a multiple
+    of hop.
+    """
+    samples = np.asarray(samples, dtype=np.float32)
+    out_len = int(round(len(samples) / rate))
+    if rate == 1.0 or not len(samples):
+        return samples.copy()
+    window = np.hanning(n_fft + 1)[:-1].astype(np.float32)
+    # Frame 0 is centred on the first sample.
+    padded = np.pad(samples, (n_fft // 2, n_fft + hop))
+    frames = np.lib.stride_tricks.sliding_window_view(padded, n_fft)[::hop]
+    spec = fft.rfft(frames * window, axis=1)
+
+    # Fractional analysis frame for every synthesis frame. Everything below
+    # stays float32/complex64; phase increments are wrapped before being
+    # accumulated so float32 keeps enough precision on long clips.
+    steps = np.arange(0, len(spec) - 1, rate)
+    index = steps.astype(np.intp)
+    frac = (steps - index).astype(np.float32)[:, None]
+    left, right = spec[index], spec[index + 1]
+    magnitude = np.abs(left)
+    magnitude += frac * (np.abs(right) - magnitude)
+    left_phase, right_phase = np.angle(left), np.angle(right)
+    # Expected phase advance per hop plus the measured deviation from it.
+    two_pi = np.float32(2 * np.pi)
+    omega = (two_pi * hop / n_fft) * np.arange(spec.shape[1], dtype=np.float32)
+    delta = right_phase - left_phase - omega
+    delta -= two_pi * np.round(delta / two_pi)
+    advance = omega + delta
+    advance -= two_pi * np.round(advance / two_pi)
+    advanced = np.empty_like(advance)
+    advanced[0] = left_phase[0]
+    np.cumsum(advance[:-1], axis=0, out=advanced[1:])
+    advanced[1:] += advanced[0]
+    # Identity phase locking: bins keep their analysed offset to their peak.
+    peaks = _nearest_peaks(magnitude)
+    analysed = np.where(frac < 0.5, left_phase, right_phase)
+    phase = analysed - np.take_along_axis(analysed, peaks, axis=1)
+    phase += np.take_along_axis(advanced, peaks, axis=1)
+    locked = np.empty(phase.shape, dtype=np.complex64)
+    locked.real = magnitude * np.cos(phase)
+    locked.imag = magnitude * np.sin(phase)
+    out_frames = fft.irfft(locked, n=n_fft, axis=1)
+    out_frames = (out_frames * window).astype(np.float32)
+
+    # Frames r, r + k, r + 2k ... (k = n_fft / hop) do not overlap, so each
+    # of the k groups is added as one contiguous block.
+    k = n_fft // hop
+    out = np.zeros(hop * (len(out_frames) + k), dtype=np.float32)
+    norm = np.zeros_like(out)
+    window_sq = window * window
+    for r in range(k):
+        group = out_frames[r::k]
+        start = r * hop
+        out[start : start + group.size] += group.ravel()
+        norm[start : start + group.size] += np.tile(window_sq, len(group))
+    out /= np.maximum(norm, 1e-3)
+    out = out[n_fft // 2 : n_fft // 2 + out_len]
+    if len(out) < out_len:
+        out = np.pad(out, (0, out_len - len(out)))
+    return out
+
+
+def stretch_rate(
+    frames: int,
+    target_frames: int,
+    limits: Tuple[float, float] = STRETCH_LIMITS,
+    tolerance: float = STRETCH_TOLERANCE,
+) -> float:
+    """Rate that fits frames into target_frames, clamped to limits (1.0: keep)."""
+    if frames <= 0 or target_frames <= 0:
+        return 1.0
+    rate = frames / target_frames
+    if abs(rate - 1.0) <= tolerance:
+        return 1.0
+    return min(max(rate, limits[0]), limits[1])
+
+
+def fit_to_duration(
+    samples: np.ndarray,
+    sample_rate: int,
+    duration: float,
+    limits: Tuple[float, float] = STRETCH_LIMITS,
+    tolerance: float = STRETCH_TOLERANCE,
+) -> np.ndarray:
+    """
+    Time-stretch mono samples towards duration seconds. The rate is clamped
+    to limits, so a clip far off its slot is only brought closer.
+    """
+    rate = stretch_rate(
+        len(samples), int(round(duration * sample_rate)), limits, tolerance
+    )
+    return samples if rate == 1.0 else time_stretch(samples, rate)
+
+
 def convert_audio_format(
     input_path: str, output_path: str, codec: str = "pcm_s16le"
 ) -> bool:
@@ -47,9 +329,28 @@ def separate_background_music(
     raise NotImplementedError
 
 
-def normalize_audio(audio_path: str, output_path: Optional[str] = None) -> str:
+def normalize_audio(
+    audio: Union[str, np.ndarray],
+    output_path: Optional[str] = None,
+    sample_rate: Optional[int] = None,
+    target: Optional[float] = None,
+    ceiling: Optional[float] = None,
+) -> Union[str, np.ndarray]:
     """
-    Normalize audio volume (stub).
+    EBU R128 loudness normalization to target LUFS (default -23) with true
+    peaks held below ceiling dBTP (default -1), streaming in two passes.
+    A media file is written to output_path (default <name>_normalized.wav)
+    and that path returned. A float32 buffer (sample_rate required) is
+    returned normalized, or written to output_path if one is given.
+    Raises on decode or write errors.
     """
-    # TODO: Implement normalization
-    raise NotImplementedError
+    from core import loudness
+
+    target = loudness.TARGET_LUFS if target is None else target
+    ceiling = loudness.TRUE_PEAK_CEILING if ceiling is None else ceiling
+    if isinstance(audio, np.ndarray) and output_path is None:
+        return loudness.normalize_samples(audio, sample_rate, target, ceiling)
+    if output_path is None:
+        output_path = os.path.splitext(audio)[0] + "_normalized.wav"
+    loudness.normalize_to_file(audio, output_path, sample_rate, target, ceiling)
+    return output_path
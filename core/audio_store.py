@@ -0,0 +1,186 @@
+"""Decoded-audio store: raw float32 PCM files shared through numpy.memmap."""
+
+from typing import Dict, List, Optional, Sequence, Tuple
+from contextlib import ExitStack
+from core.audio import drain_decoder, open_multi_decoder
+import hashlib
+import numpy as np
+import os
+import struct
+import threading
+
+# 64-byte header: magic, sample rate, channels, frames, zero padding.
+MAGIC = b"DCPCM001"
+HEADER = struct.Struct("<8sIIQ")
+HEADER_SIZE = 64
+
+
+def _pack_header(sample_rate: int, channels: int, frames: int) -> bytes:
+    return HEADER.pack(MAGIC, sample_rate, channels, frames).ljust(HEADER_SIZE, b"\0")
+
+
+def read_header(path: str) -> Tuple[int, int, int]:
+    """Return (sample_rate, channels, frames) of a store file."""
+    with open(path, "rb") as f:
+        magic, sample_rate, channels, frames = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC:
+        raise ValueError(f"Not a decoded-audio file: {path}")
+    return sample_rate, channels, frames
+
+
+def open_audio(path: str) -> Tuple[np.memmap, int]:
+    """
+    Map a store file as float32 samples without reading it, returning
+    (samples, sample_rate). Samples are (frames,) for mono and
+    (frames, channels) otherwise. The map is copy-on-write: writes stay
+    private to the caller and never reach the file.
+    """
+    sample_rate, channels, frames = read_header(path)
+    shape = (frames,) if channels == 1 else (frames, channels)
+    if frames == 0:
+        return np.zeros(shape, dtype=np.float32), sample_rate
+    samples = np.memmap(path, dtype="<f4", mode="c", offset=HEADER_SIZE, shape=shape)
+    return samples, sample_rate
+
+
+def write_audio(path: str, samples: np.ndarray, sample_rate: int) -> None:
+    """Write float32 samples shaped (frames,) or (frames, channels)."""
+    data = np.asarray(samples, dtype="<f4")
+    channels = 1 if data.ndim == 1 else data.shape[1]
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_pack_header(sample_rate, channels, len(data)))
+        f.write(np.ascontiguousarray(data).tobytes())
+    os.replace(tmp_path, path)
+
+
+def decode_to_files(
+    source: str, targets: Sequence[Tuple[str, int, int]], block: int = 1 << 20
+) -> None:
+    """
+    Decode a media file's first audio stream once into several store files,
+    one per (path, sample_rate, channels), streaming ffmpeg's output for
+    every format to disk so the decode never sits in memory whole.
+    Raises RuntimeError if ffmpeg fails.
+    """
+    suffix = f"{os.getpid()}.{threading.get_ident()}.tmp"
+    tmp_paths = [f"{path}.{suffix}" for path, _, _ in targets]
+    formats = [(sample_rate, channels) for _, sample_rate, channels in targets]
+    proc, readers = open_multi_decoder(source, formats)
+    files = []
+    try:
+        for tmp_path, (sample_rate, channels) in zip(tmp_paths, formats):
+            files.append(open(tmp_path, "wb"))
+            files[-1].write(_pack_header(sample_rate, channels, 0))
+        drain_decoder(proc, readers, [f.write for f in files], block)
+        for f, (sample_rate, channels) in zip(files, formats):
+            frames = (f.tell() - HEADER_SIZE) // (4 * channels)
+            f.truncate(HEADER_SIZE + frames * 4 * channels)
+            f.seek(0)
+            f.write(_pack_header(sample_rate, channels, frames))
+            f.close()
+        for tmp_path, (path, _, _) in zip(tmp_paths, targets):
+            os.replace(tmp_path, path)
+    except Exception:
+        proc.kill()
+        for f in files + readers:
+            f.close()
+        for tmp_path in tmp_paths:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        raise
+
+
+def decode_to_file(
+    source: str, path: str, sample_rate: int, channels: int, block: int = 1 << 20
+) -> None:
+    """Decode a media file's first audio stream into one store file."""
+    decode_to_files(source, [(path, sample_rate, channels)], block)
+
+
+class AudioStore:
+    """
+    Per-project directory of decoded audio, one file per (source, sample rate,
+    channels). Each input is decoded once, with every format requested
+    together coming out of the same ffmpeg run; every stage and worker
+    process then maps the same file with open_audio instead of decoding or
+    copying it.
+    Files are keyed by the source's path, size and mtime, so an edited source
+    is decoded again.
+    """
+
+    def __init__(self, root: str):
+        self.root = root
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, threading.Lock] = {}
+
+    @staticmethod
+    def key(source: str, sample_rate: int, channels: int) -> str:
+        stat = os.stat(source)
+        parts = f"{os.path.abspath(source)}|{stat.st_size}|{stat.st_mtime_ns}"
+        digest = hashlib.sha256(parts.encode("utf-8")).hexdigest()[:32]
+        return f"{digest}_{sample_rate}x{channels}"
+
+    def path_for(self, source: str, sample_rate: int = 16000, channels: int = 1) -> str:
+        return os.path.join(self.root, self.key(source, sample_rate, channels) + ".pcm")
+
+    def decode(self, source: str, sample_rate: int = 16000, channels: int = 1) -> str:
+        """Return the store file for source, decoding it on first request."""
+        return self.decode_formats(source, [(sample_rate, channels)])[0]
+
+    def decode_formats(
+        self, source: str, formats: Sequence[Tuple[int, int]]
+    ) -> List[str]:
+        """
+        Return the store files for source in each (sample_rate, channels)
+        format, decoding all missing formats in a single ffmpeg run.
+        """
+        paths = [self.path_for(source, *fmt) for fmt in formats]
+        with self._lock:
+            # Sorted so concurrent requests for overlapping formats agree
+            # on the locking order.
+            key_locks = [
+                self._key_locks.setdefault(path, threading.Lock())
+                for path in sorted(set(paths))
+            ]
+        with ExitStack() as stack:
+            for key_lock in key_locks:
+                stack.enter_context(key_lock)
+            missing = {
+                path: fmt
+                for path, fmt in zip(paths, formats)
+                if not os.path.exists(path)
+            }
+            if missing:
+                os.makedirs(self.root, exist_ok=True)
+                decode_to_files(source, [(path, *fmt) for path, fmt in missing.items()])
+        return paths
+
+    def open(
+        self, source: str, sample_rate: int = 16000, channels: int = 1
+    ) -> np.memmap:
+        """Decode source if needed and return its samples memory-mapped."""
+        samples, _ = open_audio(self.decode(source, sample_rate, channels))
+        return samples
+
+    def open_formats(
+        self, source: str, formats: Sequence[Tuple[int, int]]
+    ) -> List[np.memmap]:
+        """open() for several formats, decoded together if needed."""
+        return [open_audio(path)[0] for path in self.decode_formats(source, formats)]
+
+
+def mapped_file(samples: np.ndarray) -> Optional[str]:
+    """
+    Store file that samples map in full, or None for in-memory arrays and
+    partial slices. Worker processes reopen the file instead of receiving
+    pickled copies of the samples.
+    """
+    path = getattr(samples, "filename", None)
+    if isinstance(samples, np.memmap) and path and os.path.exists(path):
+        try:
+            if read_header(path)[2] == len(samples):
+                return path
+        except ValueError:
+            pass
+    return None
@@ -1,5 +1,7 @@
 """Shared constants for DubCraft Studio."""
 
+import os
+
 LANGUAGE_CODES = {
     "English": "en",
     "Spanish": "es",
@@ -16,3 +18,7 @@ LANGUAGE_CODES = {
 }
 
 DEFAULT_MODEL_PATH = "models/"
+
+DEFAULT_CACHE_PATH = os.environ.get("DUBCRAFT_CACHE_DIR", "cache/")
+
+VIDEO_EXTENSIONS = [".mp4", ".mkv", ".mov", ".avi"]
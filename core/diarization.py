@@ -1,30 +1,239 @@
 """Speaker diarization using WhisperX or pyannote-audio."""
 
-from typing import List, Dict
-from pyannote.audio import Pipeline
+from typing import Callable, List, Dict, Optional, Tuple, Union
+from pyannote.audio import Inference, Model, Pipeline
+from pyannote.core import Segment
+from scipy.io import wavfile
+import numpy as np
 import os
+import threading
+import torch
 
+DIARIZATION_MODEL = "pyannote/speaker-diarization@2.1"
+EMBEDDING_MODEL = "pyannote/embedding"
 
-def diarize_speakers(audio_path: str) -> List[Dict]:
+# Recordings longer than this are diarized in overlapping windows.
+CHUNK_SECONDS = 600.0
+OVERLAP_SECONDS = 30.0
+# Minimum cosine similarity for a window's speaker to reuse an existing label.
+SPEAKER_MATCH_THRESHOLD = 0.5
+
+_pipeline = None
+_embedding = None
+_load_lock = threading.Lock()
+# pyannote pipelines keep per-call state, so calls are serialized.
+_run_lock = threading.Lock()
+
+
+def _auth_token() -> str:
+    # You must set PYANNOTE_AUTH_TOKEN in your environment for pretrained pipeline
+    token = os.environ.get("PYANNOTE_AUTH_TOKEN", None)
+    if not token:
+        raise RuntimeError(
+            "pyannote-audio token not set in environment variable PYANNOTE_AUTH_TOKEN"
+        )
+    return token
+
+
+def get_diarization_pipeline() -> Pipeline:
+    """Return the process-wide pyannote pipeline, loading it on first use."""
+    global _pipeline
+    with _load_lock:
+        if _pipeline is None:
+            _pipeline = Pipeline.from_pretrained(
+                DIARIZATION_MODEL, use_auth_token=_auth_token()
+            )
+        return _pipeline
+
+
+def get_embedding_inference() -> Inference:
+    """Return the process-wide speaker embedding model used for stitching."""
+    global _embedding
+    with _load_lock:
+        if _embedding is None:
+            model = Model.from_pretrained(EMBEDDING_MODEL, use_auth_token=_auth_token())
+            _embedding = Inference(model, window="whole")
+        return _embedding
+
+
+def diarize_speakers(
+    audio: Union[str, np.ndarray],
+    sample_rate: Optional[int] = None,
+    chunk_seconds: Optional[float] = None,
+    overlap_seconds: float = OVERLAP_SECONDS,
+    progress: Optional[Callable[[float], None]] = None,
+) -> List[Dict]:
     """
     Return speaker segments with timestamps using pyannote-audio.
     Each segment: {'start': float, 'end': float, 'speaker': str}
+    audio is a wav path or float32 samples shaped (time,) or (time, channels)
+    at sample_rate. Recordings longer than chunk_seconds (default
+    CHUNK_SECONDS) are processed in overlapping windows with bounded memory;
+    progress receives the fraction of windows done.
     """
     try:
-        # You must set PYANNOTE_AUTH_TOKEN in your environment for pretrained pipeline
-        token = os.environ.get("PYANNOTE_AUTH_TOKEN", None)
-        if not token:
-            raise RuntimeError(
-                "pyannote-audio token not set in environment variable PYANNOTE_AUTH_TOKEN"
-            )
-        pipeline = Pipeline.from_pretrained(
-            "pyannote/speaker-diarization@2.1", use_auth_token=token
+        if isinstance(audio, str):
+            sample_rate, samples = wavfile.read(audio, mmap=True)
+        else:
+            samples = audio
+        duration = len(samples) / sample_rate
+        chunk_seconds = chunk_seconds or CHUNK_SECONDS
+        if duration <= chunk_seconds + overlap_seconds:
+            pipeline = get_diarization_pipeline()
+            with _run_lock:
+                diarization = pipeline(
+                    {"waveform": _to_waveform(samples), "sample_rate": sample_rate}
+                )
+            segments = []
+            for turn, _, speaker in diarization.itertracks(yield_label=True):
+                segments.append(
+                    {"start": turn.start, "end": turn.end, "speaker": speaker}
+                )
+            if progress:
+                progress(1.0)
+            return segments
+        return diarize_windowed(
+            samples, sample_rate, chunk_seconds, overlap_seconds, progress
         )
-        diarization = pipeline(audio_path)
-        segments = []
-        for turn, _, speaker in diarization.itertracks(yield_label=True):
-            segments.append({"start": turn.start, "end": turn.end, "speaker": speaker})
-        return segments
     except Exception as e:
         print(f"Diarization error: {e}")
         return []
+
+
+def _window_bounds(
+    duration: float, chunk_seconds: float, overlap_seconds: float
+) -> List[Tuple[float, float]]:
+    step = chunk_seconds - overlap_seconds
+    bounds = []
+    start = 0.0
+    while True:
+        end = min(start + chunk_seconds, duration)
+        bounds.append((start, end))
+        if end >= duration:
+            return bounds
+        start += step
+
+
+def _to_waveform(samples: np.ndarray) -> torch.Tensor:
+    """int16/float (time, channels) samples → float32 (channels, time) tensor."""
+    data = np.asarray(samples)
+    if data.dtype == np.int16:
+        data = data.astype(np.float32) / 32768.0
+    else:
+        data = data.astype(np.float32, copy=False)
+    if data.ndim == 1:
+        data = data[:, None]
+    return torch.from_numpy(np.ascontiguousarray(data.T))
+
+
+def _speaker_embedding(audio: Dict, turns: List[Segment]) -> np.ndarray:
+    """Mean embedding over a speaker's longest turns in one window."""
+    inference = get_embedding_inference()
+    longest = sorted(turns, key=lambda t: t.duration, reverse=True)[:3]
+    vectors = [np.asarray(inference.crop(audio, turn)).ravel() for turn in longest]
+    vector = np.mean(vectors, axis=0)
+    return vector / (np.linalg.norm(vector) + 1e-9)
+
+
+def diarize_windowed(
+    samples: np.ndarray,
+    sample_rate: int,
+    chunk_seconds: float = CHUNK_SECONDS,
+    overlap_seconds: float = OVERLAP_SECONDS,
+    progress: Optional[Callable[[float], None]] = None,
+) -> List[Dict]:
+    """
+    Diarize overlapping windows of (time, channels) samples one at a time and
+    stitch window-local speaker labels into global ones by matching speaker
+    embeddings. Each window keeps only the turns in its half of the overlap.
+    """
+    pipeline = get_diarization_pipeline()
+    duration = len(samples) / sample_rate
+    bounds = _window_bounds(duration, chunk_seconds, overlap_seconds)
+    centroids: List[np.ndarray] = []
+    counts: List[int] = []
+    segments: List[Dict] = []
+    for index, (start, end) in enumerate(bounds):
+        waveform = _to_waveform(
+            samples[int(start * sample_rate) : int(end * sample_rate)]
+        )
+        audio = {"waveform": waveform, "sample_rate": sample_rate}
+        with _run_lock:
+            diarization = pipeline(audio)
+            local_turns: Dict[str, List[Segment]] = {}
+            for turn, _, speaker in diarization.itertracks(yield_label=True):
+                local_turns.setdefault(speaker, []).append(turn)
+            embeddings = {
+                speaker: _speaker_embedding(audio, turns)
+                for speaker, turns in local_turns.items()
+            }
+        mapping = _match_speakers(embeddings, centroids, counts)
+        # Each window owns the region up to the middle of its overlaps.
+        keep_from = start + overlap_seconds / 2 if index > 0 else 0.0
+        keep_to = end - overlap_seconds / 2 if index < len(bounds) - 1 else end
+        for speaker, turns in local_turns.items():
+            for turn in turns:
+                turn_start = max(start + turn.start, keep_from)
+                turn_end = min(start + turn.end, keep_to)
+                if turn_end > turn_start:
+                    segments.append(
+                        {
+                            "start": turn_start,
+                            "end": turn_end,
+                            "speaker": mapping[speaker],
+                        }
+                    )
+        del waveform, audio, diarization
+        if progress:
+            progress((index + 1) / len(bounds))
+    return _merge_adjacent(sorted(segments, key=lambda s: s["start"]))
+
+
+def _match_speakers(
+    embeddings: Dict[str, np.ndarray],
+    centroids: List[np.ndarray],
+    counts: List[int],
+) -> Dict[str, str]:
+    """
+    Greedily pair window speakers with global speakers by cosine similarity.
+    Unmatched speakers become new global speakers. Updates centroids in place.
+    """
+    pairs = []
+    for speaker, vector in embeddings.items():
+        for g, centroid in enumerate(centroids):
+            pairs.append((float(vector @ centroid), speaker, g))
+    mapping = {}
+    used = set()
+    for score, speaker, g in sorted(pairs, reverse=True):
+        if score < SPEAKER_MATCH_THRESHOLD:
+            break
+        if speaker in mapping or g in used:
+            continue
+        mapping[speaker] = g
+        used.add(g)
+    for speaker, vector in embeddings.items():
+        if speaker not in mapping:
+            centroids.append(vector)
+            counts.append(0)
+            mapping[speaker] = len(centroids) - 1
+        g = mapping[speaker]
+        counts[g] += 1
+        centroid = centroids[g] + (vector - centroids[g]) / counts[g]
+        centroids[g] = centroid / (np.linalg.norm(centroid) + 1e-9)
+    return {speaker: f"SPEAKER_{g:02d}" for speaker, g in mapping.items()}
+
+
+def _merge_adjacent(segments: List[Dict], gap: float = 0.05) -> List[Dict]:
+    """Join same-speaker turns split at window seams."""
+    merged: List[Dict] = []
+    for seg in segments:
+        prev = merged[-1] if merged else None
+        if (
+            prev
+            and prev["speaker"] == seg["speaker"]
+            and seg["start"] - prev["end"] <= gap
+        ):
+            prev["end"] = max(prev["end"], seg["end"])
+        else:
+            merged.append(dict(seg))
+    return merged
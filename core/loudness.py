@@ -0,0 +1,304 @@
+"""EBU R128 / ITU-R BS.1770 loudness measurement and normalization."""
+
+from typing import Iterator, Optional, Tuple, Union
+from scipy.signal import firwin, sosfilt, upfirdn
+from core.audio import open_decoder
+from core.media_info import probe_video
+import math
+import numpy as np
+import wave
+
+# EBU R128 programme loudness target and maximum true peak.
+TARGET_LUFS = -23.0
+TRUE_PEAK_CEILING = -1.0
+
+# Frames per chunk for streaming passes (about 1.4 s at 48 kHz).
+CHUNK_FRAMES = 1 << 16
+
+# Gating blocks are 400 ms long and start every 100 ms.
+_SUB_BLOCK_SECONDS = 0.1
+_SUB_BLOCKS_PER_BLOCK = 4
+_ABSOLUTE_GATE = -70.0
+_RELATIVE_GATE = -10.0
+
+# True peak: 4x oversampling through a 48-tap low-pass interpolator.
+_OVERSAMPLE = 4
+_INTERPOLATOR = (firwin(48, 1.0 / _OVERSAMPLE) * _OVERSAMPLE).astype(np.float32)
+# Inter-sample peaks of real audio stay well within 6 dB of sample peaks.
+_MAX_OVERSHOOT = 2.0
+
+AudioSource = Union[str, np.ndarray]
+
+
+def k_weighting(sample_rate: int) -> np.ndarray:
+    """BS.1770 K-weighting (high shelf + high pass) as second-order sections."""
+    # Shelf and high-pass parameters from libebur128, valid at any rate.
+    k = math.tan(math.pi * 1681.974450955533 / sample_rate)
+    q = 0.7071752369554196
+    vh = 10 ** (3.999843853973347 / 20)
+    vb = vh**0.4996667741545416
+    a0 = 1 + k / q + k * k
+    shelf = [
+        (vh + vb * k / q + k * k) / a0,
+        2 * (k * k - vh) / a0,
+        (vh - vb * k / q + k * k) / a0,
+        1.0,
+        2 * (k * k - 1) / a0,
+        (1 - k / q + k * k) / a0,
+    ]
+    k = math.tan(math.pi * 38.13547087602444 / sample_rate)
+    q = 0.5003270373238773
+    a0 = 1 + k / q + k * k
+    highpass = [1.0, -2.0, 1.0, 1.0, 2 * (k * k - 1) / a0, (1 - k / q + k * k) / a0]
+    return np.array([shelf, highpass])
+
+
+def channel_weights(channels: int) -> np.ndarray:
+    """BS.1770 channel gains; 5.1 (L R C LFE Ls Rs) drops LFE, boosts surrounds."""
+    if channels == 6:
+        return np.array([1.0, 1.0, 1.0, 0.0, 1.41, 1.41])
+    return np.ones(channels)
+
+
+def _lufs(power: float) -> float:
+    return -0.691 + 10 * math.log10(power) if power > 0 else -math.inf
+
+
+def _as_frames(chunk: np.ndarray) -> np.ndarray:
+    chunk = np.asarray(chunk, dtype=np.float32)
+    return chunk[:, None] if chunk.ndim == 1 else chunk
+
+
+class LoudnessMeter:
+    """
+    Streaming integrated loudness and true peak. Feed consecutive chunks of
+    (frames,) or (frames, channels) float32 samples to add(); filter state
+    and partial gating blocks carry over between chunks, so the result does
+    not depend on chunk size. Memory grows by one float per 100 ms.
+    """
+
+    def __init__(self, sample_rate: int, channels: int = 1):
+        self.sample_rate = sample_rate
+        self.channels = channels
+        self._sos = k_weighting(sample_rate)
+        self._zi = np.zeros((len(self._sos), 2, channels))
+        self._weights = channel_weights(channels)
+        self._step = max(1, int(round(_SUB_BLOCK_SECONDS * sample_rate)))
+        self._partial = 0.0
+        self._partial_frames = 0
+        self._sub_blocks = []
+        # Interpolator history: the last input frames of the previous chunk.
+        self._history = np.zeros(
+            (len(_INTERPOLATOR) // _OVERSAMPLE + 1, channels), dtype=np.float32
+        )
+        self._peak = 0.0
+        self._sample_peak = 0.0
+
+    def add(self, chunk: np.ndarray) -> None:
+        chunk = _as_frames(chunk)
+        if not len(chunk):
+            return
+        filtered, self._zi = sosfilt(self._sos, chunk, axis=0, zi=self._zi)
+        energy = (filtered * filtered) @ self._weights
+        # Complete the sub-block left over from the previous chunk.
+        need = self._step - self._partial_frames
+        self._partial += float(energy[:need].sum())
+        self._partial_frames += min(need, len(energy))
+        if self._partial_frames < self._step:
+            self._update_peak(chunk)
+            return
+        self._sub_blocks.append(self._partial / self._step)
+        rest = energy[need:]
+        whole = len(rest) // self._step * self._step
+        self._sub_blocks.extend(
+            rest[:whole].reshape(-1, self._step).mean(axis=1).tolist()
+        )
+        self._partial = float(rest[whole:].sum())
+        self._partial_frames = len(rest) - whole
+        self._update_peak(chunk)
+
+    def _update_peak(self, chunk: np.ndarray) -> None:
+        history = len(self._history)
+        joined = np.concatenate([self._history, chunk])
+        sample_peak = float(np.abs(chunk).max())
+        self._sample_peak = max(self._sample_peak, sample_peak)
+        # Oversampling dominates the cost; skip chunks that cannot raise the
+        # true peak even with the largest plausible inter-sample overshoot.
+        if sample_peak * _MAX_OVERSHOOT > self._peak:
+            upsampled = upfirdn(_INTERPOLATOR, joined, up=_OVERSAMPLE, axis=0)
+            start = history * _OVERSAMPLE
+            current = upsampled[start : start + len(chunk) * _OVERSAMPLE]
+            self._peak = max(self._peak, float(np.abs(current).max()))
+        self._history = joined[-history:]
+
+    def block_powers(self) -> np.ndarray:
+        """Mean weighted power of every 400 ms gating block."""
+        subs = np.asarray(self._sub_blocks)
+        if len(subs) < _SUB_BLOCKS_PER_BLOCK:
+            return np.zeros(0)
+        window = np.ones(_SUB_BLOCKS_PER_BLOCK) / _SUB_BLOCKS_PER_BLOCK
+        return np.convolve(subs, window, mode="valid")
+
+    def integrated(self) -> float:
+        """Gated integrated loudness in LUFS (-inf for silence or < 400 ms)."""
+        powers = self.block_powers()
+        threshold = 10 ** ((_ABSOLUTE_GATE + 0.691) / 10)
+        powers = powers[powers > threshold]
+        if not len(powers):
+            return -math.inf
+        relative = _lufs(float(powers.mean())) + _RELATIVE_GATE
+        gated = powers[powers > 10 ** ((relative + 0.691) / 10)]
+        return _lufs(float(gated.mean())) if len(gated) else -math.inf
+
+    def true_peak(self) -> float:
+        """Maximum true peak in dBTP."""
+        return 20 * math.log10(self._peak) if self._peak > 0 else -math.inf
+
+    def sample_peak(self) -> float:
+        """Maximum sample peak in dBFS."""
+        if self._sample_peak <= 0:
+            return -math.inf
+        return 20 * math.log10(self._sample_peak)
+
+
+def _source_format(source: AudioSource, sample_rate: Optional[int]) -> Tuple[int, int]:
+    if isinstance(source, np.ndarray):
+        if not sample_rate:
+            raise ValueError("sample_rate is required for sample buffers")
+        return sample_rate, 1 if source.ndim == 1 else source.shape[1]
+    info = probe_video(source)
+    if info is None or not info.audio_tracks:
+        raise RuntimeError(f"No audio stream in {source}")
+    track = info.audio_tracks[0]
+    return sample_rate or track.sample_rate or 48000, track.channels or 1
+
+
+def _iter_chunks(
+    source: AudioSource, sample_rate: int, channels: int
+) -> Iterator[np.ndarray]:
+    """Yield (frames, channels) float32 chunks of a buffer or a decoded file."""
+    if isinstance(source, np.ndarray):
+        for start in range(0, len(source), CHUNK_FRAMES):
+            yield _as_frames(source[start : start + CHUNK_FRAMES])
+        return
+    proc = open_decoder(source, sample_rate, channels)
+    frame_bytes = 4 * channels
+    try:
+        while True:
+            data = proc.stdout.read(CHUNK_FRAMES * frame_bytes)
+            if not data:
+                break
+            data = data[: len(data) - len(data) % frame_bytes]
+            yield np.frombuffer(data, dtype="<f4").reshape(-1, channels)
+    finally:
+        proc.stdout.close()
+        stderr = proc.stderr.read()
+        if proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg failed: {stderr.decode(errors='replace')}")
+
+
+def _measure(source: AudioSource, sample_rate: Optional[int]) -> LoudnessMeter:
+    rate, channels = _source_format(source, sample_rate)
+    meter = LoudnessMeter(rate, channels)
+    for chunk in _iter_chunks(source, rate, channels):
+        meter.add(chunk)
+    return meter
+
+
+def measure_loudness(
+    source: AudioSource, sample_rate: Optional[int] = None
+) -> Tuple[float, float]:
+    """
+    Integrated loudness (LUFS) and true peak (dBTP) of a media file or a
+    float32 buffer (sample_rate required), in one streaming pass.
+    """
+    meter = _measure(source, sample_rate)
+    return meter.integrated(), meter.true_peak()
+
+
+def gain_plan(
+    meter: LoudnessMeter,
+    target: float = TARGET_LUFS,
+    ceiling: float = TRUE_PEAK_CEILING,
+) -> Tuple[float, Optional[float]]:
+    """
+    Linear gain that brings the measured audio to target LUFS, and the
+    linear sample level to limit at, lowered by the measured inter-sample
+    overshoot so true peaks land at about ceiling dBTP (None if the gained
+    audio stays under the ceiling anyway).
+    """
+    loudness = meter.integrated()
+    if not math.isfinite(loudness):
+        return 1.0, None
+    gain_db = target - loudness
+    if meter.true_peak() + gain_db <= ceiling:
+        return 10 ** (gain_db / 20), None
+    # Limit samples lower by the measured inter-sample overshoot.
+    overshoot = max(0.0, meter.true_peak() - meter.sample_peak())
+    return 10 ** (gain_db / 20), 10 ** ((ceiling - overshoot) / 20)
+
+
+def apply_gain(
+    chunk: np.ndarray, gain: float, limit: Optional[float] = None
+) -> np.ndarray:
+    """
+    Scale a chunk and, with a limit, soft-limit samples below it with a
+    tanh knee over the top 3 dB. The limiter is sample-wise, so it streams
+    without state.
+    """
+    out = np.asarray(chunk, dtype=np.float32) * np.float32(gain)
+    if limit is None:
+        return out
+    knee = limit * 10 ** (-3 / 20)
+    hot = np.abs(out) > knee
+    if hot.any():
+        x = out[hot]
+        room = limit - knee
+        out[hot] = np.sign(x) * (knee + room * np.tanh((np.abs(x) - knee) / room))
+    return out
+
+
+def normalize_samples(
+    samples: np.ndarray,
+    sample_rate: int,
+    target: float = TARGET_LUFS,
+    ceiling: float = TRUE_PEAK_CEILING,
+) -> np.ndarray:
+    """
+    Return a float32 buffer normalized to target LUFS with peaks limited
+    towards ceiling dBTP. Audio too short or quiet to measure is returned
+    as is.
+    """
+    gain, limit = gain_plan(_measure(samples, sample_rate), target, ceiling)
+    if gain == 1.0 and limit is None:
+        return samples
+    out = np.empty(samples.shape, dtype=np.float32)
+    for start in range(0, len(samples), CHUNK_FRAMES):
+        chunk = samples[start : start + CHUNK_FRAMES]
+        out[start : start + len(chunk)] = apply_gain(chunk, gain, limit)
+    return out
+
+
+def normalize_to_file(
+    source: AudioSource,
+    output_path: str,
+    sample_rate: Optional[int] = None,
+    target: float = TARGET_LUFS,
+    ceiling: float = TRUE_PEAK_CEILING,
+) -> Tuple[float, float]:
+    """
+    Measure source in one streaming pass, then stream it again through gain
+    and limiter into a 16-bit wav at output_path. Memory stays bounded by
+    the chunk size for files of any length. Returns the measured (LUFS,
+    dBTP) before normalization. Raises on decode or write errors.
+    """
+    meter = _measure(source, sample_rate)
+    gain, limit = gain_plan(meter, target, ceiling)
+    with wave.open(output_path, "wb") as f:
+        f.setnchannels(meter.channels)
+        f.setsampwidth(2)
+        f.setframerate(meter.sample_rate)
+        for chunk in _iter_chunks(source, meter.sample_rate, meter.channels):
+            chunk = np.clip(apply_gain(chunk, gain, limit), -1.0, 1.0)
+            f.writeframes((chunk * 32767.0).astype("<i2").tobytes())
+    return meter.integrated(), meter.true_peak()
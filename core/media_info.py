@@ -0,0 +1,287 @@
+"""Media probing with ffprobe and a persistent metadata cache."""
+
+from typing import Dict, Iterable, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from core.constants import DEFAULT_CACHE_PATH
+import json
+import os
+import sqlite3
+import statistics
+import subprocess
+import threading
+import time
+
+MEDIA_INFO_PATH = os.path.join(DEFAULT_CACHE_PATH, "media_info.sqlite")
+
+# Bump when VideoInfo changes shape so stale cache rows are re-probed.
+PROBE_VERSION = 1
+
+# Keyframe spacing is measured over this many seconds of packets.
+KEYFRAME_SCAN_SECONDS = 30
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS probes (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    version INTEGER NOT NULL,
+    info TEXT NOT NULL,
+    probed_at REAL NOT NULL
+);
+"""
+
+
+@dataclass
+class AudioTrack:
+    """One audio stream of a media file."""
+
+    index: int
+    codec: Optional[str] = None
+    sample_rate: Optional[int] = None
+    channels: Optional[int] = None
+    channel_layout: Optional[str] = None
+    bit_rate: Optional[int] = None
+    language: Optional[str] = None
+
+
+@dataclass
+class VideoInfo:
+    """Container, first video stream and all audio streams of a media file."""
+
+    path: str
+    duration: Optional[float] = None
+    format_name: Optional[str] = None
+    bit_rate: Optional[int] = None
+    size_bytes: int = 0
+    video_codec: Optional[str] = None
+    width: Optional[int] = None
+    height: Optional[int] = None
+    fps: Optional[float] = None
+    video_bit_rate: Optional[int] = None
+    # Median seconds between keyframes near the start (None if unknown)
+    keyframe_interval: Optional[float] = None
+    audio_tracks: List[AudioTrack] = field(default_factory=list)
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "VideoInfo":
+        data = dict(data)
+        data["audio_tracks"] = [AudioTrack(**t) for t in data.get("audio_tracks", [])]
+        return cls(**data)
+
+
+def _int(value) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _float(value) -> Optional[float]:
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _rate(value: Optional[str]) -> Optional[float]:
+    """Parse an ffprobe frame rate such as '30000/1001'."""
+    if not value:
+        return None
+    num, _, den = value.partition("/")
+    try:
+        rate = float(num) / float(den or 1)
+    except (ValueError, ZeroDivisionError):
+        return None
+    return rate or None
+
+
+def _keyframe_interval(packets: List[Dict], stream_index: int) -> Optional[float]:
+    times = [
+        _float(p.get("pts_time"))
+        for p in packets
+        if p.get("stream_index") == stream_index and "K" in p.get("flags", "")
+    ]
+    times = sorted(t for t in times if t is not None)
+    gaps = [b - a for a, b in zip(times, times[1:]) if b > a]
+    return round(statistics.median(gaps), 3) if gaps else None
+
+
+def parse_probe(path: str, probe: Dict) -> VideoInfo:
+    """Build a VideoInfo from ffprobe JSON (streams, format, packets)."""
+    fmt = probe.get("format", {})
+    info = VideoInfo(
+        path=path,
+        duration=_float(fmt.get("duration")),
+        format_name=fmt.get("format_name"),
+        bit_rate=_int(fmt.get("bit_rate")),
+        size_bytes=_int(fmt.get("size")) or 0,
+    )
+    for stream in probe.get("streams", []):
+        kind = stream.get("codec_type")
+        disposition = stream.get("disposition", {})
+        if kind == "video" and info.video_codec is None:
+            # Cover art is exposed as a one-frame video stream.
+            if disposition.get("attached_pic"):
+                continue
+            info.video_codec = stream.get("codec_name")
+            info.width = _int(stream.get("width"))
+            info.height = _int(stream.get("height"))
+            info.fps = _rate(stream.get("avg_frame_rate")) or _rate(
+                stream.get("r_frame_rate")
+            )
+            info.video_bit_rate = _int(stream.get("bit_rate"))
+            info.keyframe_interval = _keyframe_interval(
+                probe.get("packets", []), stream.get("index")
+            )
+            if info.duration is None:
+                info.duration = _float(stream.get("duration"))
+        elif kind == "audio":
+            info.audio_tracks.append(
+                AudioTrack(
+                    index=stream.get("index", len(info.audio_tracks)),
+                    codec=stream.get("codec_name"),
+                    sample_rate=_int(stream.get("sample_rate")),
+                    channels=_int(stream.get("channels")),
+                    channel_layout=stream.get("channel_layout"),
+                    bit_rate=_int(stream.get("bit_rate")),
+                    language=stream.get("tags", {}).get("language"),
+                )
+            )
+    return info
+
+
+def run_ffprobe(path: str) -> VideoInfo:
+    """
+    Probe a file with a single ffprobe call: container and stream headers
+    plus the packet flags of the first KEYFRAME_SCAN_SECONDS for the
+    keyframe interval. Nothing is decoded. Raises on ffprobe failure.
+    """
+    cmd = ["ffprobe", "-v", "error", "-print_format", "json"]
+    cmd += ["-show_format", "-show_streams"]
+    cmd += ["-show_entries", "packet=stream_index,pts_time,flags"]
+    cmd += ["-read_intervals", f"%+{KEYFRAME_SCAN_SECONDS}", path]
+    result = subprocess.run(
+        cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE
+    )
+    return parse_probe(path, json.loads(result.stdout or b"{}"))
+
+
+class MediaInfoCache:
+    """
+    Probe results stored in SQLite, keyed by absolute path and valid while
+    the file's size and mtime are unchanged. Safe to share between threads.
+    """
+
+    def __init__(self, path: str = MEDIA_INFO_PATH):
+        self.path = path
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def get_many(self, stats: Dict[str, os.stat_result]) -> Dict[str, VideoInfo]:
+        """Return cached infos for the {absolute path: stat} entries still fresh."""
+        keys = list(stats)
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self._conn.execute(
+                    "SELECT path, size, mtime_ns, version, info FROM probes "
+                    f"WHERE path IN ({','.join('?' * len(chunk))})",
+                    chunk,
+                )
+                for path, size, mtime_ns, version, info in rows:
+                    stat = stats[path]
+                    if (
+                        version == PROBE_VERSION
+                        and size == stat.st_size
+                        and mtime_ns == stat.st_mtime_ns
+                    ):
+                        found[path] = VideoInfo.from_dict(json.loads(info))
+        return found
+
+    def put_many(self, entries: Iterable[tuple]) -> None:
+        """Store (absolute path, stat, VideoInfo) entries."""
+        now = time.time()
+        rows = [
+            (
+                path,
+                stat.st_size,
+                stat.st_mtime_ns,
+                PROBE_VERSION,
+                json.dumps(asdict(info)),
+                now,
+            )
+            for path, stat, info in entries
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_cache: Optional[MediaInfoCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_media_info_cache() -> MediaInfoCache:
+    """Return the process-wide metadata cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = MediaInfoCache()
+        return _cache
+
+
+def probe_videos(
+    paths: List[str],
+    cache: Optional[MediaInfoCache] = None,
+    max_workers: int = 8,
+) -> Dict[str, Optional[VideoInfo]]:
+    """
+    Probe many files, answering from the cache where possible and running
+    ffprobe concurrently for the rest. Returns {path: VideoInfo}, with None
+    for files that are missing or could not be probed.
+    """
+    cache = cache or get_media_info_cache()
+    stats = {}
+    results: Dict[str, Optional[VideoInfo]] = {}
+    for path in paths:
+        try:
+            stats[os.path.abspath(path)] = os.stat(path)
+        except OSError as e:
+            print(f"probe_videos error: {e}")
+            results[path] = None
+    cached = cache.get_many(stats)
+    misses = [p for p in stats if p not in cached]
+
+    def probe(path: str) -> Optional[VideoInfo]:
+        try:
+            return run_ffprobe(path)
+        except Exception as e:
+            print(f"ffprobe error ({path}): {e}")
+            return None
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        probed = dict(zip(misses, pool.map(probe, misses)))
+    cache.put_many((path, stats[path], info) for path, info in probed.items() if info)
+    for path in paths:
+        if path not in results:
+            key = os.path.abspath(path)
+            results[path] = cached.get(key) or probed.get(key)
+    return results
+
+
+def probe_video(
+    path: str, cache: Optional[MediaInfoCache] = None
+) -> Optional[VideoInfo]:
+    """Probe a single file through the metadata cache."""
+    return probe_videos([path], cache, max_workers=1)[path]
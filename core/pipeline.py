@@ -0,0 +1,624 @@
+"""Headless dubbing pipeline shared by the GUI and the ``dubcraft`` CLI."""
+
+from typing import Callable, Dict, List, Optional, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+import argparse
+import asyncio
+import contextlib
+import numpy as np
+import os
+import shutil
+import tempfile
+import time
+import uuid
+
+from core.alignment import align_transcript
+from core.assembly import assemble_timeline
+from core.audio import ASR_FORMAT, MIX_FORMAT, STRETCH_LIMITS
+from core.audio_store import AudioStore, open_audio
+from core.constants import LANGUAGE_CODES, VIDEO_EXTENSIONS
+from core.diarization import diarize_speakers
+from core.loudness import TARGET_LUFS
+from core.scheduler import Stage, StageCancelled, StageScheduler
+from core.segments import SegmentTable, WordTable
+from core.subtitles import generate_srt
+from core.transcription import MODEL_CACHE, iter_transcribe, transcribe_parallel
+from core.translation import get_translation_scheduler, translate_texts
+from core.tts import list_voices, synthesize_parallel
+from core.video import merge_audio_with_video
+from modules.logging import log_error, log_info
+
+STAGES = ["extract", "transcribe", "translate", "diarize", "align", "tts", "merge"]
+
+# Stages each stage needs finished first. Diarization only needs the audio,
+# so it runs alongside transcription and translation; alignment attaches
+# the diarized speakers to the translated segments.
+STAGE_REQUIRES = {
+    "extract": (),
+    "transcribe": ("extract",),
+    "translate": ("transcribe",),
+    "diarize": ("extract",),
+    "align": ("translate", "diarize"),
+    "tts": ("align",),
+    "merge": ("tts",),
+}
+
+# Share of the overall progress bar (in percent) covered by each stage.
+STAGE_PROGRESS = {
+    "extract": (0, 10),
+    "transcribe": (10, 50),
+    "translate": (50, 60),
+    "diarize": (60, 68),
+    "align": (68, 70),
+    "tts": (70, 90),
+    "merge": (90, 100),
+}
+
+STAGE_MESSAGES = {
+    "extract": "Extracting audio...",
+    "transcribe": "Transcribing audio...",
+    "translate": "Translating transcript...",
+    "diarize": "Detecting speakers...",
+    "align": "Assigning speakers to segments...",
+    "tts": "Synthesizing voices...",
+    "merge": "Merging dubbed audio with video...",
+}
+
+# Seconds a partial translation batch may wait for more segments before it
+# is sent anyway, so translation overlaps transcription on short inputs.
+TRANSLATE_FLUSH_SECONDS = 10.0
+
+ProgressCallback = Callable[[int, str], None]
+StageCallback = Callable[[str, "DubbingJob"], None]
+
+
+@dataclass
+class PipelineConfig:
+    """Options for a dubbing run."""
+
+    target_language: str = "English"
+    output_dir: str = "export"
+    output_name: str = "{name}_dubbed.mp4"
+    # Also copy the dubbed wav to output_dir under this name (same {name}
+    # placeholder), so it outlives the work_dir.
+    audio_output_name: Optional[str] = None
+    model_size: str = "medium"
+    # >1 splits long audio at silences and transcribes chunks in processes
+    transcribe_processes: int = 1
+    # >1 synthesizes segments in worker processes with resident TTS models
+    tts_processes: int = 1
+    # CPU threads per transcription/TTS worker process (0: even share)
+    threads_per_process: int = 0
+    voices: Dict[str, str] = field(default_factory=dict)
+    emotions: Dict[str, str] = field(default_factory=dict)
+    keep_bgm: bool = True
+    export_subtitles: bool = False
+    # Keep the job's temporary work_dir (decoded audio, TTS clips, dubbed.wav)
+    keep_intermediates: bool = False
+    # Keep word timings (used to split segments at speaker changes); off
+    # skips faster-whisper's word alignment and saves decode time.
+    word_timestamps: bool = True
+    # Rates within which TTS clips are time-stretched to their segment's
+    # duration; (1.0, 1.0) keeps clips as synthesized.
+    stretch_limits: Tuple[float, float] = STRETCH_LIMITS
+    # EBU R128 level (LUFS) every TTS clip is normalized to before mixing,
+    # so all voices sit at the same loudness; None keeps TTS levels.
+    clip_loudness: Optional[float] = TARGET_LUFS
+    workers: int = 1
+
+
+@dataclass
+class DubbingJob:
+    """State and results of one video moving through the pipeline."""
+
+    video_path: str
+    work_dir: str = ""
+    # Short id tying together this job's log lines
+    job_id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+    # Source audio in ASR_FORMAT, memory-mapped from the job's AudioStore
+    audio: Optional[np.ndarray] = field(default=None, repr=False)
+    sample_rate: int = ASR_FORMAT[0]
+    # Store file of the source audio in MIX_FORMAT for the background track
+    mix_audio_path: Optional[str] = None
+    transcript: SegmentTable = field(default_factory=SegmentTable)
+    # Word timings of the transcript rows, if config.word_timestamps
+    words: Optional[WordTable] = None
+    diarization: List[Dict] = field(default_factory=list)
+    speakers: List[str] = field(default_factory=list)
+    # Indices of transcript segments the translator could not handle
+    untranslated: List[int] = field(default_factory=list)
+    dubbed_audio_path: Optional[str] = None
+    output_path: Optional[str] = None
+    # Copy of the dubbed wav in output_dir, if config.audio_output_name
+    audio_output_path: Optional[str] = None
+    error: Optional[str] = None
+    cancelled: bool = False
+    # Per-stage seconds; stages overlap, so wall_seconds is the real total
+    timings: Dict[str, float] = field(default_factory=dict)
+    wall_seconds: float = 0.0
+
+    @property
+    def success(self) -> bool:
+        return self.error is None and self.output_path is not None
+
+    def cleanup(self) -> None:
+        """Drop the decoded audio and remove intermediate files."""
+        self.audio = None
+        if self.work_dir and os.path.isdir(self.work_dir):
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+        self.dubbed_audio_path = None
+
+
+class DubbingPipeline:
+    """
+    Run extract → transcribe → translate → diarize → align → TTS → merge,
+    starting each stage as soon as the stages in STAGE_REQUIRES are done.
+    progress is called with (percent, message); on_stage with (stage, job)
+    after each stage completes; on_segment with each transcript segment as
+    soon as it is decoded. All callbacks run on the thread that runs the
+    event loop (the Qt thread under qasync). Translation of early segments
+    starts while transcription is still running.
+    """
+
+    def __init__(
+        self,
+        config: Optional[PipelineConfig] = None,
+        progress: Optional[ProgressCallback] = None,
+        on_stage: Optional[StageCallback] = None,
+        on_segment: Optional[Callable[[Dict], None]] = None,
+    ):
+        self.config = config or PipelineConfig()
+        self.progress = progress
+        self.on_stage = on_stage
+        self.on_segment = on_segment
+        self._translator: Optional[ThreadPoolExecutor] = None
+        self._translations: List[Future] = []
+        self._scheduler: Optional[StageScheduler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._fractions: Dict[str, float] = {}
+
+    def run(self, video_path: str) -> DubbingJob:
+        """Dub a single video on a private event loop."""
+        return asyncio.run(self.run_async(video_path))
+
+    async def run_async(self, video_path: str) -> DubbingJob:
+        """Dub a single video. Errors are recorded on the returned job."""
+        job = DubbingJob(video_path, work_dir=tempfile.mkdtemp(prefix="dubcraft_"))
+        self._loop = asyncio.get_running_loop()
+        self._fractions = {stage: 0.0 for stage in STAGES}
+        self._scheduler = StageScheduler(
+            [
+                Stage(stage, partial(getattr(self, f"_run_{stage}"), job), requires)
+                for stage, requires in STAGE_REQUIRES.items()
+            ],
+            executor=ThreadPoolExecutor(max_workers=len(STAGES)),
+            on_start=lambda stage: self._report(stage, 0.0),
+            on_done=lambda stage: self._stage_done(stage, job),
+        )
+        started = time.perf_counter()
+        try:
+            await self._scheduler.run()
+        except StageCancelled:
+            job.cancelled = True
+            job.error = "Cancelled."
+            log_info("Job cancelled", job=job.job_id, video=video_path)
+        except Exception as e:
+            job.error = str(e)
+            log_error(f"Pipeline error: {e}", job=job.job_id, video=video_path)
+        finally:
+            job.timings = dict(self._scheduler.timings)
+            job.wall_seconds = time.perf_counter() - started
+            # Stages still running after a failure finish in the background.
+            self._scheduler.executor.shutdown(wait=False, cancel_futures=True)
+            if self._translator:
+                self._translator.shutdown(wait=False, cancel_futures=True)
+                self._translator = None
+        if job.error is None:
+            log_info(
+                "Job finished",
+                job=job.job_id,
+                video=video_path,
+                duration=job.wall_seconds,
+            )
+        if not self.config.keep_intermediates:
+            job.cleanup()
+        return job
+
+    def cancel(self) -> None:
+        """Cancel a running job from any thread."""
+        if self._scheduler and self._loop:
+            self._scheduler.cancel_threadsafe(self._loop)
+
+    def _emit(self, callback: Optional[Callable], *args) -> None:
+        """Invoke a callback on the event loop thread."""
+        if callback:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _stage_done(self, stage: str, job: DubbingJob) -> None:
+        log_info(
+            "Stage finished",
+            job=job.job_id,
+            stage=stage,
+            duration=self._scheduler.timings.get(stage),
+        )
+        self._report(stage, 1.0)
+        if self.on_stage:
+            self.on_stage(stage, job)
+
+    def _report(self, stage: str, fraction: float) -> None:
+        # Stages overlap, so the bar shows the weighted sum of all of them.
+        self._fractions[stage] = fraction
+        percent = sum(
+            (hi - lo) * self._fractions[name]
+            for name, (lo, hi) in STAGE_PROGRESS.items()
+        )
+        self._emit(self.progress, int(percent), STAGE_MESSAGES[stage])
+
+    def _run_extract(self, job: DubbingJob) -> None:
+        # Decoded once to disk, in every format the job needs from the same
+        # ffmpeg run; later stages and workers map the same files.
+        store = AudioStore(os.path.join(job.work_dir, "audio"))
+        formats = [ASR_FORMAT] + ([MIX_FORMAT] if self.config.keep_bgm else [])
+        paths = store.decode_formats(job.video_path, formats)
+        job.audio, job.sample_rate = open_audio(paths[0])
+        job.mix_audio_path = paths[1] if self.config.keep_bgm else None
+
+    def _run_transcribe(self, job: DubbingJob) -> None:
+        # A single background thread translates batches in arrival order.
+        self._translator = ThreadPoolExecutor(max_workers=1)
+        self._translations = []
+        # Segments are handed over once they fill a packed batch for every
+        # scheduler worker, so each call translates concurrently, or once
+        # the oldest has waited TRANSLATE_FLUSH_SECONDS.
+        translator = get_translation_scheduler()
+        batch, chars, batch_started = [], 0, 0.0
+
+        def report(fraction: float) -> None:
+            self._report("transcribe", fraction)
+
+        if self.config.transcribe_processes > 1:
+            segments = transcribe_parallel(
+                job.audio,
+                self.config.model_size,
+                processes=self.config.transcribe_processes,
+                threads_per_process=self.config.threads_per_process,
+                progress=report,
+                word_timestamps=self.config.word_timestamps,
+            )
+        else:
+            segments = iter_transcribe(
+                job.audio,
+                self.config.model_size,
+                progress=report,
+                word_timestamps=self.config.word_timestamps,
+            )
+        if self.config.word_timestamps:
+            job.words = WordTable()
+        for seg in segments:
+            row = job.transcript.append(seg["start"], seg["end"], seg["text"])
+            if job.words is not None:
+                job.words.add_segment(row, seg["text"], seg.get("words") or ())
+            self._scheduler.check_cancelled()
+            self._emit(self.on_segment, seg)
+            if not batch:
+                batch_started = time.perf_counter()
+            batch.append(row)
+            chars += len(seg["text"]) + 1
+            if (
+                translator.fills_workers(chars, len(batch))
+                or time.perf_counter() - batch_started >= TRANSLATE_FLUSH_SECONDS
+            ):
+                self._submit_translation(job, batch)
+                batch, chars = [], 0
+        if batch:
+            self._submit_translation(job, batch)
+        if not len(job.transcript):
+            raise RuntimeError("Transcription produced no segments.")
+
+    def _submit_translation(self, job: DubbingJob, rows: List[int]) -> None:
+        self._translations.append(
+            self._translator.submit(translate_rows, job.transcript, rows, self.config)
+        )
+
+    def _run_translate(self, job: DubbingJob) -> None:
+        failed = []
+        for i, future in enumerate(self._translations):
+            self._scheduler.check_cancelled()
+            failed.extend(future.result())
+            self._report("translate", (i + 1) / len(self._translations))
+        job.untranslated = sorted(failed)
+
+    def _run_diarize(self, job: DubbingJob) -> None:
+        job.diarization = diarize_speakers(
+            job.audio,
+            job.sample_rate,
+            progress=lambda fraction: self._report("diarize", fraction),
+        )
+        speakers = []
+        for turn in job.diarization:
+            if turn["speaker"] not in speakers:
+                speakers.append(turn["speaker"])
+        job.speakers = speakers or ["Speaker 1"]
+
+    def _run_align(self, job: DubbingJob) -> None:
+        # Failed rows hold their source text; clear it so a split retries them.
+        for row in job.untranslated:
+            job.transcript.translated[row] = None
+        transcript, words, speakers = align_transcript(
+            job.transcript, job.diarization, job.words
+        )
+        if transcript is not job.transcript:
+            # Segments split at speaker changes need their pieces translated.
+            rows = [i for i, t in enumerate(transcript.translated) if t is None]
+            self._report("align", 0.5)
+            failed = translate_rows(transcript, rows, self.config) if rows else []
+            job.transcript, job.words = transcript, words
+            job.untranslated = failed
+        job.speakers = speakers or job.speakers
+
+    def _run_tts(self, job: DubbingJob) -> None:
+        job.dubbed_audio_path = os.path.join(job.work_dir, "dubbed.wav")
+        synthesize_dub(
+            job.transcript,
+            job.speakers,
+            assign_voices(job.speakers, self.config.voices),
+            self.config.emotions,
+            job.dubbed_audio_path,
+            len(job.audio) / job.sample_rate,
+            progress=lambda fraction: self._report("tts", fraction),
+            processes=self.config.tts_processes,
+            threads_per_process=self.config.threads_per_process,
+            stretch_limits=self.config.stretch_limits,
+            clip_loudness=self.config.clip_loudness,
+            clip_dir=os.path.join(job.work_dir, "clips"),
+        )
+
+    def _run_merge(self, job: DubbingJob) -> None:
+        name = os.path.splitext(os.path.basename(job.video_path))[0]
+        os.makedirs(self.config.output_dir, exist_ok=True)
+        output_path = os.path.join(
+            self.config.output_dir, self.config.output_name.format(name=name)
+        )
+        if not merge_audio_with_video(
+            job.video_path,
+            job.dubbed_audio_path,
+            output_path,
+            keep_bgm=self.config.keep_bgm,
+            bgm_audio=job.mix_audio_path,
+        ):
+            raise RuntimeError("Audio/video merge failed.")
+        job.output_path = output_path
+        if self.config.audio_output_name:
+            job.audio_output_path = os.path.join(
+                self.config.output_dir, self.config.audio_output_name.format(name=name)
+            )
+            shutil.copyfile(job.dubbed_audio_path, job.audio_output_path)
+        if self.config.export_subtitles:
+            generate_srt(job.transcript, os.path.splitext(output_path)[0] + ".srt")
+
+
+def translate_rows(
+    transcript: SegmentTable, rows: List[int], config: PipelineConfig
+) -> List[int]:
+    """
+    Fill in the translated text of the given transcript rows.
+    Returns the rows that could not be translated (text kept as is).
+    """
+    report = translate_texts(
+        [transcript.text[row] for row in rows], config.target_language
+    )
+    for row, translated in zip(rows, report.translations):
+        transcript.translated[row] = translated
+    return [rows[i] for i in report.failed]
+
+
+def assign_voices(speakers: List[str], voices: Dict[str, str]) -> Dict[str, str]:
+    """
+    Map every speaker to a voice. Explicit assignments win; the rest are
+    spread round-robin over the installed TTS voices.
+    """
+    pool = list_voices()
+    assigned = {}
+    for i, speaker in enumerate(speakers):
+        if speaker in voices:
+            assigned[speaker] = voices[speaker]
+        elif pool:
+            assigned[speaker] = pool[i % len(pool)]
+    if not assigned:
+        raise RuntimeError("No TTS voices available. Check TORTOISE_VOICES_DIR.")
+    return assigned
+
+
+def synthesize_dub(
+    transcript: SegmentTable,
+    speakers: List[str],
+    voices: Dict[str, str],
+    emotions: Dict[str, str],
+    audio_out_path: str,
+    duration: float,
+    progress: Optional[Callable[[float], None]] = None,
+    processes: int = 1,
+    threads_per_process: int = 0,
+    stretch_limits: Tuple[float, float] = STRETCH_LIMITS,
+    clip_loudness: Optional[float] = TARGET_LUFS,
+    clip_dir: Optional[str] = None,
+) -> str:
+    """
+    Synthesize every segment (on `processes` worker processes), fit each
+    clip to its segment's duration within stretch_limits, normalize it to
+    clip_loudness LUFS (None: leave as is) and place it at the segment
+    start on a track of `duration` seconds. Clips are linked into clip_dir
+    (default: a temporary folder removed afterwards) so TTS cache eviction
+    by other jobs cannot delete them before they are read.
+    """
+    items = []
+    default_voice = next(iter(voices.values()))
+    default_speaker = speakers[0] if speakers else "Speaker 1"
+    for row in range(len(transcript)):
+        speaker = transcript.speaker(row) or default_speaker
+        voice = voices.get(speaker, default_voice)
+        items.append((transcript.translated_text(row), voice, emotions.get(speaker)))
+    with contextlib.ExitStack() as stack:
+        if clip_dir is None:
+            clip_dir = stack.enter_context(tempfile.TemporaryDirectory())
+        clip_paths = synthesize_parallel(
+            items, processes, threads_per_process, progress, out_dir=clip_dir
+        )
+        starts = transcript.start.tolist()
+        assemble_timeline(
+            list(zip(starts, clip_paths)),
+            duration,
+            audio_out_path,
+            slots=(transcript.end - transcript.start).tolist(),
+            limits=stretch_limits,
+            loudness=clip_loudness,
+        )
+    return audio_out_path
+
+
+def run_batch(
+    video_paths: List[str],
+    config: PipelineConfig,
+    progress: Optional[Callable[[str, int, str], None]] = None,
+) -> List[DubbingJob]:
+    """
+    Dub several videos concurrently on config.workers threads.
+    progress is called with (video_path, percent, message).
+    Returns the jobs in the order of video_paths.
+    """
+
+    def run_one(video_path: str) -> DubbingJob:
+        def report(percent: int, message: str) -> None:
+            progress(video_path, percent, message)
+
+        pipeline = DubbingPipeline(config, progress=report if progress else None)
+        return pipeline.run(video_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, config.workers)) as pool:
+        return list(pool.map(run_one, video_paths))
+
+
+def collect_videos(paths: List[str]) -> List[str]:
+    """Expand directories into the video files they contain."""
+    videos = []
+    for path in paths:
+        if os.path.isdir(path):
+            for name in sorted(os.listdir(path)):
+                if os.path.splitext(name)[1].lower() in VIDEO_EXTENSIONS:
+                    videos.append(os.path.join(path, name))
+        else:
+            videos.append(path)
+    return videos
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Entry point for the ``dubcraft`` command."""
+    parser = argparse.ArgumentParser(
+        prog="dubcraft", description="Dub one or more videos without the GUI."
+    )
+    parser.add_argument("inputs", nargs="+", help="Video files or folders of videos")
+    parser.add_argument(
+        "-l",
+        "--language",
+        default="English",
+        choices=sorted(LANGUAGE_CODES),
+        help="Target dubbing language",
+    )
+    parser.add_argument("-o", "--output-dir", default="export")
+    parser.add_argument(
+        "-j", "--workers", type=int, default=1, help="Videos processed concurrently"
+    )
+    parser.add_argument("--model-size", default="medium", help="faster-whisper model")
+    parser.add_argument(
+        "--transcribe-processes",
+        type=int,
+        default=1,
+        help="Transcribe each video in N worker processes (chunked at silences)",
+    )
+    parser.add_argument(
+        "--tts-processes",
+        type=int,
+        default=1,
+        help="Synthesize speech in N worker processes",
+    )
+    parser.add_argument(
+        "--threads-per-process",
+        type=int,
+        default=0,
+        help="CPU threads per worker process (default: even share)",
+    )
+    parser.add_argument(
+        "--voice",
+        action="append",
+        default=[],
+        metavar="SPEAKER=VOICE",
+        help="Assign a TTS voice to a diarized speaker (repeatable)",
+    )
+    parser.add_argument(
+        "--no-bgm", action="store_true", help="Replace the original audio entirely"
+    )
+    parser.add_argument("--subtitles", action="store_true", help="Also write .srt")
+    parser.add_argument(
+        "--keep-intermediates",
+        action="store_true",
+        help="Keep extracted and dubbed wav files",
+    )
+    parser.add_argument(
+        "--no-word-timestamps",
+        action="store_true",
+        help="Skip word timings (faster; no splitting at speaker changes)",
+    )
+    args = parser.parse_args(argv)
+
+    voices = {}
+    for item in args.voice:
+        speaker, sep, voice = item.partition("=")
+        if not sep:
+            parser.error(f"--voice expects SPEAKER=VOICE, got {item!r}")
+        voices[speaker] = voice
+
+    videos = collect_videos(args.inputs)
+    if not videos:
+        print("No input videos found.")
+        return 1
+    config = PipelineConfig(
+        target_language=args.language,
+        output_dir=args.output_dir,
+        model_size=args.model_size,
+        transcribe_processes=args.transcribe_processes,
+        tts_processes=args.tts_processes,
+        threads_per_process=args.threads_per_process,
+        voices=voices,
+        keep_bgm=not args.no_bgm,
+        export_subtitles=args.subtitles,
+        keep_intermediates=args.keep_intermediates,
+        word_timestamps=not args.no_word_timestamps,
+        workers=args.workers,
+    )
+
+    def report(video_path: str, percent: int, message: str) -> None:
+        print(f"[{percent:3d}%] {os.path.basename(video_path)}: {message}")
+
+    jobs = run_batch(videos, config, progress=report)
+    failed = 0
+    for job in jobs:
+        if job.success:
+            print(
+                f"OK   {job.video_path} -> {job.output_path} "
+                f"({job.wall_seconds:.1f}s; "
+                + ", ".join(f"{k} {v:.1f}s" for k, v in job.timings.items())
+                + ")"
+            )
+            if job.untranslated:
+                print(f"     {len(job.untranslated)} segment(s) left untranslated")
+        else:
+            failed += 1
+            print(f"FAIL {job.video_path}: {job.error}")
+    stats = MODEL_CACHE.stats()
+    print(
+        f"Whisper model cache: {stats['hits']} hits, {stats['misses']} loads "
+        f"({stats['load_seconds']:.1f}s)"
+    )
+    return 1 if failed else 0
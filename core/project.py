@@ -0,0 +1,324 @@
+"""
+Binary project format with columnar, memory-mapped segment storage.
+
+Layout (little-endian):
+
+    magic "DCPROJ01" | u32 version | u32 header length | JSON header
+    | sections, each aligned to 8 bytes
+
+The JSON header holds the segment count, speaker names, session metadata
+(language, voices, ...) and a table of sections {name: [dtype, offset,
+count]}. Segment sections:
+
+    start, end            float64[n]
+    speaker               int32[n]   index into speakers, -1 if unknown
+    text_offsets          uint64[n+1] into the UTF-8 blob text
+    translated_offsets    uint64[n+1] into the UTF-8 blob translated
+
+Word timings are an optional section group (see segments.WordTable):
+
+    word_row              int32[w]   owning segment, ascending
+    word_start, word_end  float32[w]
+    word_probability      float32[w]
+    word_char_start       uint32[w]  character offsets into the segment text
+    word_char_end         uint32[w]
+
+The GUI saves and opens projects from the project panel; convert an
+autosaved session with
+``python -m core.project convert export/dubcraft_autosave.json out.dcproj``.
+"""
+
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+import argparse
+import json
+import os
+import struct
+import numpy as np
+
+from core.segments import WordTable
+from modules.autosave import Autosaver
+
+PROJECT_MAGIC = b"DCPROJ01"
+PROJECT_VERSION = 1
+PROJECT_EXTENSION = ".dcproj"
+
+_PREFIX = struct.Struct("<8sII")
+_ALIGN = 8
+
+# Session keys that are stored as columns rather than metadata.
+SEGMENT_KEYS = ("transcript", "translated_transcript", "words")
+
+# WordTable column -> project section.
+WORD_SECTIONS = {
+    "row": "word_row",
+    "start": "word_start",
+    "end": "word_end",
+    "probability": "word_probability",
+    "char_start": "word_char_start",
+    "char_end": "word_char_end",
+}
+
+
+def _pack_texts(texts: Sequence[str]) -> Tuple[np.ndarray, bytes]:
+    encoded = [t.encode("utf-8") for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype="<u8")
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, b"".join(encoded)
+
+
+def write_project(
+    path: str,
+    segments: Sequence[Dict],
+    meta: Optional[Dict[str, Any]] = None,
+    words: Optional[WordTable] = None,
+) -> None:
+    """
+    Write segments ({'start', 'end', 'text', optional 'translated_text' and
+    'speaker'}, e.g. a SegmentTable), their word timings and JSON-compatible
+    session metadata to path, atomically. Without a word table, 'words'
+    lists on the segment dicts are used if present.
+    """
+    segments = list(segments)
+    if words is None and any(seg.get("words") for seg in segments):
+        words = WordTable.from_segments(segments)
+    speakers: List[str] = []
+    speaker_ids: Dict[str, int] = {}
+    ids = np.full(len(segments), -1, dtype="<i4")
+    for i, seg in enumerate(segments):
+        name = seg.get("speaker")
+        if name is not None:
+            if name not in speaker_ids:
+                speaker_ids[name] = len(speakers)
+                speakers.append(name)
+            ids[i] = speaker_ids[name]
+    text_offsets, text = _pack_texts([seg.get("text", "") for seg in segments])
+    translated_offsets, translated = _pack_texts(
+        [seg.get("translated_text", seg.get("text", "")) for seg in segments]
+    )
+    sections = {
+        "start": np.array([seg.get("start", 0.0) for seg in segments], dtype="<f8"),
+        "end": np.array([seg.get("end", 0.0) for seg in segments], dtype="<f8"),
+        "speaker": ids,
+        "text_offsets": text_offsets,
+        "text": np.frombuffer(text, dtype="u1"),
+        "translated_offsets": translated_offsets,
+        "translated": np.frombuffer(translated, dtype="u1"),
+    }
+    if words is not None and len(words):
+        for column, name in WORD_SECTIONS.items():
+            array = getattr(words, "rows" if column == "row" else column)
+            sections[name] = array.astype(array.dtype.newbyteorder("<"))
+
+    # Section offsets depend on the header length and vice versa; grow the
+    # header area until the JSON with absolute offsets fits in it.
+    relative = {}
+    position = 0
+    for name, array in sections.items():
+        relative[name] = (array.dtype.str, position, len(array))
+        position += -(-array.nbytes // _ALIGN) * _ALIGN
+    base = 0
+    while True:
+        header = {
+            "segments": len(segments),
+            "speakers": speakers,
+            "meta": meta or {},
+            "sections": {
+                name: [dtype, base + offset, count]
+                for name, (dtype, offset, count) in relative.items()
+            },
+        }
+        encoded = json.dumps(header, ensure_ascii=False).encode("utf-8")
+        needed = -(-(_PREFIX.size + len(encoded)) // _ALIGN) * _ALIGN
+        if needed <= base:
+            break
+        base = needed
+    encoded = encoded.ljust(base - _PREFIX.size, b" ")
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(_PREFIX.pack(PROJECT_MAGIC, PROJECT_VERSION, len(encoded)))
+        f.write(encoded)
+        for name, array in sections.items():
+            f.seek(header["sections"][name][1])
+            f.write(array.tobytes())
+        f.truncate(base + position)
+    os.replace(tmp_path, path)
+
+
+class Project:
+    """
+    Read-only view of a project file. Columns are memory-mapped, so opening
+    only parses the small JSON header; text is decoded per segment on access.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            magic, version, header_len = _PREFIX.unpack(f.read(_PREFIX.size))
+            if magic != PROJECT_MAGIC:
+                raise ValueError(f"Not a DubCraft project: {path}")
+            if version > PROJECT_VERSION:
+                raise ValueError(f"Unsupported project version {version}")
+            header = json.loads(f.read(header_len))
+        self.speakers: List[str] = header["speakers"]
+        self.meta: Dict[str, Any] = header["meta"]
+        self._count = header["segments"]
+        self._sections = header["sections"]
+        self._mmap = np.memmap(path, dtype="u1", mode="r")
+        self.start = self._column("start")
+        self.end = self._column("end")
+        self.speaker_ids = self._column("speaker")
+
+    def _column(self, name: str) -> np.ndarray:
+        dtype, offset, count = self._sections[name]
+        return np.frombuffer(self._mmap, dtype=dtype, count=count, offset=offset)
+
+    @property
+    def has_words(self) -> bool:
+        return "word_row" in self._sections
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _text(self, offsets: str, blob: str, i: int) -> str:
+        bounds = self._column(offsets)
+        data = self._column(blob)
+        return bytes(data[int(bounds[i]) : int(bounds[i + 1])]).decode("utf-8")
+
+    def text(self, i: int) -> str:
+        return self._text("text_offsets", "text", i)
+
+    def translated_text(self, i: int) -> str:
+        return self._text("translated_offsets", "translated", i)
+
+    def speaker(self, i: int) -> Optional[str]:
+        sid = int(self.speaker_ids[i])
+        return self.speakers[sid] if sid >= 0 else None
+
+    def word_table(self) -> Optional[WordTable]:
+        """All word timings as a WordTable (None if the project has none)."""
+        if not self.has_words:
+            return None
+        return WordTable.from_columns(
+            {column: self._column(name) for column, name in WORD_SECTIONS.items()}
+        )
+
+    def words(self, i: int) -> List[Dict]:
+        """Word timings of segment i ([] if the project has none)."""
+        if not self.has_words:
+            return []
+        rows = self._column("word_row")
+        lo = int(np.searchsorted(rows, i, side="left"))
+        hi = int(np.searchsorted(rows, i, side="right"))
+        text = self.text(i)
+        columns = {
+            column: self._column(name)[lo:hi] for column, name in WORD_SECTIONS.items()
+        }
+        return [
+            {
+                "start": round(float(columns["start"][w]), 3),
+                "end": round(float(columns["end"][w]), 3),
+                "word": text[columns["char_start"][w] : columns["char_end"][w]],
+                "probability": round(float(columns["probability"][w]), 3),
+            }
+            for w in range(hi - lo)
+        ]
+
+    def segment(self, i: int) -> Dict:
+        """Build the segment dict used by the rest of the app."""
+        if not -self._count <= i < self._count:
+            raise IndexError(i)
+        i %= self._count
+        seg = {
+            "start": float(self.start[i]),
+            "end": float(self.end[i]),
+            "text": self.text(i),
+            "translated_text": self.translated_text(i),
+        }
+        speaker = self.speaker(i)
+        if speaker is not None:
+            seg["speaker"] = speaker
+        if self.has_words:
+            seg["words"] = self.words(i)
+        return seg
+
+    def __getitem__(self, i: int) -> Dict:
+        return self.segment(i)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self.segment(i) for i in range(self._count))
+
+    def to_session(self) -> Dict[str, Any]:
+        """Materialize a session dict in the autosave layout."""
+        transcript = list(self)
+        state = dict(self.meta)
+        for seg in transcript:
+            seg.pop("words", None)
+        state["transcript"] = transcript
+        state["translated_transcript"] = [s["translated_text"] for s in transcript]
+        words = self.word_table()
+        if words is not None:
+            state["words"] = words.to_dict()
+        return state
+
+
+def open_project(path: str) -> Project:
+    """Open a project file for lazy, memory-mapped reading."""
+    return Project(path)
+
+
+def session_to_project(state: Dict[str, Any], path: str) -> None:
+    """
+    Write a session dict (autosave layout) as a project. translated_transcript
+    is folded into the segments instead of being stored twice; "words" holds
+    WordTable.to_dict() columns.
+    """
+    translated = state.get("translated_transcript") or []
+    segments = []
+    for i, seg in enumerate(state.get("transcript") or []):
+        seg = dict(seg)
+        if i < len(translated) and "translated_text" not in seg:
+            seg["translated_text"] = translated[i]
+        segments.append(seg)
+    meta = {k: v for k, v in state.items() if k not in SEGMENT_KEYS}
+    words = state.get("words")
+    write_project(
+        path, segments, meta, WordTable.from_columns(words) if words else None
+    )
+
+
+def convert_autosave(json_path: str, project_path: str) -> bool:
+    """Convert an autosaved session (snapshot plus journal) to a project file."""
+    try:
+        state = Autosaver(json_path).restore()
+        if state is None:
+            raise FileNotFoundError(json_path)
+        session_to_project(state, project_path)
+        return True
+    except Exception as e:
+        print(f"Project conversion error: {e}")
+        return False
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m core.project")
+    commands = parser.add_subparsers(dest="command", required=True)
+    convert = commands.add_parser("convert", help="Convert autosave JSON")
+    convert.add_argument("session", help="Autosave JSON (e.g. export/...json)")
+    convert.add_argument("project", help=f"Output {PROJECT_EXTENSION} file")
+    info = commands.add_parser("info", help="Summarize a project file")
+    info.add_argument("project")
+    args = parser.parse_args(argv)
+    if args.command == "convert":
+        return 0 if convert_autosave(args.session, args.project) else 1
+    project = open_project(args.project)
+    print(
+        f"{len(project)} segments, {len(project.speakers)} speakers, "
+        f"words: {'yes' if project.has_words else 'no'}, "
+        f"meta keys: {', '.join(sorted(project.meta))}"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,121 @@
+"""Dependency-graph scheduler running blocking stages on an asyncio loop."""
+
+from typing import Any, Callable, Dict, List, Optional, Sequence
+from concurrent.futures import Executor
+from dataclasses import dataclass
+import asyncio
+import threading
+import time
+
+
+class StageCancelled(Exception):
+    """Raised when a scheduled run is cancelled."""
+
+
+@dataclass
+class Stage:
+    """A blocking unit of work that may start once its requirements finish."""
+
+    name: str
+    func: Callable[[], Any]
+    requires: Sequence[str] = ()
+
+
+class StageScheduler:
+    """
+    Run stages as soon as every stage they require has finished, so
+    independent branches overlap and the wall time approaches the critical
+    path. Stage functions run on executor threads; on_start and on_done are
+    called on the event loop thread with the stage name. The first failure
+    cancels every stage that has not started and is re-raised by run().
+
+    A stage that is already running cannot be interrupted, so long stages
+    should call check_cancelled() between units of work.
+    """
+
+    def __init__(
+        self,
+        stages: List[Stage],
+        executor: Optional[Executor] = None,
+        on_start: Optional[Callable[[str], None]] = None,
+        on_done: Optional[Callable[[str], None]] = None,
+    ):
+        self.stages = {stage.name: stage for stage in stages}
+        self.executor = executor
+        self.on_start = on_start
+        self.on_done = on_done
+        self.timings: Dict[str, float] = {}
+        self._cancelled = threading.Event()
+        self._tasks: Dict[str, asyncio.Task] = {}
+        self._validate()
+
+    def _validate(self) -> None:
+        for stage in self.stages.values():
+            for name in stage.requires:
+                if name not in self.stages:
+                    raise ValueError(f"Stage {stage.name!r} requires unknown {name!r}")
+        state: Dict[str, int] = {}
+
+        def visit(name: str) -> None:
+            if state.get(name) == 1:
+                raise ValueError(f"Stage dependency cycle through {name!r}")
+            if state.get(name) == 2:
+                return
+            state[name] = 1
+            for required in self.stages[name].requires:
+                visit(required)
+            state[name] = 2
+
+        for name in self.stages:
+            visit(name)
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check_cancelled(self) -> None:
+        """Raise StageCancelled inside a stage if the run was cancelled."""
+        if self._cancelled.is_set():
+            raise StageCancelled()
+
+    def cancel(self) -> None:
+        """Stop the run. Must be called on the loop thread (see cancel_threadsafe)."""
+        self._cancelled.set()
+        for task in self._tasks.values():
+            task.cancel()
+
+    def cancel_threadsafe(self, loop: asyncio.AbstractEventLoop) -> None:
+        self._cancelled.set()
+        loop.call_soon_threadsafe(self.cancel)
+
+    async def _run_stage(self, stage: Stage) -> None:
+        for name in stage.requires:
+            await self._tasks[name]
+        self.check_cancelled()
+        if self.on_start:
+            self.on_start(stage.name)
+        loop = asyncio.get_running_loop()
+        started = time.perf_counter()
+        await loop.run_in_executor(self.executor, stage.func)
+        self.timings[stage.name] = time.perf_counter() - started
+        if self.on_done:
+            self.on_done(stage.name)
+
+    async def run(self) -> Dict[str, float]:
+        """Run every stage and return the per-stage wall times in seconds."""
+        self._tasks = {
+            name: asyncio.ensure_future(self._run_stage(stage))
+            for name, stage in self.stages.items()
+        }
+        tasks = list(self._tasks.values())
+        try:
+            await asyncio.gather(*tasks)
+        except (asyncio.CancelledError, Exception) as e:
+            self._cancelled.set()
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if isinstance(e, asyncio.CancelledError):
+                raise StageCancelled() from None
+            raise
+        return self.timings
@@ -0,0 +1,450 @@
+"""Column-oriented storage for transcript segments and their word timings."""
+
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+from bisect import bisect_left
+import numpy as np
+
+Rows = Union[None, int, Sequence[int], np.ndarray]
+
+
+class SegmentTable:
+    """
+    Transcript segments stored as columns: float64 start/end arrays, an int32
+    speaker id array (-1 = unassigned) over a list of speaker names, and
+    lists of original and translated text. Rows keep their insertion order
+    (row i is segment i everywhere in the UI); time queries go through an
+    interval index rebuilt lazily after timings change, so point and range
+    lookups are O(log n + k) for k hits.
+
+    Iterating yields plain segment dicts, so code written against lists of
+    dicts keeps working.
+    """
+
+    __slots__ = (
+        "_start",
+        "_end",
+        "_speaker",
+        "_size",
+        "text",
+        "translated",
+        "speakers",
+        "_speaker_ids",
+        "_order",
+        "_layers",
+    )
+
+    def __init__(self, capacity: int = 64):
+        capacity = max(1, capacity)
+        self._start = np.zeros(capacity, dtype=np.float64)
+        self._end = np.zeros(capacity, dtype=np.float64)
+        self._speaker = np.full(capacity, -1, dtype=np.int32)
+        self._size = 0
+        self.text: List[str] = []
+        # None means "not translated"; translated_text() falls back to text
+        self.translated: List[Optional[str]] = []
+        self.speakers: List[str] = []
+        self._speaker_ids: Dict[str, int] = {}
+        self._invalidate()
+
+    # -- construction -----------------------------------------------------
+
+    @classmethod
+    def from_dicts(cls, segments: Iterable[Dict]) -> "SegmentTable":
+        """Build a table from {'start', 'end', 'text', ...} dicts."""
+        segments = list(segments)
+        table = cls(len(segments))
+        for seg in segments:
+            table.append(
+                seg.get("start", 0.0),
+                seg.get("end", 0.0),
+                seg.get("text", ""),
+                speaker=seg.get("speaker"),
+                translated_text=seg.get("translated_text"),
+            )
+        return table
+
+    def to_dicts(self) -> List[Dict]:
+        return list(self)
+
+    def append(
+        self,
+        start: float,
+        end: float,
+        text: str,
+        speaker: Optional[str] = None,
+        translated_text: Optional[str] = None,
+    ) -> int:
+        """Add a segment and return its row."""
+        if self._size == len(self._start):
+            self._grow(2 * self._size)
+        row = self._size
+        self._start[row] = start
+        self._end[row] = end
+        self._speaker[row] = self.speaker_id(speaker)
+        self.text.append(text)
+        self.translated.append(translated_text)
+        self._size += 1
+        self._invalidate()
+        return row
+
+    def _grow(self, capacity: int) -> None:
+        for name in ("_start", "_end", "_speaker"):
+            old = getattr(self, name)
+            new = np.full(capacity, -1 if name == "_speaker" else 0, dtype=old.dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    def speaker_id(self, speaker: Optional[str]) -> int:
+        """Id of a speaker name, registering it if new (-1 for None)."""
+        if speaker is None:
+            return -1
+        sid = self._speaker_ids.get(speaker)
+        if sid is None:
+            sid = self._speaker_ids[speaker] = len(self.speakers)
+            self.speakers.append(speaker)
+        return sid
+
+    # -- columns ----------------------------------------------------------
+
+    @property
+    def start(self) -> np.ndarray:
+        """Start times (a view; write through set_timing to keep the index)."""
+        return self._start[: self._size]
+
+    @property
+    def end(self) -> np.ndarray:
+        return self._end[: self._size]
+
+    @property
+    def speaker_ids(self) -> np.ndarray:
+        return self._speaker[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def speaker(self, row: int) -> Optional[str]:
+        sid = int(self._speaker[row])
+        return self.speakers[sid] if sid >= 0 else None
+
+    def translated_text(self, row: int) -> str:
+        translated = self.translated[row]
+        return self.text[row] if translated is None else translated
+
+    def segment(self, row: int) -> Dict:
+        if not 0 <= row < self._size:
+            raise IndexError(row)
+        seg = {
+            "start": float(self._start[row]),
+            "end": float(self._end[row]),
+            "text": self.text[row],
+        }
+        if self.translated[row] is not None:
+            seg["translated_text"] = self.translated[row]
+        speaker = self.speaker(row)
+        if speaker is not None:
+            seg["speaker"] = speaker
+        return seg
+
+    def __getitem__(self, row: int) -> Dict:
+        return self.segment(row + self._size if row < 0 else row)
+
+    def __iter__(self) -> Iterator[Dict]:
+        return (self.segment(row) for row in range(self._size))
+
+    # -- edits ------------------------------------------------------------
+
+    def set_timing(self, row: int, start: float, end: float) -> None:
+        self._start[row] = start
+        self._end[row] = end
+        self._invalidate()
+
+    def set_speaker(self, rows: Rows, speaker: Optional[str]) -> None:
+        """Assign one speaker to a row, a list of rows or (None) every row."""
+        self._speaker[: self._size][self._select(rows)] = self.speaker_id(speaker)
+
+    def shift(self, offset: float, rows: Rows = None) -> None:
+        """Move the selected segments (default: all) by offset seconds."""
+        sel = self._select(rows)
+        self._start[: self._size][sel] += offset
+        self._end[: self._size][sel] += offset
+        self._invalidate()
+
+    def scale(self, factor: float, origin: float = 0.0, rows: Rows = None) -> None:
+        """Stretch the selected timings about origin, e.g. for fps changes."""
+        sel = self._select(rows)
+        for column in (self._start, self._end):
+            view = column[: self._size]
+            view[sel] = origin + (view[sel] - origin) * factor
+        self._invalidate()
+
+    def _select(self, rows: Rows):
+        if rows is None:
+            return slice(None)
+        return np.atleast_1d(np.asarray(rows, dtype=np.intp))
+
+    # -- interval index ---------------------------------------------------
+
+    def _invalidate(self) -> None:
+        self._order = None
+        self._layers = None
+
+    def _index(self) -> None:
+        # Segments in start order are dealt into layers in which no segment
+        # contains another, so starts and ends are both sorted within a
+        # layer and a query is two binary searches per layer. Each segment
+        # goes to the first layer whose last end is <= its own end; those
+        # last ends stay decreasing across layers, so that is a bisect too.
+        # Transcripts only need more than one layer where segments nest.
+        if self._order is not None:
+            return
+        starts, ends = self.start, self.end
+        self._order = np.lexsort((-ends, starts))
+        layer = np.empty(self._size, dtype=np.intp)
+        neg_tops: List[float] = []
+        for i, end in enumerate(ends[self._order].tolist()):
+            k = bisect_left(neg_tops, -end)
+            if k == len(neg_tops):
+                neg_tops.append(-end)
+            else:
+                neg_tops[k] = -end
+            layer[i] = k
+        grouped = np.argsort(layer, kind="stable")
+        bounds = np.searchsorted(layer[grouped], np.arange(len(neg_tops) + 1))
+        self._layers = []
+        for k in range(len(neg_tops)):
+            positions = grouped[bounds[k] : bounds[k + 1]]
+            rows = self._order[positions]
+            self._layers.append((positions, starts[rows], ends[rows]))
+
+    def overlapping(self, start: float, end: float) -> np.ndarray:
+        """
+        Rows of segments overlapping [start, end), in start order. An empty
+        range (end <= start) is the point query start <= time < end.
+        """
+        self._index()
+        hits = []
+        for positions, layer_start, layer_end in self._layers:
+            lo = int(np.searchsorted(layer_end, start, side="right"))
+            if end > start:
+                hi = int(np.searchsorted(layer_start, end, side="left"))
+            else:
+                hi = int(np.searchsorted(layer_start, start, side="right"))
+            if lo < hi:
+                hits.append(positions[lo:hi])
+        if not hits:
+            return np.zeros(0, dtype=np.intp)
+        return self._order[np.sort(np.concatenate(hits))]
+
+    def overlap_pairs(
+        self, starts: Sequence[float], ends: Sequence[float]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        overlapping() for many ranges at once: (queries, rows) arrays with
+        one entry for every segment row overlapping range queries[i].
+        """
+        self._index()
+        starts = np.asarray(starts, dtype=np.float64)
+        ends = np.asarray(ends, dtype=np.float64)
+        point = ends <= starts
+        queries, rows = [], []
+        for positions, layer_start, layer_end in self._layers:
+            lo = np.searchsorted(layer_end, starts, side="right")
+            hi = np.where(
+                point,
+                np.searchsorted(layer_start, starts, side="right"),
+                np.searchsorted(layer_start, ends, side="left"),
+            )
+            counts = np.maximum(hi - lo, 0)
+            total = int(counts.sum())
+            if not total:
+                continue
+            # Expand each query's [lo, hi) run into consecutive positions.
+            first = np.repeat(lo - (np.cumsum(counts) - counts), counts)
+            queries.append(np.repeat(np.arange(len(starts)), counts))
+            rows.append(self._order[positions[first + np.arange(total)]])
+        if not queries:
+            return np.zeros(0, dtype=np.intp), np.zeros(0, dtype=np.intp)
+        return np.concatenate(queries), np.concatenate(rows)
+
+    def at(self, time: float) -> np.ndarray:
+        """Rows of segments with start <= time < end."""
+        return self.overlapping(time, time)
+
+    def first_at(self, time: float) -> Optional[int]:
+        rows = self.at(time)
+        return int(rows[0]) if len(rows) else None
+
+
+class WordTable:
+    """
+    Word timings for a SegmentTable, stored as parallel arrays: float32
+    start/end/probability, the int32 row of the owning segment and uint32
+    character offsets of the word within that segment's text. Words are kept
+    grouped by row in ascending row order, so a segment's words are found
+    with a binary search.
+    """
+
+    __slots__ = (
+        "_start",
+        "_end",
+        "_probability",
+        "_row",
+        "_char_start",
+        "_char_end",
+        "_size",
+    )
+
+    _COLUMNS = (
+        ("_start", np.float32),
+        ("_end", np.float32),
+        ("_probability", np.float32),
+        ("_row", np.int32),
+        ("_char_start", np.uint32),
+        ("_char_end", np.uint32),
+    )
+
+    def __init__(self, capacity: int = 256):
+        capacity = max(1, capacity)
+        for name, dtype in self._COLUMNS:
+            setattr(self, name, np.zeros(capacity, dtype=dtype))
+        self._size = 0
+
+    def _grow(self, capacity: int) -> None:
+        for name, dtype in self._COLUMNS:
+            old = getattr(self, name)
+            new = np.zeros(capacity, dtype=dtype)
+            new[: self._size] = old[: self._size]
+            setattr(self, name, new)
+
+    def append(
+        self,
+        row: int,
+        start: float,
+        end: float,
+        probability: float,
+        char_start: int,
+        char_end: int,
+    ) -> None:
+        if self._size and row < self._row[self._size - 1]:
+            raise ValueError("Words must be appended in row order")
+        if self._size == len(self._start):
+            self._grow(2 * self._size)
+        i = self._size
+        self._start[i] = start
+        self._end[i] = end
+        self._probability[i] = probability
+        self._row[i] = row
+        self._char_start[i] = char_start
+        self._char_end[i] = char_end
+        self._size += 1
+
+    def add_segment(self, row: int, text: str, words: Iterable[Dict]) -> int:
+        """
+        Add faster-whisper style words ({'start', 'end', 'word',
+        'probability'}) of the segment at row, locating each word in text.
+        Words that cannot be found in text are skipped. Returns the number
+        of words added.
+        """
+        added = 0
+        cursor = 0
+        for word in words:
+            token = word.get("word", "").strip()
+            pos = text.find(token, cursor) if token else -1
+            if pos < 0:
+                continue
+            cursor = pos + len(token)
+            self.append(
+                row,
+                word["start"],
+                word["end"],
+                word.get("probability", 1.0),
+                pos,
+                cursor,
+            )
+            added += 1
+        return added
+
+    # -- columns ----------------------------------------------------------
+
+    @property
+    def start(self) -> np.ndarray:
+        return self._start[: self._size]
+
+    @property
+    def end(self) -> np.ndarray:
+        return self._end[: self._size]
+
+    @property
+    def probability(self) -> np.ndarray:
+        return self._probability[: self._size]
+
+    @property
+    def rows(self) -> np.ndarray:
+        return self._row[: self._size]
+
+    @property
+    def char_start(self) -> np.ndarray:
+        return self._char_start[: self._size]
+
+    @property
+    def char_end(self) -> np.ndarray:
+        return self._char_end[: self._size]
+
+    def __len__(self) -> int:
+        return self._size
+
+    def span(self, row: int) -> Tuple[int, int]:
+        """Index range [lo, hi) of the words of a segment row."""
+        rows = self.rows
+        lo = int(np.searchsorted(rows, row, side="left"))
+        hi = int(np.searchsorted(rows, row, side="right"))
+        return lo, hi
+
+    def words(self, transcript: SegmentTable, row: int) -> List[Dict]:
+        """The words of a segment row as {'start', 'end', 'word', ...} dicts."""
+        lo, hi = self.span(row)
+        text = transcript.text[row]
+        return [
+            {
+                "start": round(float(self._start[i]), 3),
+                "end": round(float(self._end[i]), 3),
+                "word": text[self._char_start[i] : self._char_end[i]],
+                "probability": round(float(self._probability[i]), 3),
+            }
+            for i in range(lo, hi)
+        ]
+
+    # -- serialization ----------------------------------------------------
+
+    def to_dict(self) -> Dict[str, List]:
+        """Column lists for JSON (times rounded to milliseconds)."""
+        return {
+            "start": np.round(self.start.astype(np.float64), 3).tolist(),
+            "end": np.round(self.end.astype(np.float64), 3).tolist(),
+            "probability": np.round(self.probability.astype(np.float64), 3).tolist(),
+            "row": self.rows.tolist(),
+            "char_start": self.char_start.tolist(),
+            "char_end": self.char_end.tolist(),
+        }
+
+    @classmethod
+    def from_columns(cls, columns: Dict[str, Sequence]) -> "WordTable":
+        """Build a table from to_dict() output or project file columns."""
+        table = cls(len(columns["start"]))
+        table._size = len(columns["start"])
+        for key, (name, dtype) in zip(
+            ("start", "end", "probability", "row", "char_start", "char_end"),
+            cls._COLUMNS,
+        ):
+            getattr(table, name)[: table._size] = np.asarray(columns[key], dtype=dtype)
+        if table._size and np.any(np.diff(table.rows) < 0):
+            raise ValueError("Word rows are not in ascending order")
+        return table
+
+    @classmethod
+    def from_segments(cls, segments: Iterable[Dict]) -> "WordTable":
+        """Collect the 'words' lists of segment dicts."""
+        table = cls()
+        for row, seg in enumerate(segments):
+            table.add_segment(row, seg.get("text", ""), seg.get("words") or ())
+        return table
@@ -1,15 +1,18 @@
 """Subtitle generation (SRT)."""
 
-from typing import List, Dict, Optional
+from typing import Iterable, List, Dict, Optional
 import re
 
 
 def generate_srt(
-    segments: List[Dict], srt_path: str, speaker_names: Optional[Dict[int, str]] = None
+    segments: Iterable[Dict],
+    srt_path: str,
+    speaker_names: Optional[Dict[int, str]] = None,
 ) -> None:
     """
     Generate SRT file from segments and speaker names.
-    segments: list of dicts with keys: 'start', 'end', 'text', 'speaker' (optional)
+    segments: a SegmentTable or list of dicts with keys: 'start', 'end',
+    'text', 'speaker' (optional)
     speaker_names: dict mapping speaker id to name
     """
     try:
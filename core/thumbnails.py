@@ -0,0 +1,184 @@
+"""Cached thumbnail sprite sheets for timeline scrubbing."""
+
+from typing import Dict, List, Optional, Tuple
+from core.constants import DEFAULT_CACHE_PATH
+from core.media_info import probe_video
+import hashlib
+import json
+import math
+import os
+import subprocess
+import threading
+
+THUMBNAIL_DIR = os.path.join(DEFAULT_CACHE_PATH, "thumbnails")
+
+# Bump when sheet layout or encoding changes so old sheets are rebuilt.
+THUMBNAIL_VERSION = 1
+
+
+def video_key(video_path: str) -> str:
+    """Hash identifying a video by path, size and mtime."""
+    stat = os.stat(video_path)
+    parts = f"{os.path.abspath(video_path)}|{stat.st_size}|{stat.st_mtime_ns}"
+    return hashlib.sha256(parts.encode("utf-8")).hexdigest()[:32]
+
+
+def render_sheet(
+    video_path: str,
+    start: float,
+    interval: float,
+    count: int,
+    out_path: str,
+    width: int,
+    height: int,
+    columns: int,
+) -> None:
+    """
+    Render `count` frames, one every `interval` seconds from `start`, into
+    one sprite sheet with a single ffmpeg call. The video is opened once and
+    only keyframes are decoded; fps picks the keyframe nearest each tile's
+    time. Tiles are letterboxed to width x height and laid out row by row.
+    Raises on failure.
+    """
+    rows = math.ceil(count / columns)
+    graph = (
+        f"fps=1/{interval}:start_time=0:round=near:eof_action=pass,"
+        f"trim=end_frame={count},"
+        f"scale={width}:{height}:force_original_aspect_ratio=decrease,"
+        f"pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,setsar=1,"
+        f"tile={columns}x{rows}"
+    )
+    cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-skip_frame", "nokey"]
+    cmd += ["-noaccurate_seek", "-ss", f"{start:.3f}", "-t", f"{count * interval:.3f}"]
+    cmd += ["-an", "-i", video_path, "-vf", graph]
+    cmd += ["-frames:v", "1", "-q:v", "4", out_path]
+    subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+
+class ThumbnailStrip:
+    """
+    Thumbnails every `interval` seconds of a video, stored as sprite sheets of
+    columns x rows tiles under root/<video key>/ with an index.json. Each
+    sheet covers a fixed time range and is rendered on first request, so
+    the timeline only waits for ranges it has not shown before.
+    """
+
+    def __init__(
+        self,
+        video_path: str,
+        interval: float = 2.0,
+        width: int = 160,
+        height: int = 90,
+        columns: int = 10,
+        rows: int = 10,
+        root: str = THUMBNAIL_DIR,
+    ):
+        self.video_path = video_path
+        self.interval = interval
+        self.width = width
+        self.height = height
+        self.columns = columns
+        self.rows = rows
+        self.dir = os.path.join(root, video_key(video_path))
+        self.index_path = os.path.join(self.dir, "index.json")
+        info = probe_video(video_path)
+        self.duration = info.duration if info and info.duration else 0.0
+        self._lock = threading.Lock()
+        self._index = self._load_index()
+
+    @property
+    def tiles_per_sheet(self) -> int:
+        return self.columns * self.rows
+
+    @property
+    def frame_count(self) -> int:
+        return max(1, math.ceil(self.duration / self.interval))
+
+    @property
+    def sheet_count(self) -> int:
+        return math.ceil(self.frame_count / self.tiles_per_sheet)
+
+    def _layout(self) -> Dict:
+        return {
+            "version": THUMBNAIL_VERSION,
+            "interval": self.interval,
+            "width": self.width,
+            "height": self.height,
+            "columns": self.columns,
+            "rows": self.rows,
+        }
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("layout") == self._layout():
+                return index
+        except (OSError, ValueError):
+            pass
+        return {"layout": self._layout(), "sheets": {}}
+
+    def _save_index(self) -> None:
+        tmp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self._index, f, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def sheet_times(self, sheet: int) -> List[float]:
+        """Timestamps of the tiles in a sheet, clamped inside the video."""
+        first = sheet * self.tiles_per_sheet
+        last = min(first + self.tiles_per_sheet, self.frame_count)
+        end = max(0.0, self.duration - 0.1)
+        return [min(i * self.interval, end) for i in range(first, last)]
+
+    def sheet_path(self, sheet: int) -> Optional[str]:
+        """Path of a rendered sheet, or None if it is not cached yet."""
+        name = self._index["sheets"].get(str(sheet))
+        path = os.path.join(self.dir, name) if name else None
+        return path if path and os.path.exists(path) else None
+
+    def ensure(self, start: float = 0.0, end: Optional[float] = None) -> List[str]:
+        """Render the sheets covering [start, end] that are missing."""
+        end = self.duration if end is None else end
+        span = self.interval * self.tiles_per_sheet
+        first = max(0, int(start // span))
+        last = min(self.sheet_count - 1, int(end // span))
+        paths = []
+        with self._lock:
+            for sheet in range(first, last + 1):
+                path = self.sheet_path(sheet)
+                if path is None:
+                    os.makedirs(self.dir, exist_ok=True)
+                    name = f"sheet_{sheet:04d}.jpg"
+                    path = os.path.join(self.dir, name)
+                    times = self.sheet_times(sheet)
+                    render_sheet(
+                        self.video_path,
+                        times[0],
+                        self.interval,
+                        len(times),
+                        path,
+                        self.width,
+                        self.height,
+                        self.columns,
+                    )
+                    self._index["sheets"][str(sheet)] = name
+                    self._save_index()
+                paths.append(path)
+        return paths
+
+    def tile(self, time: float) -> Optional[Tuple[str, Tuple[int, int, int, int]]]:
+        """
+        Sheet path and (x, y, width, height) of the thumbnail nearest `time`,
+        rendering its sheet if needed. None if rendering fails.
+        """
+        frame = min(max(0, int(round(time / self.interval))), self.frame_count - 1)
+        sheet, slot = divmod(frame, self.tiles_per_sheet)
+        try:
+            start = sheet * self.interval * self.tiles_per_sheet
+            path = self.ensure(start, start)[0]
+        except Exception as e:
+            print(f"Thumbnail error: {e}")
+            return None
+        row, col = divmod(slot, self.columns)
+        return path, (col * self.width, row * self.height, self.width, self.height)
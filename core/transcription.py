@@ -1,36 +1,368 @@
 """Transcription using faster-whisper."""
 
-from typing import List, Dict, Any
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from faster_whisper import WhisperModel
+from core.audio import decode_audio
+from core.audio_store import mapped_file, open_audio
+from faster_whisper.vad import VadOptions, get_speech_timestamps
+import multiprocessing
+import numpy as np
 import os
+import threading
+import time
 
+# Approximate resident size (MB) of each model at float16, used for the cache cap.
+MODEL_MEMORY_MB = {
+    "tiny": 150,
+    "base": 300,
+    "small": 900,
+    "medium": 2200,
+    "large": 4500,
+    "large-v1": 4500,
+    "large-v2": 4500,
+    "large-v3": 4500,
+}
 
-def load_transcription_model(model_size: str = "medium") -> WhisperModel:
+COMPUTE_TYPE_SCALE = {"float32": 2.0, "int8": 0.5, "int8_float16": 0.5}
+
+ModelKey = Tuple[str, str, str, int]
+
+SAMPLE_RATE = 16000
+
+# Decoding options shared by every transcription path.
+TRANSCRIBE_OPTIONS = {"beam_size": 5}
+
+
+def load_transcription_model(
+    model_size: str = "medium",
+    device: str = "auto",
+    compute_type: str = "auto",
+    cpu_threads: int = 0,
+) -> WhisperModel:
     """Load and return the faster-whisper model."""
     try:
-        model = WhisperModel(model_size, device="auto", compute_type="auto")
+        model = WhisperModel(
+            model_size,
+            device=device,
+            compute_type=compute_type,
+            cpu_threads=cpu_threads,
+        )
         return model
     except Exception as e:
         print(f"Transcription model loading error: {e}")
         raise
 
 
-def transcribe_audio(audio_path: str, model_size: str = "medium") -> List[Dict]:
-    """Transcribe audio and return segments with timestamps."""
+def estimate_model_memory(model_size: str, compute_type: str = "auto") -> int:
+    """Rough memory footprint in MB of a loaded model."""
+    base = MODEL_MEMORY_MB.get(os.path.basename(model_size.rstrip("/")), 2200)
+    return int(base * COMPUTE_TYPE_SCALE.get(compute_type, 1.0))
+
+
+class ModelCache:
+    """
+    Thread-safe LRU cache of loaded WhisperModels keyed by
+    (model_size, device, compute_type, cpu_threads).
+    Least recently used models are dropped once the estimated total exceeds
+    max_memory_mb; a single model larger than the cap is still kept on its own.
+    """
+
+    def __init__(self, max_memory_mb: int = 4096, loader=load_transcription_model):
+        self.max_memory_mb = max_memory_mb
+        self._loader = loader
+        self._models: "OrderedDict[ModelKey, Tuple[WhisperModel, int]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._key_locks: Dict[ModelKey, threading.Lock] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.load_seconds = 0.0
+
+    def get(
+        self,
+        model_size: str = "medium",
+        device: str = "auto",
+        compute_type: str = "auto",
+        cpu_threads: int = 0,
+    ) -> WhisperModel:
+        """Return a cached model, loading it at most once per key."""
+        key = (model_size, device, compute_type, cpu_threads)
+        model = self._lookup(key)
+        if model is not None:
+            return model
+        with self._lock:
+            key_lock = self._key_locks.setdefault(key, threading.Lock())
+        # Only one thread loads a given key; the others wait and then hit.
+        with key_lock:
+            model = self._lookup(key)
+            if model is not None:
+                return model
+            started = time.perf_counter()
+            model = self._loader(model_size, device, compute_type, cpu_threads)
+            elapsed = time.perf_counter() - started
+            size_mb = estimate_model_memory(model_size, compute_type)
+            with self._lock:
+                self.misses += 1
+                self.load_seconds += elapsed
+                self._evict(self.max_memory_mb - size_mb)
+                self._models[key] = (model, size_mb)
+            return model
+
+    def _lookup(self, key: ModelKey):
+        with self._lock:
+            entry = self._models.get(key)
+            if entry is None:
+                return None
+            self._models.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def _evict(self, budget_mb: int) -> None:
+        while self._models and self.memory_mb() > budget_mb:
+            self._models.popitem(last=False)
+            self.evictions += 1
+
+    def memory_mb(self) -> int:
+        """Estimated memory held by cached models."""
+        return sum(size for _, size in self._models.values())
+
+    def clear(self) -> None:
+        """Drop all cached models."""
+        with self._lock:
+            self._models.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return hit/miss counters, total load time and cache contents."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "load_seconds": round(self.load_seconds, 3),
+                "memory_mb": self.memory_mb(),
+                "max_memory_mb": self.max_memory_mb,
+                "models": [list(key) for key in self._models],
+            }
+
+
+MODEL_CACHE = ModelCache(int(os.environ.get("DUBCRAFT_MODEL_CACHE_MB", "4096")))
+
+
+def get_transcription_model(
+    model_size: str = "medium",
+    device: str = "auto",
+    compute_type: str = "auto",
+    cpu_threads: int = 0,
+) -> WhisperModel:
+    """Return a process-wide cached faster-whisper model."""
+    return MODEL_CACHE.get(model_size, device, compute_type, cpu_threads)
+
+
+def _segment_dict(seg, offset: float = 0.0) -> Dict:
+    """Convert a faster-whisper segment, keeping its words if it has any."""
+    result = {
+        "start": seg.start + offset,
+        "end": seg.end + offset,
+        "text": seg.text.strip(),
+    }
+    if seg.words:
+        result["words"] = [
+            {
+                "start": w.start + offset,
+                "end": w.end + offset,
+                "word": w.word,
+                "probability": w.probability,
+            }
+            for w in seg.words
+        ]
+    return result
+
+
+def iter_transcribe(
+    audio: Union[str, np.ndarray],
+    model_size: str = "medium",
+    progress: Optional[Callable[[float], None]] = None,
+    word_timestamps: bool = False,
+) -> Iterator[Dict]:
+    """
+    Yield segments as faster-whisper decodes them. audio is a file path or
+    16 kHz mono float32 samples. progress receives the fraction of the audio
+    transcribed so far. With word_timestamps, segments carry a 'words' list
+    ({'start', 'end', 'word', 'probability'}); aligning words costs extra
+    decode time. Errors propagate to the caller.
+    """
+    model = get_transcription_model(model_size)
+    segments, info = model.transcribe(
+        audio, word_timestamps=word_timestamps, **TRANSCRIBE_OPTIONS
+    )
+    for seg in segments:
+        if progress and info.duration:
+            progress(min(seg.end / info.duration, 1.0))
+        yield _segment_dict(seg)
+
+
+def transcribe_audio(
+    audio_path: str,
+    model_size: str = "medium",
+    on_segment: Optional[Callable[[Dict], None]] = None,
+) -> List[Dict]:
+    """
+    Transcribe audio and return segments with timestamps.
+    on_segment is called with each segment as soon as it is decoded.
+    """
+    results = []
     try:
-        model = load_transcription_model(model_size)
-        segments, _ = model.transcribe(audio_path, beam_size=5, word_timestamps=True)
-        results = []
-        for seg in segments:
-            results.append(
-                {"start": seg.start, "end": seg.end, "text": seg.text.strip()}
-            )
+        for seg in iter_transcribe(audio_path, model_size):
+            results.append(seg)
+            if on_segment:
+                on_segment(seg)
         return results
     except Exception as e:
         print(f"Transcription error: {e}")
         return []
 
 
+def split_on_silence(
+    audio: np.ndarray, chunk_seconds: float = 120.0, min_silence_ms: int = 500
+) -> List[Tuple[int, int]]:
+    """
+    Split 16 kHz mono audio into (start, end) sample spans of roughly
+    chunk_seconds, cutting only in the middle of silences found by the VAD.
+    A single speech run longer than chunk_seconds is kept whole.
+    """
+    speech = get_speech_timestamps(
+        audio, VadOptions(min_silence_duration_ms=min_silence_ms)
+    )
+    limit = int(chunk_seconds * SAMPLE_RATE)
+    spans = []
+    chunk_start = 0
+    for prev, nxt in zip(speech, speech[1:]):
+        if nxt["end"] - chunk_start > limit:
+            cut = (prev["end"] + nxt["start"]) // 2
+            spans.append((chunk_start, cut))
+            chunk_start = cut
+    spans.append((chunk_start, len(audio)))
+    return spans
+
+
+_worker_model: Optional[WhisperModel] = None
+
+
+def _init_worker(model_size: str, device: str, compute_type: str, threads: int):
+    global _worker_model
+    _worker_model = get_transcription_model(model_size, device, compute_type, threads)
+
+
+def _transcribe_chunk(
+    audio: Union[np.ndarray, Tuple[str, int, int]],
+    offset: float,
+    word_timestamps: bool = False,
+) -> List[Dict]:
+    if isinstance(audio, tuple):
+        # (store file, start, end): map the span instead of receiving a copy
+        path, start, end = audio
+        audio = open_audio(path)[0][start:end]
+    segments, _ = _worker_model.transcribe(
+        audio, word_timestamps=word_timestamps, **TRANSCRIBE_OPTIONS
+    )
+    return [_segment_dict(seg, offset) for seg in segments]
+
+
+def _repeated_words(previous: str, text: str, max_words: int = 8) -> int:
+    """Number of leading words of text that repeat the trailing words of previous."""
+    prev_words = previous.lower().split()
+    lowered = text.lower().split()
+    for n in range(min(max_words, len(prev_words), len(lowered)), 0, -1):
+        if prev_words[-n:] == lowered[:n]:
+            return n
+    return 0
+
+
+def _clamp_word(word: Dict, start: float) -> Dict:
+    if word["start"] >= start:
+        return word
+    return dict(word, start=start, end=max(word["end"], start))
+
+
+def merge_chunk_segments(chunks: List[List[Dict]]) -> List[Dict]:
+    """
+    Join per-chunk segments (already offset to absolute time) into one
+    time-ordered list, clamping overlaps and removing words repeated across
+    a chunk seam from both the text and the word timings.
+    """
+    merged: List[Dict] = []
+    for chunk in chunks:
+        for i, seg in enumerate(sorted(chunk, key=lambda s: s["start"])):
+            seg = dict(seg)
+            if merged:
+                prev = merged[-1]
+                if i == 0:
+                    n = _repeated_words(prev["text"], seg["text"])
+                    if n:
+                        seg["text"] = " ".join(seg["text"].split()[n:])
+                        if "words" in seg:
+                            seg["words"] = seg["words"][n:]
+                seg["start"] = max(seg["start"], prev["end"])
+                if "words" in seg:
+                    seg["words"] = [_clamp_word(w, seg["start"]) for w in seg["words"]]
+            if seg["text"] and seg["end"] > seg["start"]:
+                merged.append(seg)
+    return merged
+
+
+def transcribe_parallel(
+    audio: Union[str, np.ndarray],
+    model_size: str = "medium",
+    processes: int = 0,
+    threads_per_process: int = 0,
+    chunk_seconds: float = 120.0,
+    device: str = "cpu",
+    compute_type: str = "auto",
+    progress: Optional[Callable[[float], None]] = None,
+    word_timestamps: bool = False,
+) -> List[Dict]:
+    """
+    Transcribe long audio (a path or 16 kHz mono float32 samples) by
+    splitting it at silences and decoding the chunks in worker processes
+    that each keep a warm model. Samples mapped from an AudioStore file are
+    reopened by the workers rather than pickled. processes defaults to a
+    quarter of the CPUs; threads_per_process defaults to an even share of the
+    CPUs so the pool does not oversubscribe. word_timestamps is as in
+    iter_transcribe. Errors propagate to the caller.
+    """
+    cpus = os.cpu_count() or 1
+    processes = processes or max(1, cpus // 4)
+    threads_per_process = threads_per_process or max(1, cpus // processes)
+    if isinstance(audio, str):
+        audio = decode_audio(audio, SAMPLE_RATE, 1)
+    spans = split_on_silence(audio, chunk_seconds)
+    store_file = mapped_file(audio)
+    results: List[List[Dict]] = [[] for _ in spans]
+    # spawn: forked children must not inherit CTranslate2/CUDA state
+    with ProcessPoolExecutor(
+        max_workers=min(processes, len(spans)),
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model_size, device, compute_type, threads_per_process),
+    ) as pool:
+        futures = {
+            pool.submit(
+                _transcribe_chunk,
+                (store_file, start, end) if store_file else audio[start:end],
+                start / SAMPLE_RATE,
+                word_timestamps,
+            ): i
+            for i, (start, end) in enumerate(spans)
+        }
+        for done, future in enumerate(as_completed(futures), 1):
+            results[futures[future]] = future.result()
+            if progress:
+                progress(done / len(spans))
+    return merge_chunk_segments(results)
+
+
 def format_segments(segments: List[Dict]) -> List[Dict]:
     """Format raw segments into a standard structure."""
     # Already formatted above, but can be extended for custom formatting
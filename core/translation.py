@@ -1,8 +1,28 @@
 """Translation using deep-translator."""
 
-from typing import List
+from typing import Callable, Dict, List, Optional
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from core.constants import LANGUAGE_CODES
+from core.translation_memory import (
+    TranslationMemory,
+    get_translation_memory,
+    normalize_text,
+)
 from deep_translator import GoogleTranslator
+from modules.logging import log_debug, log_error
+import os
+import random
+import threading
+import time
+import requests
+
+# (texts, source language, target language) -> translations, same length
+TranslateBatch = Callable[[List[str], str, str], List[str]]
+
+# Google rejects requests over 5000 characters.
+MAX_BATCH_CHARS = 4500
+MAX_BATCH_LINES = 100
 
 
 def translate_text(text: str, target_language: str) -> str:
@@ -20,13 +40,273 @@ def get_language_code(language: str) -> str:
     return LANGUAGE_CODES.get(language, "en")
 
 
-def batch_translate_texts(texts: List[str], target_language: str) -> List[str]:
-    """Translate a list of texts to the target language."""
+def google_translate_batch(texts: List[str], source: str, target: str) -> List[str]:
+    """
+    Translate a packed batch with one Google request by joining lines with
+    newlines. Falls back to one request per line if the line count changes.
+    """
+    translator = GoogleTranslator(source=source, target=target)
+    joined = "\n".join(" ".join(text.split()) for text in texts)
+    lines = translator.translate(joined).split("\n")
+    if len(lines) == len(texts):
+        return [line.strip() for line in lines]
+    return [translator.translate(text) for text in texts]
+
+
+class LibreTranslateBackend:
+    """
+    Batch translator for a LibreTranslate-compatible HTTP endpoint
+    (POST {"q": [...], "source", "target"} -> {"translatedText": [...]}).
+    Used for self-hosted servers and the local stand-in in tools/.
+    """
+
+    def __init__(self, url: str, api_key: Optional[str] = None, timeout: float = 30):
+        self.url = url
+        self.api_key = api_key
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def __call__(self, texts: List[str], source: str, target: str) -> List[str]:
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+        payload = {"q": texts, "source": source, "target": target, "format": "text"}
+        if self.api_key:
+            payload["api_key"] = self.api_key
+        response = session.post(self.url, json=payload, timeout=self.timeout)
+        response.raise_for_status()
+        translations = response.json()["translatedText"]
+        if len(translations) != len(texts):
+            raise ValueError(
+                f"Translator returned {len(translations)} lines for {len(texts)}"
+            )
+        return translations
+
+
+class RateLimiter:
+    """Thread-safe limiter spacing calls at least 1/rate seconds apart."""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate if rate > 0 else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            wait = self._next - now
+            self._next = max(now, self._next) + self.interval
+        if wait > 0:
+            time.sleep(wait)
+
+
+@dataclass
+class TranslationReport:
+    """Outcome of a scheduled translation run."""
+
+    translations: List[str]
+    failed: List[int] = field(default_factory=list)
+    requests: int = 0
+    retries: int = 0
+    seconds: float = 0.0
+
+
+class TranslationScheduler:
+    """
+    Pack texts into batches under a character budget, send batches
+    concurrently under a rate limit and retry failed batches with
+    exponential backoff. Lines of batches that still fail are reported in
+    TranslationReport.failed and returned untranslated. The worker pool and
+    the rate limit are shared by all translate() calls, including
+    concurrent ones.
+    """
+
+    def __init__(
+        self,
+        backend: TranslateBatch = google_translate_batch,
+        max_chars: int = MAX_BATCH_CHARS,
+        max_lines: int = MAX_BATCH_LINES,
+        max_workers: int = 4,
+        requests_per_second: float = 5.0,
+        max_retries: int = 3,
+        backoff: float = 1.0,
+    ):
+        self.backend = backend
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self.max_workers = max_workers
+        self.limiter = RateLimiter(requests_per_second)
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._pool = ThreadPoolExecutor(max_workers, thread_name_prefix="translate")
+
+    def fills_workers(self, chars: int, lines: int) -> bool:
+        """True once texts of this size pack into a batch for every worker."""
+        return (
+            chars >= self.max_chars * self.max_workers
+            or lines >= self.max_lines * self.max_workers
+        )
+
+    def pack(self, texts: List[str]) -> List[List[int]]:
+        """Group text indices into batches under max_chars and max_lines."""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        size = 0
+        for i, text in enumerate(texts):
+            length = len(text) + 1
+            if current and (
+                size + length > self.max_chars or len(current) >= self.max_lines
+            ):
+                batches.append(current)
+                current, size = [], 0
+            current.append(i)
+            size += length
+        if current:
+            batches.append(current)
+        return batches
+
+    def translate(
+        self, texts: List[str], source: str, target: str
+    ) -> TranslationReport:
+        started = time.perf_counter()
+        report = TranslationReport(translations=list(texts))
+        lock = threading.Lock()
+
+        def run(batch: List[int]) -> None:
+            chunk = [texts[i] for i in batch]
+            for attempt in range(self.max_retries + 1):
+                self.limiter.acquire()
+                with lock:
+                    report.requests += 1
+                    report.retries += 1 if attempt else 0
+                try:
+                    translated = self.backend(chunk, source, target)
+                    for i, text in zip(batch, translated):
+                        report.translations[i] = text or texts[i]
+                    return
+                except Exception as e:
+                    error = e
+                if attempt < self.max_retries:
+                    delay = self.backoff * 2**attempt
+                    time.sleep(delay + random.uniform(0, delay / 2))
+            log_error(f"Translation batch of {len(batch)} lines failed: {error}")
+            with lock:
+                report.failed.extend(batch)
+
+        for future in [self._pool.submit(run, batch) for batch in self.pack(texts)]:
+            future.result()
+        report.failed.sort()
+        report.seconds = time.perf_counter() - started
+        return report
+
+
+_scheduler: Optional[TranslationScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_translation_scheduler() -> TranslationScheduler:
+    """
+    Return the process-wide scheduler, so every call and every job shares
+    one rate limit and worker pool: a LibreTranslate-compatible server when
+    DUBCRAFT_TRANSLATOR_URL is set, Google otherwise.
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            url = os.environ.get("DUBCRAFT_TRANSLATOR_URL")
+            if url:
+                key = os.environ.get("DUBCRAFT_TRANSLATOR_KEY")
+                _scheduler = TranslationScheduler(
+                    LibreTranslateBackend(url, key), requests_per_second=0
+                )
+            else:
+                _scheduler = TranslationScheduler()
+        return _scheduler
+
+
+def translate_texts(
+    texts: List[str],
+    target_language: str,
+    source_language: str = "auto",
+    memory: Optional[TranslationMemory] = None,
+    scheduler: Optional[TranslationScheduler] = None,
+) -> TranslationReport:
+    """
+    Translate a list of texts to the target language.
+    Exact (and, above the memory's fuzzy threshold, near-identical) lines are
+    served from the translation memory; only the remaining unique lines are
+    scheduled for the translator. report.failed lists the indices of texts
+    that could not be translated and were returned unchanged.
+    """
     lang_code = get_language_code(target_language)
-    try:
-        # GoogleTranslator supports batch translation via list input
-        return GoogleTranslator(target=lang_code).translate(texts)
-    except Exception as e:
-        print(f"Batch translation error: {e}")
-        # Return original texts if translation fails
-        return texts
+    memory = memory or get_translation_memory()
+    scheduler = scheduler or get_translation_scheduler()
+    results: List[Optional[str]] = [None] * len(texts)
+    exact = memory.lookup_many(texts, source_language, lang_code) if memory else {}
+    exact_hits = fuzzy_hits = 0
+    misses: Dict[str, List[int]] = {}
+    for i, text in enumerate(texts):
+        norm = normalize_text(text)
+        if not norm:
+            results[i] = text
+        elif norm in exact:
+            results[i] = exact[norm]
+            exact_hits += 1
+        elif norm in misses:
+            misses[norm].append(i)
+        else:
+            match = (
+                memory.fuzzy_lookup(text, source_language, lang_code)
+                if memory
+                else None
+            )
+            if match:
+                results[i] = match[0]
+                fuzzy_hits += 1
+            else:
+                misses[norm] = [i]
+    pending = [texts[indices[0]] for indices in misses.values()]
+    sent = scheduler.translate(pending, source_language, lang_code)
+    failed = set(sent.failed)
+    if memory:
+        memory.store_many(
+            [
+                (text, translation)
+                for j, (text, translation) in enumerate(zip(pending, sent.translations))
+                if j not in failed
+            ],
+            source_language,
+            lang_code,
+        )
+    report = TranslationReport(
+        translations=results,
+        requests=sent.requests,
+        retries=sent.retries,
+        seconds=sent.seconds,
+    )
+    for j, indices in enumerate(misses.values()):
+        for i in indices:
+            results[i] = sent.translations[j]
+            if j in failed:
+                report.failed.append(i)
+    report.failed.sort()
+    if texts:
+        log_debug(
+            f"Translation memory ({source_language}->{lang_code}): "
+            f"{exact_hits} exact, {fuzzy_hits} fuzzy, {len(pending)} sent "
+            f"for {len(texts)} lines "
+            f"({(exact_hits + fuzzy_hits) / len(texts):.0%} hit rate); "
+            f"{sent.requests} requests, {sent.retries} retries, "
+            f"{len(report.failed)} failed"
+        )
+    return report
+
+
+def batch_translate_texts(
+    texts: List[str],
+    target_language: str,
+    source_language: str = "auto",
+    memory: Optional[TranslationMemory] = None,
+) -> List[str]:
+    """Translate a list of texts; untranslatable lines come back unchanged."""
+    return translate_texts(texts, target_language, source_language, memory).translations
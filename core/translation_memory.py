@@ -0,0 +1,158 @@
+"""Persistent translation memory backed by SQLite."""
+
+from typing import Dict, Iterable, List, Optional, Tuple
+from core.constants import DEFAULT_CACHE_PATH
+import difflib
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+TM_PATH = os.path.join(DEFAULT_CACHE_PATH, "translation_memory.sqlite")
+
+# Similarity (0-1) a stored line needs to be reused for an edited line.
+DEFAULT_FUZZY_THRESHOLD = float(os.environ.get("DUBCRAFT_TM_FUZZY", "0.95"))
+
+# Upper bound on stored lines compared per fuzzy lookup.
+FUZZY_CANDIDATES = 500
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    source_lang TEXT NOT NULL,
+    target_lang TEXT NOT NULL,
+    norm_text TEXT NOT NULL,
+    source_text TEXT NOT NULL,
+    translation TEXT NOT NULL,
+    length INTEGER NOT NULL,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (source_lang, target_lang, norm_text)
+);
+CREATE INDEX IF NOT EXISTS entries_length
+    ON entries (source_lang, target_lang, length);
+"""
+
+
+def normalize_text(text: str) -> str:
+    """Case-fold, NFKC-normalize and collapse whitespace for lookups."""
+    text = unicodedata.normalize("NFKC", text).casefold()
+    return re.sub(r"\s+", " ", text).strip()
+
+
+class TranslationMemory:
+    """
+    Local store of previous translations keyed by normalized source text,
+    source language and target language. Safe to share between threads;
+    several processes can use the same file (WAL journal).
+    """
+
+    def __init__(
+        self,
+        path: str = TM_PATH,
+        fuzzy_threshold: float = DEFAULT_FUZZY_THRESHOLD,
+    ):
+        self.path = path
+        self.fuzzy_threshold = fuzzy_threshold
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    def lookup_many(
+        self, texts: Iterable[str], source_lang: str, target_lang: str
+    ) -> Dict[str, str]:
+        """Exact lookups; returns {normalized text: translation} for hits."""
+        keys = list({normalize_text(t) for t in texts})
+        found = {}
+        with self._lock:
+            for i in range(0, len(keys), 500):
+                chunk = keys[i : i + 500]
+                rows = self._conn.execute(
+                    "SELECT norm_text, translation FROM entries "
+                    "WHERE source_lang = ? AND target_lang = ? "
+                    f"AND norm_text IN ({','.join('?' * len(chunk))})",
+                    [source_lang, target_lang, *chunk],
+                )
+                found.update(rows)
+        return found
+
+    def fuzzy_lookup(
+        self,
+        text: str,
+        source_lang: str,
+        target_lang: str,
+        threshold: Optional[float] = None,
+    ) -> Optional[Tuple[str, float]]:
+        """
+        Best stored translation whose source is at least threshold similar
+        (difflib ratio) to text, as (translation, score), or None.
+        """
+        threshold = self.fuzzy_threshold if threshold is None else threshold
+        if threshold >= 1.0:
+            return None
+        norm = normalize_text(text)
+        # Strings of very different length cannot reach the ratio.
+        lo = int(len(norm) * threshold)
+        hi = int(len(norm) / threshold) + 1 if threshold > 0 else 1 << 30
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT norm_text, translation FROM entries "
+                "WHERE source_lang = ? AND target_lang = ? "
+                "AND length BETWEEN ? AND ? "
+                "ORDER BY ABS(length - ?) LIMIT ?",
+                (source_lang, target_lang, lo, hi, len(norm), FUZZY_CANDIDATES),
+            ).fetchall()
+        best = None
+        matcher = difflib.SequenceMatcher(autojunk=False)
+        matcher.set_seq2(norm)
+        for candidate, translation in rows:
+            matcher.set_seq1(candidate)
+            if matcher.real_quick_ratio() < threshold:
+                continue
+            if matcher.quick_ratio() < threshold:
+                continue
+            score = matcher.ratio()
+            if score >= threshold and (best is None or score > best[1]):
+                best = (translation, score)
+        return best
+
+    def store_many(
+        self, pairs: List[Tuple[str, str]], source_lang: str, target_lang: str
+    ) -> None:
+        """Insert or update (source text, translation) pairs."""
+        now = time.time()
+        rows = []
+        for text, translation in pairs:
+            norm = normalize_text(text)
+            if norm and translation:
+                rows.append(
+                    (source_lang, target_lang, norm, text, translation, len(norm), now)
+                )
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_memory: Optional[TranslationMemory] = None
+_memory_lock = threading.Lock()
+
+
+def get_translation_memory() -> Optional[TranslationMemory]:
+    """Return the process-wide translation memory, or None if unavailable."""
+    global _memory
+    with _memory_lock:
+        if _memory is None:
+            try:
+                _memory = TranslationMemory()
+            except Exception as e:
+                print(f"Translation memory error: {e}")
+                return None
+        return _memory
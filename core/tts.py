@@ -1,20 +1,41 @@
 """Text-to-speech using Tortoise-TTS or Bark."""
 
-from typing import List, Optional
+from typing import Callable, List, Optional, Tuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from core.constants import DEFAULT_MODEL_PATH
+from core.tts_cache import get_tts_cache
+import hashlib
+import multiprocessing
 import os
 import tempfile
+import threading
 
 try:
+    import torch
+    import torchaudio
     from tortoise.api import TextToSpeech
     from tortoise.utils.audio import load_voice
 except ImportError:
     TextToSpeech = None
     load_voice = None
 
+TTS_SAMPLE_RATE = 24000
+
+DEFAULT_PRESET = "fast"
+
+LATENTS_DIR = os.environ.get(
+    "DUBCRAFT_LATENTS_DIR", os.path.join(DEFAULT_MODEL_PATH, "tts_latents")
+)
+
+
+def get_voices_dir() -> str:
+    """Return the folder holding one sub-folder of reference clips per voice."""
+    return os.environ.get("TORTOISE_VOICES_DIR", "tortoise/voices")
+
 
 def list_voices() -> List[str]:
     """Return a list of available voices (Tortoise-TTS)."""
-    voices_dir = os.environ.get("TORTOISE_VOICES_DIR", "tortoise/voices")
+    voices_dir = get_voices_dir()
     if not os.path.isdir(voices_dir):
         return []
     return [
@@ -22,28 +43,221 @@ def list_voices() -> List[str]:
     ]
 
 
-def synthesize_speech(text: str, voice: str, emotion: Optional[str] = None) -> str:
+_fingerprints = {}
+
+
+def voice_fingerprint(voice: str) -> str:
+    """
+    Hash of a voice folder's file names and contents. Files are only re-read
+    when their size or modification time changes.
+    """
+    voice_path = os.path.join(get_voices_dir(), voice)
+    files = []
+    for name in sorted(os.listdir(voice_path)):
+        path = os.path.join(voice_path, name)
+        if os.path.isfile(path):
+            stat = os.stat(path)
+            files.append((name, stat.st_size, stat.st_mtime_ns))
+    signature = (voice_path, tuple(files))
+    if signature not in _fingerprints:
+        digest = hashlib.sha256()
+        for name, _, _ in files:
+            digest.update(name.encode("utf-8"))
+            with open(os.path.join(voice_path, name), "rb") as f:
+                for block in iter(lambda: f.read(1 << 20), b""):
+                    digest.update(block)
+        _fingerprints[signature] = digest.hexdigest()
+    return _fingerprints[signature]
+
+
+class TTSEngine:
+    """
+    Long-lived Tortoise-TTS model with per-voice conditioning latents.
+    Latents are computed once per voice and stored under latents_dir, keyed
+    by the voice folder's fingerprint, so they survive restarts and are
+    recomputed only when the reference clips change.
+    """
+
+    def __init__(self, preset: str = DEFAULT_PRESET, latents_dir: str = LATENTS_DIR):
+        if TextToSpeech is None:
+            raise ImportError("Tortoise-TTS is not installed.")
+        self.preset = preset
+        self.latents_dir = latents_dir
+        self._tts = None
+        self._latents = {}
+        self._lock = threading.Lock()
+
+    @property
+    def tts(self) -> "TextToSpeech":
+        if self._tts is None:
+            self._tts = TextToSpeech()
+        return self._tts
+
+    def conditioning_latents(self, voice: str) -> tuple:
+        """Return (and cache in memory and on disk) the latents for a voice."""
+        key = (voice, voice_fingerprint(voice))
+        if key in self._latents:
+            return self._latents[key]
+        cache_path = os.path.join(self.latents_dir, f"{voice}_{key[1][:16]}.pth")
+        if os.path.exists(cache_path):
+            latents = torch.load(cache_path)
+        else:
+            voice_samples, latents = load_voice(
+                voice, extra_voice_dirs=[get_voices_dir()]
+            )
+            if latents is None:
+                latents = self.tts.get_conditioning_latents(voice_samples)
+            os.makedirs(self.latents_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            torch.save(latents, tmp_path)
+            os.replace(tmp_path, cache_path)
+        self._latents[key] = latents
+        return latents
+
+    def synthesize(
+        self,
+        text: str,
+        voice: str,
+        emotion: Optional[str] = None,
+        out_dir: Optional[str] = None,
+    ) -> str:
+        """
+        Synthesize text with a voice and return the path to a new wav file
+        in out_dir (default: the system temp folder).
+        """
+        with self._lock:
+            latents = self.conditioning_latents(voice)
+            # Tortoise-TTS does not natively support emotion, but can be extended in future
+            gen = self.tts.tts_with_preset(
+                text,
+                voice_samples=None,
+                conditioning_latents=latents,
+                preset=self.preset,
+            )
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        fd, out_path = tempfile.mkstemp(suffix=f"_{voice}.wav", dir=out_dir)
+        os.close(fd)
+        try:
+            torchaudio.save(out_path, gen.squeeze(0).cpu(), TTS_SAMPLE_RATE)
+        except Exception:
+            os.remove(out_path)
+            raise
+        return out_path
+
+
+_engine: Optional[TTSEngine] = None
+_engine_lock = threading.Lock()
+
+
+def get_tts_engine() -> TTSEngine:
+    """Return the process-wide TTS engine, creating it on first use."""
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = TTSEngine()
+        return _engine
+
+
+def synthesize_speech(
+    text: str,
+    voice: str,
+    emotion: Optional[str] = None,
+    out_dir: Optional[str] = None,
+) -> str:
     """
     Generate speech audio for given text, voice, and emotion (if supported).
-    Returns path to generated wav file.
+    Returns path to generated wav file. Clips are served from the TTS cache
+    when the same text, voice, emotion and preset were synthesized before;
+    the returned file belongs to the cache and must not be modified. With
+    out_dir the clip is linked there, so cache eviction cannot remove it.
     """
-    if TextToSpeech is None:
-        raise ImportError("Tortoise-TTS is not installed.")
-    tts = TextToSpeech()
-    voices_dir = os.environ.get("TORTOISE_VOICES_DIR", "tortoise/voices")
-    voice_path = os.path.join(voices_dir, voice)
-    voice_samples, conditioning_latents = load_voice(voice_path)
-    preset = "fast"  # Could be parameterized
-    # Tortoise-TTS does not natively support emotion, but can be extended in future
-    gen = tts.tts_with_preset(
-        text,
-        voice_samples=voice_samples,
-        conditioning_latents=conditioning_latents,
-        preset=preset,
-    )
-    out_path = tempfile.mktemp(suffix=f"_{voice}.wav")
-    gen.save(out_path)
-    return out_path
+    cache = get_tts_cache()
+    key = cache.key(text, voice, voice_fingerprint(voice), emotion, DEFAULT_PRESET)
+    cached = cache.checkout(key, out_dir) if out_dir else cache.get(key)
+    if cached:
+        return cached
+    # Written inside the cache root so moving it into the cache is a rename.
+    wav_path = get_tts_engine().synthesize(text, voice, emotion, cache.root)
+    return cache.put(key, wav_path, out_dir)
+
+
+def _init_synthesis_worker(threads: int) -> None:
+    torch.set_num_threads(threads)
+
+
+def _synthesize_in_worker(
+    text: str, voice: str, emotion: Optional[str], out_dir: Optional[str]
+) -> str:
+    # Each worker process keeps its own resident engine between tasks.
+    return synthesize_speech(text, voice, emotion, out_dir)
+
+
+def synthesize_parallel(
+    items: List[Tuple[str, str, Optional[str]]],
+    processes: int = 0,
+    threads_per_process: int = 0,
+    progress: Optional[Callable[[float], None]] = None,
+    out_dir: Optional[str] = None,
+) -> List[str]:
+    """
+    Synthesize (text, voice, emotion) items and return wav paths in input
+    order. Cached clips are resolved up front; the remaining unique clips are
+    pulled from a shared queue by worker processes that each keep a TTS model
+    resident. With out_dir every clip is linked into that folder (as in
+    synthesize_speech), so the paths outlive cache eviction. processes defaults to 1 on a GPU and a quarter of the CPUs
+    otherwise; torch threads are split evenly so workers do not oversubscribe.
+    progress receives the fraction of items done.
+    """
+    cache = get_tts_cache()
+    results: List[Optional[str]] = [None] * len(items)
+    pending = {}
+    done = 0
+    for i, (text, voice, emotion) in enumerate(items):
+        key = cache.key(text, voice, voice_fingerprint(voice), emotion, DEFAULT_PRESET)
+        results[i] = cache.checkout(key, out_dir) if out_dir else cache.get(key)
+        if results[i]:
+            done += 1
+            if progress:
+                progress(done / len(items))
+        else:
+            pending.setdefault(key, []).append(i)
+    if not pending:
+        return results
+    cpus = os.cpu_count() or 1
+    if not processes:
+        gpu = TextToSpeech is not None and torch.cuda.is_available()
+        processes = 1 if gpu else max(1, cpus // 4)
+    processes = min(processes, len(pending))
+    if processes <= 1:
+        for indices in pending.values():
+            text, voice, emotion = items[indices[0]]
+            path = synthesize_speech(text, voice, emotion, out_dir)
+            for i in indices:
+                results[i] = path
+            done += len(indices)
+            if progress:
+                progress(done / len(items))
+        return results
+    threads_per_process = threads_per_process or max(1, cpus // processes)
+    with ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_synthesis_worker,
+        initargs=(threads_per_process,),
+    ) as pool:
+        futures = {
+            pool.submit(_synthesize_in_worker, *items[indices[0]], out_dir): indices
+            for indices in pending.values()
+        }
+        for future in as_completed(futures):
+            path = future.result()
+            for i in futures[future]:
+                results[i] = path
+            done += len(futures[future])
+            if progress:
+                progress(done / len(items))
+    return results
 
 
 def preview_voice(voice: str, emotion: Optional[str] = None) -> str:
@@ -56,15 +270,17 @@ def preview_voice(voice: str, emotion: Optional[str] = None) -> str:
 
 
 def batch_synthesize_speech(
-    texts: List[str], voices: List[str], emotions: Optional[List[str]] = None
+    texts: List[str],
+    voices: List[str],
+    emotions: Optional[List[str]] = None,
+    processes: int = 0,
 ) -> List[str]:
     """
     Batch synthesize speech for multiple texts and voices.
     Returns list of output wav file paths.
     """
-    results = []
+    items = []
     for i, (text, voice) in enumerate(zip(texts, voices)):
         emotion = emotions[i] if emotions and i < len(emotions) else None
-        out_path = synthesize_speech(text, voice, emotion)
-        results.append(out_path)
-    return results
+        items.append((text, voice, emotion))
+    return synthesize_parallel(items, processes)
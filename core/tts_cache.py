@@ -0,0 +1,190 @@
+"""Content-addressed on-disk cache of synthesized TTS clips."""
+
+from typing import Dict, Optional
+from core.constants import DEFAULT_CACHE_PATH
+import hashlib
+import json
+import os
+import shutil
+import threading
+
+TTS_CACHE_DIR = os.path.join(DEFAULT_CACHE_PATH, "tts")
+
+# Bump when synthesis output changes for the same inputs (model, sample rate...).
+TTS_ENGINE_VERSION = "tortoise-1"
+
+DEFAULT_MAX_MB = int(os.environ.get("DUBCRAFT_TTS_CACHE_MB", "2048"))
+
+
+class TTSCache:
+    """
+    Synthesized wav files stored under root/<k[:2]>/<k>.wav, where k hashes
+    (normalized text, voice, voice folder fingerprint, emotion, preset,
+    engine version). Hits refresh the file's mtime; once the cache grows past
+    max_bytes the least recently used files are deleted. Several processes
+    may share one root. Callers must treat returned paths as read-only.
+
+    Eviction does not know which clips a job still needs, so jobs take clips
+    with checkout() or put(..., dest_dir): a hard link in the job's own
+    directory keeps the clip readable after the cache drops its entry.
+    """
+
+    def __init__(self, root: str = TTS_CACHE_DIR, max_mb: int = DEFAULT_MAX_MB):
+        self.root = root
+        self.max_bytes = max_mb * 1024 * 1024
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(
+        text: str,
+        voice: str,
+        voice_fingerprint: str,
+        emotion: Optional[str],
+        preset: str,
+    ) -> str:
+        """Return the content hash identifying a clip."""
+        parts = [
+            " ".join(text.split()),
+            voice,
+            voice_fingerprint,
+            emotion or "",
+            preset,
+            TTS_ENGINE_VERSION,
+        ]
+        encoded = json.dumps(parts, ensure_ascii=False).encode("utf-8")
+        return hashlib.sha256(encoded).hexdigest()
+
+    def path_for(self, key: str) -> str:
+        return os.path.join(self.root, key[:2], key + ".wav")
+
+    def get(self, key: str) -> Optional[str]:
+        """Return the cached clip path for key, or None on a miss."""
+        path = self.path_for(key)
+        try:
+            os.utime(path)
+        except OSError:
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return path
+
+    def checkout(self, key: str, dest_dir: str) -> Optional[str]:
+        """
+        Link the cached clip for key into dest_dir and return the linked
+        path, or None on a miss (including a clip evicted meanwhile).
+        """
+        path = self.get(key)
+        if path is None:
+            return None
+        try:
+            return _link(path, os.path.join(dest_dir, key + ".wav"))
+        except FileNotFoundError:
+            return None
+
+    def put(self, key: str, wav_path: str, dest_dir: Optional[str] = None) -> str:
+        """
+        Move a freshly synthesized wav into the cache and return its path,
+        or with dest_dir the path of a link to it there, made before the
+        clip becomes visible to eviction. Write wav_path under root so the
+        move is a rename.
+        """
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        result = path
+        if dest_dir:
+            result = _link(wav_path, os.path.join(dest_dir, key + ".wav"))
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        shutil.move(wav_path, tmp_path)
+        os.replace(tmp_path, path)
+        with self._lock:
+            if self._size is not None:
+                self._size += os.path.getsize(path)
+            self._evict()
+        return result
+
+    def _scan(self) -> Dict[str, os.stat_result]:
+        files = {}
+        if os.path.isdir(self.root):
+            for shard in os.listdir(self.root):
+                shard_dir = os.path.join(self.root, shard)
+                if not os.path.isdir(shard_dir):
+                    continue
+                for name in os.listdir(shard_dir):
+                    if name.endswith(".wav"):
+                        path = os.path.join(shard_dir, name)
+                        try:
+                            files[path] = os.stat(path)
+                        except OSError:
+                            pass
+        return files
+
+    def _evict(self) -> None:
+        if self._size is not None and self._size <= self.max_bytes:
+            return
+        files = self._scan()
+        self._size = sum(stat.st_size for stat in files.values())
+        if self._size <= self.max_bytes:
+            return
+        # Trim to 90% so a full cache does not rescan on every insert.
+        target = self.max_bytes * 0.9
+        for path, stat in sorted(files.items(), key=lambda item: item[1].st_mtime):
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= stat.st_size
+            except OSError:
+                pass
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            if self._size is None:
+                self._size = sum(stat.st_size for stat in self._scan().values())
+            return self._size
+
+    def stats(self) -> Dict[str, float]:
+        size = self.size_bytes()
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0,
+                "size_mb": round(size / (1024 * 1024), 1),
+                "max_mb": round(self.max_bytes / (1024 * 1024), 1),
+            }
+
+
+def _link(src: str, dest: str) -> str:
+    """Hard-link src to dest (copying across filesystems); returns dest."""
+    if os.path.exists(dest):
+        return dest
+    os.makedirs(os.path.dirname(dest), exist_ok=True)
+    tmp_path = f"{dest}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        os.link(src, tmp_path)
+    except FileNotFoundError:
+        raise
+    except OSError:
+        # Cross-device or no hard-link support.
+        shutil.copyfile(src, tmp_path)
+    os.replace(tmp_path, dest)
+    return dest
+
+
+_cache: Optional[TTSCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_tts_cache() -> TTSCache:
+    """Return the process-wide TTS clip cache."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = TTSCache()
+        return _cache
@@ -1,83 +1,65 @@
 """Video processing: merging audio, burning subtitles."""
 
 from typing import Optional
-import moviepy.editor as mp
+from core.audio_store import HEADER_SIZE, read_header
+from core.media_info import probe_video
 import ffmpeg
 import subprocess
-import os
 
 
 def merge_audio_with_video(
-    video_path: str, audio_path: str, output_path: str, keep_bgm: bool = True
+    video_path: str,
+    audio_path: str,
+    output_path: str,
+    keep_bgm: bool = True,
+    bgm_volume: float = 0.5,
+    bgm_audio: Optional[str] = None,
 ) -> bool:
     """
     Merge dubbed audio with video, optionally keeping background music.
-    If keep_bgm is True, mixes original video audio (music) with dubbed audio.
+    If keep_bgm is True, mixes original video audio (music) with dubbed audio;
+    bgm_audio, an AudioStore file of the already decoded source audio, is
+    read in its place so the source is not decoded again.
+    Runs as a single ffmpeg process: volume, amix and mux happen in one
+    filter graph, the video stream is copied, and no intermediate files are
+    written, so concurrent merges cannot collide.
     """
     try:
+        video = ffmpeg.input(video_path)
+        dubbed = ffmpeg.input(audio_path).audio
         if keep_bgm:
-            # Extract original audio
-            orig_audio_path = output_path + ".orig.wav"
-            (
-                ffmpeg.input(video_path)
-                .output(orig_audio_path, acodec="pcm_s16le", ac=2, ar="44100")
-                .overwrite_output()
-                .run(quiet=True)
+            if bgm_audio:
+                sample_rate, channels, _ = read_header(bgm_audio)
+                original = ffmpeg.input(
+                    bgm_audio,
+                    f="f32le",
+                    ar=sample_rate,
+                    ac=channels,
+                    skip_initial_bytes=HEADER_SIZE,
+                ).audio
+            else:
+                original = video.audio
+            original = original.filter("volume", bgm_volume)
+            audio = ffmpeg.filter(
+                [original, dubbed], "amix", inputs=2, duration="longest"
             )
-            # Mix original and dubbed audio
-            mixed_audio_path = output_path + ".mixed.wav"
-            (
-                ffmpeg.input(orig_audio_path)
-                .filter("volume", 0.5)
-                .output("vol1.wav", acodec="pcm_s16le", ac=2, ar="44100")
-                .overwrite_output()
-                .run(quiet=True)
-            )
-            (
-                ffmpeg.input(audio_path)
-                .filter("volume", 1.0)
-                .output("vol2.wav", acodec="pcm_s16le", ac=2, ar="44100")
-                .overwrite_output()
-                .run(quiet=True)
-            )
-            (
-                ffmpeg.input(["vol1.wav", "vol2.wav"])
-                .filter("amix", inputs=2, duration="longest")
-                .output(mixed_audio_path, acodec="pcm_s16le", ac=2, ar="44100")
-                .overwrite_output()
-                .run(quiet=True)
-            )
-            # Merge mixed audio with video
-            (
-                ffmpeg.input(video_path)
-                .output(
-                    output_path,
-                    audio=mixed_audio_path,
-                    vcodec="copy",
-                    acodec="aac",
-                    strict="experimental",
-                )
-                .overwrite_output()
-                .run(quiet=True)
-            )
-            # Cleanup temp files
-            for f in [orig_audio_path, "vol1.wav", "vol2.wav", mixed_audio_path]:
-                if os.path.exists(f):
-                    os.remove(f)
         else:
             # Replace audio track with dubbed audio
-            (
-                ffmpeg.input(video_path)
-                .output(
-                    output_path,
-                    audio=audio_path,
-                    vcodec="copy",
-                    acodec="aac",
-                    strict="experimental",
-                )
-                .overwrite_output()
-                .run(quiet=True)
+            audio = dubbed
+        (
+            ffmpeg.output(
+                video.video,
+                audio,
+                output_path,
+                vcodec="copy",
+                acodec="aac",
+                ac=2,
+                ar=44100,
+                strict="experimental",
             )
+            .overwrite_output()
+            .run(quiet=True)
+        )
         return True
     except Exception as e:
         print(f"merge_audio_with_video error: {e}")
@@ -111,35 +93,33 @@ def burn_subtitles(video_path: str, srt_path: str, output_path: str) -> bool:
 def get_video_info(video_path: str) -> Optional[dict]:
     """
     Return video info: duration (s), fps, size (w, h), audio channels, etc.
+    Backed by the cached ffprobe record; use core.media_info.probe_video for
+    the full VideoInfo (all audio tracks, codecs, bitrates, keyframes).
     """
-    try:
-        clip = mp.VideoFileClip(video_path)
-        info = {
-            "duration": clip.duration,
-            "fps": clip.fps,
-            "size": clip.size,
-            "audio_fps": clip.audio.fps if clip.audio else None,
-            "audio_channels": clip.audio.nchannels if clip.audio else None,
-        }
-        clip.close()
-        return info
-    except Exception as e:
-        print(f"get_video_info error: {e}")
+    info = probe_video(video_path)
+    if info is None:
         return None
+    audio = info.audio_tracks[0] if info.audio_tracks else None
+    return {
+        "duration": info.duration,
+        "fps": info.fps,
+        "size": [info.width, info.height],
+        "audio_fps": audio.sample_rate if audio else None,
+        "audio_channels": audio.channels if audio else None,
+        "info": info,
+    }
 
 
 def extract_preview_frame(video_path: str, time: float, out_path: str) -> bool:
     """
-    Extract a frame at a given time for preview using moviepy.
+    Extract the frame at a given time for preview. The input is seeked
+    before decoding, so only the frames from the preceding keyframe are
+    decoded. For many frames use core.thumbnails.ThumbnailStrip instead.
     """
     try:
-        clip = mp.VideoFileClip(video_path)
-        frame = clip.get_frame(time)
-        from PIL import Image
-
-        img = Image.fromarray(frame)
-        img.save(out_path)
-        clip.close()
+        cmd = ["ffmpeg", "-nostdin", "-v", "error", "-y", "-ss", f"{time:.3f}"]
+        cmd += ["-an", "-i", video_path, "-frames:v", "1", out_path]
+        subprocess.run(cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
         return True
     except Exception as e:
         print(f"extract_preview_frame error: {e}")
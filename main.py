@@ -1,9 +1,17 @@
 from ui.main_window import DubCraftMainWindow
 from PyQt6.QtWidgets import QApplication
+import asyncio
+import qasync
 import sys
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # Pipeline stages are scheduled as asyncio tasks on the Qt event loop.
+    loop = qasync.QEventLoop(app)
+    asyncio.set_event_loop(loop)
+    closing = asyncio.Event()
+    app.aboutToQuit.connect(closing.set)
     window = DubCraftMainWindow()
     window.show()
-    sys.exit(app.exec())
+    with loop:
+        loop.run_until_complete(closing.wait())
@@ -1,31 +1,266 @@
 """Autosave and session restore."""
 
+import atexit
+import copy
 import json
 import os
-from typing import Any, Optional
+import threading
+import time
+from typing import Any, Dict, List, Optional
 
 AUTOSAVE_PATH = os.path.join("export", "dubcraft_autosave.json")
+JOURNAL_PATH = AUTOSAVE_PATH + ".journal"
+
+# Saves arriving within this many seconds of each other are written once.
+DEBOUNCE_SECONDS = 1.0
+# A steady stream of saves is still written this many debounce windows
+# after the first pending one.
+MAX_WAIT_DEBOUNCES = 5
+# The journal is folded into a fresh snapshot once it grows past this size.
+COMPACT_BYTES = 2 * 1024 * 1024
+# Lists with more changed items than this are journaled whole.
+MAX_ITEM_CHANGES = 64
+
+SNAPSHOT_FORMAT = "dubcraft-autosave"
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _atomic_write(path: str, text: str) -> None:
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+class Autosaver:
+    """
+    Coalesce session saves on a background thread. Each write appends only
+    what changed since the last one to an append-only journal (JSON lines):
+    changed items of list values, or whole values otherwise. When the
+    journal grows past COMPACT_BYTES it is folded into a compact snapshot
+    written with an atomic rename. restore() replays snapshot plus journal.
+    """
+
+    def __init__(
+        self,
+        path: str = AUTOSAVE_PATH,
+        journal_path: Optional[str] = None,
+        debounce: float = DEBOUNCE_SECONDS,
+        compact_bytes: int = COMPACT_BYTES,
+    ):
+        self.path = path
+        self.journal_path = journal_path or path + ".journal"
+        self.debounce = debounce
+        self.compact_bytes = compact_bytes
+        self._pending: Optional[Dict] = None
+        self._cond = threading.Condition()
+        self._write_lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        # Serialized form of what is on disk: {key: json} or {key: [item json]}
+        self._saved: Optional[Dict[str, Any]] = None
+        self._generation = 0
+
+    def save(self, state: dict) -> None:
+        """Schedule state to be written after the debounce window."""
+        # Shallow copies so later in-place UI edits do not race the writer.
+        pending = {key: _copy_value(value) for key, value in state.items()}
+        with self._cond:
+            self._pending = pending
+            self._cond.notify()
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="autosave", daemon=True
+                )
+                self._thread.start()
+
+    def flush(self) -> None:
+        """Write any pending state now, on the calling thread."""
+        with self._cond:
+            state, self._pending = self._pending, None
+        if state is not None:
+            self._write(state)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    if not self._cond.wait(timeout=30):
+                        self._thread = None
+                        return
+                # Restart the window while saves keep arriving, up to a limit.
+                deadline = time.monotonic() + self.debounce * MAX_WAIT_DEBOUNCES
+                while True:
+                    pending = self._pending
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(timeout=min(self.debounce, remaining))
+                    if self._pending is pending:
+                        break
+                state, self._pending = self._pending, None
+            if state is not None:
+                self._write(state)
+
+    def _write(self, state: dict) -> None:
+        with self._write_lock:
+            try:
+                if self._saved is None:
+                    self._load_saved()
+                records = self._diff(state)
+                if not records:
+                    return
+                with open(self.journal_path, "a", encoding="utf-8") as f:
+                    f.write("".join(_dumps(r) + "\n" for r in records))
+                    f.flush()
+                    os.fsync(f.fileno())
+                    size = f.tell()
+                if size > self.compact_bytes:
+                    self._compact(state)
+            except Exception as e:
+                print(f"Autosave error: {e}")
+                # Re-read the saved state before the next write.
+                self._saved = None
+
+    def _serialize(self, state: dict) -> Dict[str, Any]:
+        return {
+            key: (
+                [_dumps(item) for item in value]
+                if isinstance(value, list)
+                else _dumps(value)
+            )
+            for key, value in state.items()
+        }
+
+    def _diff(self, state: dict) -> List[Dict]:
+        current = self._serialize(state)
+        records = []
+        gen = self._generation
+        for key, value in current.items():
+            old = self._saved.get(key)
+            if old == value:
+                continue
+            if isinstance(value, list) and isinstance(old, list):
+                changed = [
+                    i for i, item in enumerate(value) if i >= len(old) or old[i] != item
+                ]
+                if len(changed) <= MAX_ITEM_CHANGES:
+                    records.append(
+                        {
+                            "g": gen,
+                            "k": key,
+                            "len": len(value),
+                            "items": {str(i): state[key][i] for i in changed},
+                        }
+                    )
+                    continue
+            records.append({"g": gen, "k": key, "v": state[key]})
+        for key in self._saved.keys() - current.keys():
+            records.append({"g": gen, "k": key, "del": True})
+        self._saved = current
+        return records
+
+    def _compact(self, state: dict) -> None:
+        self._generation += 1
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "generation": self._generation,
+            "state": state,
+        }
+        _atomic_write(self.path, _dumps(snapshot))
+        # Records older than the snapshot generation are ignored on replay,
+        # so a crash before this truncation is harmless.
+        open(self.journal_path, "w").close()
+        self._saved = self._serialize(state)
+
+    def _load_saved(self) -> None:
+        # Fold whatever is on disk (including an old-style session or a
+        # journal with a torn last line) into a fresh snapshot once.
+        state, self._generation = self._replay()
+        self._compact(state or {})
+
+    def _replay(self):
+        if not os.path.exists(self.path):
+            return None, 0
+        with open(self.path, "r", encoding="utf-8") as f:
+            snapshot = json.load(f)
+        if snapshot.get("format") != SNAPSHOT_FORMAT:
+            # Pretty-printed session from before the journal existed.
+            return snapshot, 0
+        state = snapshot["state"]
+        generation = snapshot["generation"]
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # Torn final line from an interrupted write.
+                        break
+                    if record.get("g") == generation:
+                        _apply(state, record)
+        return state, generation
+
+    def restore(self) -> Optional[dict]:
+        """Return the last saved state, or None if there is none."""
+        with self._write_lock:
+            state, _ = self._replay()
+            return state
+
+
+def _copy_value(value: Any) -> Any:
+    if isinstance(value, list):
+        return [dict(item) if isinstance(item, dict) else item for item in value]
+    return copy.copy(value)
+
+
+def _apply(state: dict, record: Dict) -> None:
+    key = record["k"]
+    if record.get("del"):
+        state.pop(key, None)
+    elif "items" in record:
+        value = state.get(key)
+        value = list(value) if isinstance(value, list) else []
+        del value[record["len"] :]
+        value.extend([None] * (record["len"] - len(value)))
+        for i, item in record["items"].items():
+            value[int(i)] = item
+        state[key] = value
+    else:
+        state[key] = record["v"]
+
+
+_autosaver = Autosaver()
+atexit.register(_autosaver.flush)
 
 
 def autosave_session(state: dict) -> bool:
-    """Save current session state to a JSON file."""
+    """
+    Schedule the session state to be saved. Returns immediately; rapid calls
+    are coalesced and written on a background thread.
+    """
     try:
         os.makedirs(os.path.dirname(AUTOSAVE_PATH), exist_ok=True)
-        with open(AUTOSAVE_PATH, "w", encoding="utf-8") as f:
-            json.dump(state, f, ensure_ascii=False, indent=2)
+        _autosaver.save(state)
         return True
     except Exception as e:
         print(f"Autosave error: {e}")
         return False
 
 
+def flush_autosave() -> None:
+    """Write any pending autosave immediately (e.g. before quitting)."""
+    _autosaver.flush()
+
+
 def restore_session() -> Optional[dict]:
-    """Restore last session state from JSON file."""
+    """Restore last session state from the snapshot and its journal."""
     try:
-        if not os.path.exists(AUTOSAVE_PATH):
-            return None
-        with open(AUTOSAVE_PATH, "r", encoding="utf-8") as f:
-            return json.load(f)
+        return _autosaver.restore()
     except Exception as e:
         print(f"Restore session error: {e}")
         return None
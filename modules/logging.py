@@ -1,28 +1,245 @@
 """Error and debug logging."""
 
+import atexit
 import os
+import queue
+import threading
+import time
 from datetime import datetime
+from typing import Any, List, Optional, Tuple
 
 LOG_PATH = os.path.join("export", "dubcraft.log")
 
+# The log is rotated to dubcraft.log.1 ... .N past either limit.
+MAX_LOG_BYTES = int(os.environ.get("DUBCRAFT_LOG_MAX_MB", "10")) * 1024 * 1024
+ROTATE_SECONDS = 24 * 3600
+BACKUP_COUNT = 5
 
-def log_error(msg: str) -> None:
-    """Log an error message with timestamp."""
-    _log(msg, level="ERROR")
+# Position in the log for tail_log: (file identity, byte offset).
+LogCursor = Tuple[int, int]
 
+_FLUSH = object()
+_CLEAR = object()
 
-def log_debug(msg: str) -> None:
-    """Log a debug message with timestamp."""
-    _log(msg, level="DEBUG")
 
+def format_fields(fields: dict) -> str:
+    """Render structured fields as ' key=value' pairs, durations in seconds."""
+    parts = []
+    for key, value in fields.items():
+        if value is None:
+            continue
+        if isinstance(value, float):
+            value = f"{value:.3f}"
+        value = str(value)
+        if not value or any(c.isspace() for c in value):
+            value = '"' + value.replace('"', "'") + '"'
+        parts.append(f" {key}={value}")
+    return "".join(parts)
 
-def _log(msg: str, level: str) -> None:
+
+class LogWriter:
+    """
+    Background writer: callers enqueue finished lines and return at once.
+    A single thread keeps the file open, writes whatever has queued up in
+    one go and rotates by size and age.
+    """
+
+    def __init__(
+        self,
+        path: str = LOG_PATH,
+        max_bytes: int = MAX_LOG_BYTES,
+        rotate_seconds: float = ROTATE_SECONDS,
+        backup_count: int = BACKUP_COUNT,
+    ):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.rotate_seconds = rotate_seconds
+        self.backup_count = backup_count
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._file = None
+        self._opened_at = 0.0
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+    def write(self, line: str) -> None:
+        self._ensure_thread()
+        self._queue.put(line)
+
+    def flush(self, timeout: float = 5.0) -> None:
+        """Block until everything queued so far is on disk."""
+        if self._thread is None:
+            return
+        done = threading.Event()
+        self._queue.put((_FLUSH, done))
+        done.wait(timeout)
+
+    def clear(self) -> None:
+        """Truncate the current log file (after queued lines are written)."""
+        self._ensure_thread()
+        done = threading.Event()
+        self._queue.put((_CLEAR, done))
+        done.wait(5.0)
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="log-writer", daemon=True
+                )
+                self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            lines: List[str] = []
+            for item in items:
+                if isinstance(item, str):
+                    lines.append(item)
+                    continue
+                self._write(lines)
+                lines = []
+                command, done = item
+                if command is _CLEAR:
+                    self._truncate()
+                done.set()
+            self._write(lines)
+
+    def _open(self) -> None:
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        self._file = open(self.path, "a", encoding="utf-8")
+        self._opened_at = time.time()
+        if self._file.tell():
+            # Continuing an existing file: its age counts from its first line.
+            self._opened_at = min(self._opened_at, _first_line_time(self.path))
+
+    def _write(self, lines: List[str]) -> None:
+        if not lines:
+            return
+        try:
+            if self._file is None:
+                self._open()
+            elif self._should_rotate():
+                self._rotate()
+            self._file.write("\n".join(lines) + "\n")
+            self._file.flush()
+        except Exception as e:
+            print(f"Logging to file failed: {e}")
+            self._file = None
+
+    def _should_rotate(self) -> bool:
+        return (
+            self._file.tell() >= self.max_bytes
+            or time.time() - self._opened_at >= self.rotate_seconds
+        )
+
+    def _rotate(self) -> None:
+        self._file.close()
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        if self.backup_count > 0:
+            os.replace(self.path, f"{self.path}.1")
+        else:
+            os.remove(self.path)
+        self._open()
+
+    def _truncate(self) -> None:
+        try:
+            if self._file is None:
+                self._open()
+            self._file.seek(0)
+            self._file.truncate()
+            self._opened_at = time.time()
+        except Exception as e:
+            print(f"Clearing log failed: {e}")
+
+
+def _first_line_time(path: str) -> float:
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            stamp = f.readline()[1:20]
+        return datetime.strptime(stamp, "%Y-%m-%d %H:%M:%S").timestamp()
+    except (OSError, ValueError):
+        return time.time()
+
+
+_writer = LogWriter()
+atexit.register(_writer.flush)
+
+
+def log_error(msg: str, **fields: Any) -> None:
+    """Log an error message with timestamp and optional structured fields."""
+    _log(msg, level="ERROR", fields=fields)
+
+
+def log_info(msg: str, **fields: Any) -> None:
+    """Log an informational message, e.g. log_info("done", stage="tts")."""
+    _log(msg, level="INFO", fields=fields)
+
+
+def log_debug(msg: str, **fields: Any) -> None:
+    """Log a debug message with timestamp and optional structured fields."""
+    _log(msg, level="DEBUG", fields=fields)
+
+
+def _log(msg: str, level: str, fields: Optional[dict] = None) -> None:
     timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    line = f"[{timestamp}] [{level}] {msg}"
+    line = f"[{timestamp}] [{level}] {msg}{format_fields(fields or {})}"
     print(line)
+    _writer.write(line)
+
+
+def flush_logs() -> None:
+    """Wait until all logged lines have been written."""
+    _writer.flush()
+
+
+def clear_logs() -> None:
+    """Empty the current log file."""
+    _writer.clear()
+
+
+def tail_log(
+    cursor: Optional[LogCursor] = None, max_bytes: int = 256 * 1024
+) -> Tuple[str, LogCursor, bool]:
+    """
+    Return (text, cursor, reset) with the complete lines appended since
+    cursor, reading at most max_bytes. Without a cursor, starts at the last
+    max_bytes of the file. reset is True when the file was rotated or
+    cleared since cursor, in which case text starts from the new file.
+    """
     try:
-        os.makedirs(os.path.dirname(LOG_PATH), exist_ok=True)
-        with open(LOG_PATH, "a", encoding="utf-8") as f:
-            f.write(line + "\n")
-    except Exception as e:
-        print(f"Logging to file failed: {e}")
+        stat = os.stat(LOG_PATH)
+    except OSError:
+        return "", (0, 0), cursor is not None and cursor[1] > 0
+    identity = stat.st_ino
+    reset = False
+    if cursor is None:
+        offset = max(0, stat.st_size - max_bytes)
+    elif cursor[0] != identity or cursor[1] > stat.st_size:
+        offset, reset = 0, True
+    else:
+        offset = cursor[1]
+    if offset >= stat.st_size:
+        return "", (identity, offset), reset
+    with open(LOG_PATH, "rb") as f:
+        f.seek(offset)
+        data = f.read(max_bytes)
+    if cursor is None and offset > 0:
+        # Started mid-file: skip the partial first line.
+        start = data.find(b"\n") + 1
+        data, offset = data[start:], offset + start
+    end = data.rfind(b"\n") + 1
+    if end == 0 and len(data) == max_bytes:
+        # A single line longer than max_bytes is returned in pieces.
+        end = len(data)
+    text = data[:end].decode("utf-8", errors="replace")
+    return text, (identity, offset + end), reset
@@ -0,0 +1,95 @@
+"""
+Local stand-in translator server and throughput benchmark.
+
+Serves a LibreTranslate-compatible /translate endpoint that echoes its input
+after a configurable latency and failure rate, so the translation scheduler
+can be measured without the network:
+
+    python -m tools.translation_bench --lines 5000 --workers 8 --fail-rate 0.05
+    python -m tools.translation_bench --serve --port 5005
+
+With --serve, point the app at it via
+DUBCRAFT_TRANSLATOR_URL=http://127.0.0.1:5005/translate.
+"""
+
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import argparse
+import json
+import random
+import threading
+import time
+
+from core.translation import LibreTranslateBackend, TranslationScheduler
+
+
+def make_handler(latency: float, fail_rate: float):
+    class StubTranslatorHandler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(latency)
+            if random.random() < fail_rate:
+                self.send_error(503, "Simulated failure")
+                return
+            texts = body["q"] if isinstance(body["q"], list) else [body["q"]]
+            payload = json.dumps(
+                {"translatedText": [f"[{body['target']}] {t}" for t in texts]}
+            ).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubTranslatorHandler
+
+
+def start_server(
+    port: int = 0, latency: float = 0.05, fail_rate: float = 0.0
+) -> ThreadingHTTPServer:
+    """Start the stand-in server on a background thread and return it."""
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(latency, fail_rate))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--serve", action="store_true", help="Only run the server")
+    parser.add_argument("--port", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds/request")
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--lines", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--max-chars", type=int, default=4500)
+    parser.add_argument("--rps", type=float, default=0, help="Rate limit (0 = none)")
+    args = parser.parse_args()
+
+    server = start_server(args.port, args.latency, args.fail_rate)
+    url = f"http://127.0.0.1:{server.server_port}/translate"
+    if args.serve:
+        print(f"Stand-in translator listening on {url}")
+        threading.Event().wait()
+
+    texts = [f"Line {i}: the quick brown fox jumps." for i in range(args.lines)]
+    scheduler = TranslationScheduler(
+        LibreTranslateBackend(url),
+        max_chars=args.max_chars,
+        max_workers=args.workers,
+        requests_per_second=args.rps,
+        backoff=0.05,
+    )
+    report = scheduler.translate(texts, "en", "es")
+    server.shutdown()
+    print(
+        f"{len(texts)} lines in {report.seconds:.2f}s "
+        f"({len(texts) / report.seconds:.0f} lines/s), "
+        f"{report.requests} requests, {report.retries} retries, "
+        f"{len(report.failed)} failed"
+    )
+
+
+if __name__ == "__main__":
+    main()
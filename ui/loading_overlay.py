@@ -1,10 +1,12 @@
-from PyQt6.QtWidgets import QWidget, QLabel, QVBoxLayout
-from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QWidget, QLabel, QPushButton, QVBoxLayout
+from PyQt6.QtCore import Qt, pyqtSignal
 from PyQt6.QtGui import QMovie
 import os
 
 
 class LoadingOverlay(QWidget):
+    cancel_requested = pyqtSignal()
+
     def __init__(self, parent=None, message="Loading..."):
         super().__init__(parent)
         self.setAttribute(Qt.WidgetAttribute.WA_StyledBackground, True)
@@ -23,10 +25,18 @@ class LoadingOverlay(QWidget):
         self.label = QLabel(message)
         self.label.setStyleSheet("color: #fff; font-size: 1.2em; margin-top: 16px;")
         layout.addWidget(self.label)
+        # Optional cancel button for long-running jobs
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.setVisible(False)
+        self.cancel_btn.clicked.connect(self.cancel_requested.emit)
+        layout.addWidget(self.cancel_btn, alignment=Qt.AlignmentFlag.AlignCenter)
 
-    def show(self, message=None):
+    def show(self, message=None, cancellable=None):
         if message:
             self.label.setText(message)
+        if cancellable is not None:
+            self.cancel_btn.setVisible(cancellable)
+            self.cancel_btn.setEnabled(True)
         self.setVisible(True)
         self.movie.start()
         self.raise_()
@@ -14,6 +14,7 @@ from PyQt6.QtWidgets import (
     QMessageBox,
     QComboBox,
     QTextEdit,
+    QPlainTextEdit,
     QCheckBox,
     QFileDialog,
     QLineEdit,
@@ -24,130 +25,22 @@ from PyQt6.QtWidgets import (
     QAbstractItemView,
     QDialogButtonBox,
 )
-from PyQt6.QtCore import Qt, QThread, pyqtSignal, QObject, QPropertyAnimation
+from PyQt6.QtCore import Qt, QPropertyAnimation, QTimer
 from PyQt6.QtGui import QIcon
+import asyncio
 import os
 from ui.file_upload import FileUploadWidget
 from ui.language_selector import LanguageSelectorWidget
-from core.audio import extract_audio
-import tempfile
 from modules.autosave import autosave_session, restore_session
+from modules.logging import clear_logs, tail_log
 from ui.loading_overlay import LoadingOverlay
-from core.tts import list_voices, synthesize_speech
-from core.diarization import diarize_speakers
-from core.transcription import transcribe_audio
-from core.translation import batch_translate_texts
-from core.video import merge_audio_with_video
-from pydub import AudioSegment
+from core.tts import list_voices
+from core.pipeline import DubbingPipeline, PipelineConfig
+from core.project import PROJECT_EXTENSION, open_project, session_to_project
+from core.segments import SegmentTable
 from core.subtitles import generate_srt
 
 
-class AudioExtractWorker(QObject):
-    finished = pyqtSignal(bool, str)
-    progress = pyqtSignal(int)
-
-    def __init__(self, video_path, audio_out_path):
-        super().__init__()
-        self.video_path = video_path
-        self.audio_out_path = audio_out_path
-
-    def run(self):
-        self.progress.emit(10)
-        success = extract_audio(self.video_path, self.audio_out_path)
-        self.progress.emit(100 if success else 0)
-        self.finished.emit(success, self.audio_out_path if success else "")
-
-
-class DiarizationWorker(QObject):
-    finished = pyqtSignal(list)
-    progress = pyqtSignal(int)
-
-    def __init__(self, audio_path):
-        super().__init__()
-        self.audio_path = audio_path
-
-    def run(self):
-        self.progress.emit(20)
-        speakers = diarize_speakers(self.audio_path)
-        self.progress.emit(40)
-        self.finished.emit(speakers)
-
-
-class TranscriptionWorker(QObject):
-    finished = pyqtSignal(list)
-    progress = pyqtSignal(int)
-
-    def __init__(self, audio_path):
-        super().__init__()
-        self.audio_path = audio_path
-
-    def run(self):
-        self.progress.emit(30)
-        segments = transcribe_audio(self.audio_path)
-        self.progress.emit(50)
-        self.finished.emit(segments)
-
-
-class TranslationWorker(QObject):
-    finished = pyqtSignal(list)
-    progress = pyqtSignal(int)
-
-    def __init__(self, segments, target_language):
-        super().__init__()
-        self.segments = segments
-        self.target_language = target_language
-
-    def run(self):
-        self.progress.emit(55)
-        texts = [seg["text"] for seg in self.segments]
-        translated = batch_translate_texts(texts, self.target_language)
-        self.progress.emit(60)
-        self.finished.emit(translated)
-
-
-class TTSDubWorker(QObject):
-    finished = pyqtSignal(str)
-    progress = pyqtSignal(int)
-
-    def __init__(self, transcript, speakers, voices, emotions, audio_out_path):
-        super().__init__()
-        self.transcript = transcript
-        self.speakers = speakers
-        self.voices = voices
-        self.emotions = emotions
-        self.audio_out_path = audio_out_path
-
-    def run(self):
-        self.progress.emit(70)
-        # Synthesize each segment and concatenate
-        segments_audio = []
-        for i, seg in enumerate(self.transcript):
-            speaker = seg.get(
-                "speaker", self.speakers[0] if self.speakers else "Speaker 1"
-            )
-            text = seg.get("translated_text", seg.get("text", ""))
-            voice = self.voices.get(
-                speaker,
-                (
-                    self.voices[self.speakers.index(speaker)]
-                    if speaker in self.speakers
-                    else list(self.voices.values())[0]
-                ),
-            )
-            emotion = self.emotions.get(speaker, None)
-            audio_path = synthesize_speech(text, voice, emotion)
-            segments_audio.append(AudioSegment.from_file(audio_path))
-            self.progress.emit(70 + int(20 * (i + 1) / len(self.transcript)))
-        # Concatenate all segments
-        if segments_audio:
-            final_audio = segments_audio[0]
-            for seg_audio in segments_audio[1:]:
-                final_audio += seg_audio
-            final_audio.export(self.audio_out_path, format="wav")
-        self.progress.emit(90)
-        self.finished.emit(self.audio_out_path)
-
-
 class DubCraftMainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
@@ -170,12 +63,13 @@ class DubCraftMainWindow(QMainWindow):
         }
         self.speakers = []  # List of detected speakers
         self.voices = list_voices() or ["Voice A", "Voice B", "Voice C"]
-        self.transcript = []
+        self.transcript = SegmentTable()
         self.translated_transcript = []
         self.init_ui()
         self.restore_last_session()
         # Loading spinner overlay
         self.loading_overlay = LoadingOverlay(self.centralWidget())
+        self.loading_overlay.cancel_requested.connect(self.cancel_pipeline)
         self.loading_overlay.resize(self.centralWidget().size())
         self.centralWidget().installEventFilter(self)
         # Scan TTS voices on startup
@@ -205,7 +99,8 @@ class DubCraftMainWindow(QMainWindow):
         self.panels.addWidget(self.make_project_panel())
         self.panels.addWidget(self.make_voices_panel())
         self.panels.addWidget(self.make_export_panel())
-        self.panels.addWidget(self.make_logs_panel())
+        self.logs_panel = self.make_logs_panel()
+        self.panels.addWidget(self.logs_panel)
         main_layout.addWidget(self.sidebar)
         main_layout.addWidget(self.panels)
         self.setCentralWidget(main_widget)
@@ -278,6 +173,17 @@ class DubCraftMainWindow(QMainWindow):
         self.edit_trans_btn.setToolTip("Manually edit the translated transcript")
         self.edit_trans_btn.clicked.connect(self.open_edit_translations_dialog)
         l.addWidget(self.edit_trans_btn)
+        # Project files
+        project_row = QHBoxLayout()
+        open_project_btn = QPushButton("Open Project")
+        open_project_btn.setToolTip("Load a saved DubCraft project file")
+        open_project_btn.clicked.connect(self.open_project_file)
+        project_row.addWidget(open_project_btn)
+        save_project_btn = QPushButton("Save Project")
+        save_project_btn.setToolTip("Save the transcript, speakers and voices")
+        save_project_btn.clicked.connect(self.save_project_file)
+        project_row.addWidget(save_project_btn)
+        l.addLayout(project_row)
         l.addStretch()
         # Connect signals for future use
         self.file_upload.fileSelected.connect(self.on_file_selected)
@@ -288,11 +194,11 @@ class DubCraftMainWindow(QMainWindow):
         idx = self.transcript_toggle.currentIndex()
         if idx == 0:
             # Original
-            text = "\n".join([seg["text"] for seg in self.transcript])
+            text = "\n".join(self.transcript.text)
         else:
             # Translated
             text = "\n".join(
-                [seg.get("translated_text", seg["text"]) for seg in self.transcript]
+                self.transcript.translated_text(i) for i in range(len(self.transcript))
             )
         self.transcript_text.setPlainText(text)
 
@@ -306,13 +212,12 @@ class DubCraftMainWindow(QMainWindow):
         )
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         table.setEditTriggers(QAbstractItemView.EditTrigger.AllEditTriggers)
-        for i, seg in enumerate(self.transcript):
-            table.setItem(i, 0, QTableWidgetItem(str(seg.get("start", 0))))
-            table.setItem(i, 1, QTableWidgetItem(str(seg.get("end", 0))))
-            table.setItem(i, 2, QTableWidgetItem(seg["text"]))
-            table.setItem(
-                i, 3, QTableWidgetItem(seg.get("translated_text", seg["text"]))
-            )
+        segments = self.transcript
+        for i in range(len(segments)):
+            table.setItem(i, 0, QTableWidgetItem(str(float(segments.start[i]))))
+            table.setItem(i, 1, QTableWidgetItem(str(float(segments.end[i]))))
+            table.setItem(i, 2, QTableWidgetItem(segments.text[i]))
+            table.setItem(i, 3, QTableWidgetItem(segments.translated_text(i)))
         layout.addWidget(table)
         buttons = QDialogButtonBox(
             QDialogButtonBox.StandardButton.Save
@@ -321,17 +226,16 @@ class DubCraftMainWindow(QMainWindow):
         layout.addWidget(buttons)
 
         def save_edits():
-            for i, seg in enumerate(self.transcript):
+            for i in range(len(segments)):
                 try:
-                    seg["start"] = float(table.item(i, 0).text())
-                    seg["end"] = float(table.item(i, 1).text())
+                    start = float(table.item(i, 0).text())
+                    end = float(table.item(i, 1).text())
+                    segments.set_timing(i, start, end)
                 except Exception:
-                    seg["start"] = seg.get("start", 0)
-                    seg["end"] = seg.get("end", 0)
-                seg["translated_text"] = table.item(i, 3).text()
-            self.translated_transcript = [
-                seg["translated_text"] for seg in self.transcript
-            ]
+                    pass
+                segments.translated[i] = table.item(i, 3).text()
+            self.translated_transcript = list(segments.translated)
+            self.session_state["transcript"] = segments.to_dicts()
             self.session_state["translated_transcript"] = self.translated_transcript
             self.update_transcript_display()
             autosave_session(self.session_state)
@@ -394,11 +298,12 @@ class DubCraftMainWindow(QMainWindow):
         table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
         table.setEditTriggers(QAbstractItemView.EditTrigger.AllEditTriggers)
         speakers = self.speakers if self.speakers else ["Speaker 1", "Speaker 2"]
-        for i, seg in enumerate(self.transcript):
-            table.setItem(i, 0, QTableWidgetItem(seg["text"]))
+        segments = self.transcript
+        for i in range(len(segments)):
+            table.setItem(i, 0, QTableWidgetItem(segments.text[i]))
             speaker_combo = QComboBox()
             speaker_combo.addItems(speakers)
-            current = seg.get("speaker", speakers[0])
+            current = segments.speaker(i) or speakers[0]
             speaker_combo.setCurrentText(str(current))
             table.setCellWidget(i, 1, speaker_combo)
         layout.addWidget(table)
@@ -409,9 +314,10 @@ class DubCraftMainWindow(QMainWindow):
         layout.addWidget(buttons)
 
         def save_edits():
-            for i, seg in enumerate(self.transcript):
+            for i in range(len(segments)):
                 combo = table.cellWidget(i, 1)
-                seg["speaker"] = combo.currentText()
+                segments.set_speaker(i, combo.currentText())
+            self.session_state["transcript"] = segments.to_dicts()
             autosave_session(self.session_state)
             dialog.accept()
 
@@ -435,75 +341,6 @@ class DubCraftMainWindow(QMainWindow):
             self.panels.setCurrentIndex(idx)
         autosave_session(self.session_state)
 
-    def on_diarization_complete(self, speakers):
-        self.loading_overlay.hide()
-        self.progress_bar.setValue(40)
-        self.progress_bar.setFormat("Speakers detected!")
-        self.speakers = speakers if speakers else ["Speaker 1"]
-        self.session_state["speakers"] = self.speakers
-        self.update_voices_panel(speakers=self.speakers)
-        self.status.showMessage(f"Detected {len(self.speakers)} speaker(s).", 4000)
-        autosave_session(self.session_state)
-        # Start TTS and audio reconstruction
-        self.loading_overlay.show("Synthesizing voices and reconstructing audio...")
-        self.progress_bar.setValue(70)
-        self.progress_bar.setFormat("Synthesizing voices...")
-        # Gather voice/emotion assignments
-        voices_map = {}
-        emotions_map = {}
-        for i, (label, voice_combo, emotion_combo, _) in enumerate(
-            self.voice_assign_widgets
-        ):
-            speaker = label.text()
-            voices_map[speaker] = voice_combo.currentText()
-            emotions_map[speaker] = emotion_combo.currentText()
-        self.dubbed_audio_path = tempfile.mktemp(suffix="_dubbed.wav")
-        self.tts_thread = QThread()
-        self.tts_worker = TTSDubWorker(
-            self.transcript,
-            self.speakers,
-            voices_map,
-            emotions_map,
-            self.dubbed_audio_path,
-        )
-        self.tts_worker.moveToThread(self.tts_thread)
-        self.tts_thread.started.connect(self.tts_worker.run)
-        self.tts_worker.progress.connect(self.progress_bar.setValue)
-        self.tts_worker.finished.connect(self.on_tts_complete)
-        self.tts_worker.finished.connect(self.tts_thread.quit)
-        self.tts_worker.finished.connect(self.tts_worker.deleteLater)
-        self.tts_thread.finished.connect(self.tts_thread.deleteLater)
-        self.tts_thread.start()
-        # Re-enable controls for next steps
-        self.file_upload.setEnabled(True)
-        self.language_selector.setEnabled(True)
-
-    def on_tts_complete(self, audio_path):
-        self.progress_bar.setValue(90)
-        self.progress_bar.setFormat("Merging dubbed audio with video...")
-        self.status.showMessage("Merging dubbed audio with video...", 4000)
-        # Merge dubbed audio with video
-        output_video_path = os.path.join(
-            self.export_folder_le.text(), "final_video.mp4"
-        )
-        success = merge_audio_with_video(
-            self.session_state["video_file"],
-            audio_path,
-            output_video_path,
-            keep_bgm=True,
-        )
-        self.loading_overlay.hide()
-        if success:
-            self.progress_bar.setValue(100)
-            self.progress_bar.setFormat("Dubbed video ready!")
-            self.status.showMessage(
-                f"Dubbed video exported to {output_video_path}", 6000
-            )
-        else:
-            self.progress_bar.setValue(0)
-            self.progress_bar.setFormat("Audio/video merge failed.")
-            self.status.showMessage("Audio/video merge failed.", 6000)
-
     def on_language_changed(self, lang):
         self.session_state["language"] = lang
         autosave_session(self.session_state)
@@ -512,23 +349,61 @@ class DubCraftMainWindow(QMainWindow):
     def restore_last_session(self):
         state = restore_session()
         if state:
-            self.session_state.update(state)
-            self.speakers = self.session_state.get("speakers", [])
-            self.voices = self.session_state.get(
-                "voices", list_voices() or ["Voice A", "Voice B", "Voice C"]
-            )
-            self.transcript = self.session_state.get("transcript", [])
-            self.translated_transcript = self.session_state.get(
-                "translated_transcript", []
-            )
-            # Optionally, update UI to reflect restored state
-            if self.session_state.get("language"):
-                self.language_selector.combo.setCurrentText(
-                    self.session_state["language"]
-                )
-            # You could also show the selected file, etc.
-            self.update_voices_panel(self.speakers, self.voices)
-            autosave_session(self.session_state)
+            self.apply_session(state)
+
+    def apply_session(self, state):
+        self.session_state.update(state)
+        self.speakers = self.session_state.get("speakers", [])
+        self.voices = self.session_state.get(
+            "voices", list_voices() or ["Voice A", "Voice B", "Voice C"]
+        )
+        self.transcript = SegmentTable.from_dicts(
+            self.session_state.get("transcript", [])
+        )
+        self.translated_transcript = self.session_state.get("translated_transcript", [])
+        # Optionally, update UI to reflect restored state
+        if self.session_state.get("language"):
+            self.language_selector.combo.setCurrentText(self.session_state["language"])
+        # You could also show the selected file, etc.
+        self.update_voices_panel(self.speakers, self.voices)
+        autosave_session(self.session_state)
+
+    def open_project_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Open Project",
+            os.path.abspath("export"),
+            f"DubCraft Project (*{PROJECT_EXTENSION})",
+        )
+        if not path:
+            return
+        try:
+            state = open_project(path).to_session()
+        except Exception as e:
+            QMessageBox.warning(self, "Open Project", f"Could not open project: {e}")
+            return
+        state.setdefault("words", None)
+        self.apply_session(state)
+        self.update_transcript_display()
+        self.status.showMessage(f"Opened {os.path.basename(path)}", 4000)
+
+    def save_project_file(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self,
+            "Save Project",
+            os.path.abspath("export"),
+            f"DubCraft Project (*{PROJECT_EXTENSION})",
+        )
+        if not path:
+            return
+        if not path.endswith(PROJECT_EXTENSION):
+            path += PROJECT_EXTENSION
+        try:
+            session_to_project(self.session_state, path)
+        except Exception as e:
+            QMessageBox.warning(self, "Save Project", f"Could not save project: {e}")
+            return
+        self.status.showMessage(f"Project saved to {path}", 4000)
 
     def scan_tts_voices(self):
         voices = list_voices() or ["Voice A", "Voice B", "Voice C"]
@@ -538,109 +413,136 @@ class DubCraftMainWindow(QMainWindow):
         # Call this after TTS voice scan
         self.update_voices_panel(voices=voices)
 
+    def current_voice_assignments(self):
+        voices_map = {}
+        emotions_map = {}
+        for label, voice_combo, emotion_combo, _ in self.voice_assign_widgets:
+            speaker = label.text()
+            voices_map[speaker] = voice_combo.currentText()
+            emotions_map[speaker] = emotion_combo.currentText()
+        return voices_map, emotions_map
+
     def on_file_selected(self, file_path):
-        self.progress_bar.setValue(10)
+        self.progress_bar.setValue(0)
         self.file_upload.setEnabled(False)
         self.language_selector.setEnabled(False)
         self.progress_bar.setFormat("Extracting audio...")
-        self.loading_overlay.show("Extracting audio...")
-        self.temp_audio_path = tempfile.mktemp(suffix=".wav")
-        self.audio_thread = QThread()
-        self.audio_worker = AudioExtractWorker(file_path, self.temp_audio_path)
-        self.audio_worker.moveToThread(self.audio_thread)
-        self.audio_thread.started.connect(self.audio_worker.run)
-        self.audio_worker.progress.connect(self.progress_bar.setValue)
-        self.audio_worker.finished.connect(self.on_audio_extracted)
-        self.audio_worker.finished.connect(self.audio_thread.quit)
-        self.audio_worker.finished.connect(self.audio_worker.deleteLater)
-        self.audio_thread.finished.connect(self.audio_thread.deleteLater)
-        self.audio_thread.start()
+        self.loading_overlay.show("Extracting audio...", cancellable=True)
+        self.transcript_text.clear()
+        voices_map, emotions_map = self.current_voice_assignments()
+        config = PipelineConfig(
+            target_language=self.session_state.get("language")
+            or self.language_selector.get_language(),
+            output_dir=self.export_folder_le.text(),
+            output_name="final_video.mp4",
+            # The job's work_dir is removed when it finishes; keep the
+            # dubbed track next to the video for export_assets.
+            audio_output_name="dubbed_audio.wav",
+            voices=voices_map,
+            emotions=emotions_map,
+            keep_bgm=True,
+        )
+        # Stages run on worker threads; callbacks arrive on the qasync loop.
+        self.pipeline = DubbingPipeline(
+            config,
+            progress=self.on_pipeline_progress,
+            on_stage=self.on_stage_complete,
+            on_segment=self.on_segment_ready,
+        )
+        self.pipeline_cancelling = False
+        self.pipeline_task = asyncio.ensure_future(self.pipeline.run_async(file_path))
+        self.pipeline_task.add_done_callback(
+            lambda task: self.on_pipeline_finished(task.result())
+        )
         # Update session state
         self.session_state["video_file"] = file_path
         autosave_session(self.session_state)
         self.status.showMessage("Video file selected. Extracting audio...", 4000)
 
-    def on_audio_extracted(self, success, audio_path):
-        self.loading_overlay.hide()
-        if success:
-            self.progress_bar.setValue(100)
-            self.progress_bar.setFormat("Audio extracted!")
-            self.session_state["audio_path"] = audio_path
+    def on_pipeline_progress(self, value, message):
+        # Stages still report while they wind down; keep "Cancelling..." up.
+        if getattr(self, "pipeline_cancelling", False):
+            return
+        self.progress_bar.setValue(value)
+        self.progress_bar.setFormat(message)
+        self.loading_overlay.show(message)
+
+    def on_segment_ready(self, seg):
+        # Show segments live while the rest of the file is still decoding
+        if self.transcript_toggle.currentIndex() == 0:
+            self.transcript_text.append(seg["text"])
+
+    def on_stage_complete(self, stage, job):
+        if stage == "extract":
             self.status.showMessage("Audio extracted successfully!", 4000)
-            # Start transcription
-            self.loading_overlay.show("Transcribing audio...")
-            self.progress_bar.setValue(30)
-            self.progress_bar.setFormat("Transcribing audio...")
-            self.trans_thread = QThread()
-            self.trans_worker = TranscriptionWorker(audio_path)
-            self.trans_worker.moveToThread(self.trans_thread)
-            self.trans_thread.started.connect(self.trans_worker.run)
-            self.trans_worker.progress.connect(self.progress_bar.setValue)
-            self.trans_worker.finished.connect(self.on_transcription_complete)
-            self.trans_worker.finished.connect(self.trans_thread.quit)
-            self.trans_worker.finished.connect(self.trans_worker.deleteLater)
-            self.trans_thread.finished.connect(self.trans_thread.deleteLater)
-            self.trans_thread.start()
-        else:
-            self.progress_bar.setValue(0)
-            self.progress_bar.setFormat("Audio extraction failed.")
-            self.session_state["audio_path"] = None
-            self.status.showMessage("Audio extraction failed.", 4000)
-            self.file_upload.setEnabled(True)
-            self.language_selector.setEnabled(True)
-            autosave_session(self.session_state)
+        elif stage == "transcribe":
+            self.on_transcription_complete(job.transcript, job.words)
+        elif stage == "translate":
+            self.on_translation_complete()
+        elif stage == "diarize":
+            self.on_diarization_complete(job.speakers)
+        elif stage == "align":
+            self.on_alignment_complete(job.transcript, job.speakers, job.words)
+        autosave_session(self.session_state)
 
-    def on_transcription_complete(self, segments):
-        self.progress_bar.setValue(50)
-        self.progress_bar.setFormat("Transcription complete!")
+    def on_transcription_complete(self, segments, words=None):
         self.transcript = segments
-        self.session_state["transcript"] = segments
-        autosave_session(self.session_state)
+        self.session_state["transcript"] = segments.to_dicts()
+        self.session_state["words"] = words.to_dict() if words is not None else None
+        self.update_transcript_display()
         self.status.showMessage("Transcription complete!", 4000)
-        # Start translation
-        self.loading_overlay.show("Translating transcript...")
-        self.progress_bar.setValue(55)
-        self.progress_bar.setFormat("Translating transcript...")
-        target_lang = self.session_state.get("language", "English")
-        self.transl_thread = QThread()
-        self.transl_worker = TranslationWorker(segments, target_lang)
-        self.transl_worker.moveToThread(self.transl_thread)
-        self.transl_thread.started.connect(self.transl_worker.run)
-        self.transl_worker.progress.connect(self.progress_bar.setValue)
-        self.transl_worker.finished.connect(self.on_translation_complete)
-        self.transl_worker.finished.connect(self.transl_thread.quit)
-        self.transl_worker.finished.connect(self.transl_worker.deleteLater)
-        self.transl_thread.finished.connect(self.transl_thread.deleteLater)
-        self.transl_thread.start()
-
-    def on_translation_complete(self, translated_texts):
-        self.progress_bar.setValue(60)
-        self.progress_bar.setFormat("Translation complete!")
-        # Attach translated text to transcript
-        for i, seg in enumerate(self.transcript):
-            seg["translated_text"] = (
-                translated_texts[i] if i < len(translated_texts) else seg["text"]
-            )
-        self.translated_transcript = [seg["translated_text"] for seg in self.transcript]
+
+    def on_translation_complete(self):
+        segments = self.transcript
+        self.translated_transcript = [
+            segments.translated_text(i) for i in range(len(segments))
+        ]
+        self.session_state["transcript"] = segments.to_dicts()
         self.session_state["translated_transcript"] = self.translated_transcript
-        autosave_session(self.session_state)
+        self.update_transcript_display()
         self.status.showMessage("Translation complete!", 4000)
-        self.loading_overlay.hide()
+
+    def on_diarization_complete(self, speakers):
+        self.update_voices_panel(speakers=speakers)
+        self.status.showMessage(f"Detected {len(speakers)} speaker(s).", 4000)
+
+    def on_alignment_complete(self, segments, speakers, words=None):
+        # Alignment may split segments, so take the job's tables again.
+        self.transcript = segments
+        self.session_state["words"] = words.to_dict() if words is not None else None
+        self.translated_transcript = [
+            segments.translated_text(i) for i in range(len(segments))
+        ]
+        self.session_state["transcript"] = segments.to_dicts()
+        self.session_state["translated_transcript"] = self.translated_transcript
         self.update_transcript_display()
-        # Start diarization
-        self.loading_overlay.show("Detecting speakers (diarization)...")
-        self.progress_bar.setValue(20)
-        self.progress_bar.setFormat("Detecting speakers...")
-        self.diar_thread = QThread()
-        self.diar_worker = DiarizationWorker(self.session_state["audio_path"])
-        self.diar_worker.moveToThread(self.diar_thread)
-        self.diar_thread.started.connect(self.diar_worker.run)
-        self.diar_worker.progress.connect(self.progress_bar.setValue)
-        self.diar_worker.finished.connect(self.on_diarization_complete)
-        self.diar_worker.finished.connect(self.diar_thread.quit)
-        self.diar_worker.finished.connect(self.diar_worker.deleteLater)
-        self.diar_thread.finished.connect(self.diar_thread.deleteLater)
-        self.diar_thread.start()
+        self.update_voices_panel(speakers=speakers)
+
+    def cancel_pipeline(self):
+        if getattr(self, "pipeline", None):
+            self.pipeline_cancelling = True
+            self.loading_overlay.cancel_btn.setEnabled(False)
+            self.loading_overlay.show("Cancelling...")
+            self.pipeline.cancel()
+
+    def on_pipeline_finished(self, job):
+        self.pipeline = None
+        self.loading_overlay.hide()
+        self.file_upload.setEnabled(True)
+        self.language_selector.setEnabled(True)
+        if job.cancelled:
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat("Dubbing cancelled")
+            self.status.showMessage("Dubbing cancelled.", 4000)
+        elif job.success:
+            self.dubbed_audio_path = job.audio_output_path
+            self.progress_bar.setValue(100)
+            self.progress_bar.setFormat("Dubbed video ready!")
+            self.status.showMessage(f"Dubbed video exported to {job.output_path}", 6000)
+        else:
+            self.progress_bar.setValue(0)
+            self.progress_bar.setFormat(f"Dubbing failed: {job.error}")
+            self.status.showMessage(f"Dubbing failed: {job.error}", 6000)
 
     def show_help(self):
         msg = QMessageBox(self)
@@ -663,6 +565,12 @@ For more help, visit the documentation or contact the community!
         # Micro animation: fade transition
         old = self.panels.currentWidget()
         self.panels.setCurrentIndex(idx)
+        # Stream new log lines only while the Logs panel is visible
+        if self.panels.currentWidget() is self.logs_panel:
+            self.load_logs()
+            self.log_timer.start()
+        else:
+            self.log_timer.stop()
         new = self.panels.currentWidget()
         anim = QPropertyAnimation(new, b"windowOpacity")
         new.setWindowOpacity(0.0)
@@ -741,7 +649,7 @@ For more help, visit the documentation or contact the community!
                 errors.append("Video not found. Please run the full workflow first.")
         # Export dubbed audio
         if self.export_audio_cb.isChecked():
-            if hasattr(self, "dubbed_audio_path") and os.path.exists(
+            if getattr(self, "dubbed_audio_path", None) and os.path.exists(
                 self.dubbed_audio_path
             ):
                 audio_out = os.path.join(folder, "translated_audio.wav")
@@ -761,10 +669,11 @@ For more help, visit the documentation or contact the community!
             transcript_out = os.path.join(folder, "transcript.txt")
             try:
                 with open(transcript_out, "w", encoding="utf-8") as f:
-                    for seg in self.transcript:
-                        f.write(
-                            f"[{seg.get('start', 0):.2f}-{seg.get('end', 0):.2f}] {seg['text']}\n"
-                        )
+                    segments = self.transcript
+                    for start, end, text in zip(
+                        segments.start, segments.end, segments.text
+                    ):
+                        f.write(f"[{start:.2f}-{end:.2f}] {text}\n")
                 exported.append("Transcript: transcript.txt")
             except Exception as e:
                 errors.append(f"Transcript export failed: {e}")
@@ -798,8 +707,10 @@ For more help, visit the documentation or contact the community!
         l.setSpacing(18)
         l.setContentsMargins(80, 40, 80, 40)
         l.addWidget(self.make_section_header("Recent Logs"))
-        self.logs_text = QTextEdit()
+        self.logs_text = QPlainTextEdit()
         self.logs_text.setReadOnly(True)
+        # Keep the view bounded however large the log file grows
+        self.logs_text.setMaximumBlockCount(10000)
         self.logs_text.setToolTip("View recent log entries here")
         l.addWidget(self.logs_text)
         clear_btn = QPushButton("Clear Logs")
@@ -807,20 +718,31 @@ For more help, visit the documentation or contact the community!
         clear_btn.clicked.connect(self.clear_logs)
         l.addWidget(clear_btn)
         l.addStretch()
+        self.log_cursor = None
+        self.logs_placeholder = False
+        self.log_timer = QTimer(self)
+        self.log_timer.setInterval(1000)
+        self.log_timer.timeout.connect(self.load_logs)
         self.load_logs()
         return w
 
     def load_logs(self):
-        log_path = os.path.join("export", "dubcraft.log")
-        if os.path.exists(log_path):
-            with open(log_path, "r", encoding="utf-8") as f:
-                self.logs_text.setPlainText(f.read())
-        else:
+        # Only the bytes appended since the last poll are read
+        text, self.log_cursor, reset = tail_log(self.log_cursor)
+        if reset:
+            self.logs_text.clear()
+            self.logs_placeholder = False
+        if text:
+            if self.logs_placeholder:
+                self.logs_text.clear()
+                self.logs_placeholder = False
+            self.logs_text.appendPlainText(text.rstrip("\n"))
+        elif self.logs_text.document().isEmpty():
             self.logs_text.setPlainText("No logs yet.")
+            self.logs_placeholder = True
 
     def clear_logs(self):
+        clear_logs()
         self.logs_text.clear()
-        log_path = os.path.join("export", "dubcraft.log")
-        if os.path.exists(log_path):
-            with open(log_path, "w", encoding="utf-8") as f:
-                f.write("")
+        self.log_cursor = None
+        self.logs_placeholder = False